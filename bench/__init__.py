@@ -0,0 +1,10 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# The server module refuses to import without these (see .travis.yml),
+# benchmarks run against the same mocks as the test suite.
+os.environ.setdefault('FIREBASE_SERVICE_ACCOUNT_JSON', 'sometext')
+os.environ.setdefault('CI', 'true')
+
+import server
@@ -0,0 +1,57 @@
+"""Benchmark of the CPU cost of each AI difficulty level.
+
+Every level searches the same positions (taken every few plies from the test PGN games)
+and the CPU time, node count and depth reached per move are reported.
+
+Usage:
+    python -m bench.bench_ai_levels
+"""
+
+import time
+import chess
+from server.sunfish_ai import AI_LEVELS
+from sunfish.tools import parseFEN
+from sunfish.sunfish import Searcher
+from .pgn_games import load_test_games
+
+# Take a position every STRIDE plies from each test game
+STRIDE = 8
+
+def positions():
+    """FENs of the benchmark positions (excluding finished games)."""
+    fens = []
+    for moves in load_test_games().values():
+        board = chess.Board()
+        for ply, san in enumerate(moves):
+            if ply % STRIDE == 0 and not board.is_game_over():
+                fens.append(board.fen())
+            board.push_san(san)
+    return fens
+
+def run_level(budget, fens):
+    """Searches every position with the given budget, returns per-move samples."""
+    samples = []
+    for fen in fens:
+        position = parseFEN(fen)
+        searcher = Searcher()
+        start = time.process_time()
+        searcher.search(position, **budget)
+        samples.append((time.process_time() - start, searcher.nodes, searcher.depth))
+    return samples
+
+def main():
+    fens = positions()
+    print(f"{len(fens)} positions\n")
+    print(f"{'level':<14}{'budget':<18}{'mean ms':>10}{'max ms':>10}{'nodes':>10}{'depth':>8}{'moves/s/core':>14}")
+    for level, budget in AI_LEVELS.items():
+        samples = run_level(budget, fens)
+        cpu = [s[0] for s in samples]
+        mean = sum(cpu) / len(cpu)
+        nodes = sum(s[1] for s in samples) / len(samples)
+        depth = sum(s[2] for s in samples) / len(samples)
+        budget_str = ', '.join(f'{k}={v}' for k, v in budget.items())
+        print(f"{level:<14}{budget_str:<18}{mean * 1000:>10.1f}{max(cpu) * 1000:>10.1f}"
+              f"{nodes:>10.0f}{depth:>8.1f}{1 / mean:>14.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark of the UCI engine pool against the in-process Sunfish engine.
+
+Reports:
+    startup:    Time to start the pool's processes (paid once per server process).
+    dispatch:   Round trip of an 'isready' command to an idle engine.
+    per move:   Wall-clock time per AI move, for the cheap levels where overhead matters most.
+                The in-process engine renders SAN with Sunfish (which regenerates legal moves),
+                the pool converts the UCI reply with python-chess, which is why it can come out ahead.
+
+Usage:
+    python -m bench.bench_engines
+"""
+
+import time
+import chess
+from server.game import Game
+from server.engines import SunfishEngine, UCIEnginePool
+from server.sunfish_ai import AI_LEVELS
+from .pgn_games import load_test_games
+
+POOL_SIZE = 2
+ROUNDS = 3
+PINGS = 1000
+
+def games():
+    """Game objects at every 8th ply of the test games."""
+    result = []
+    for moves in load_test_games().values():
+        board = chess.Board()
+        for ply, san in enumerate(moves):
+            if ply % 8 == 0 and not board.is_game_over():
+                game = Game('bench')
+                game._board = board.copy()
+                result.append(game)
+            board.push_san(san)
+    return result
+
+def per_move(engine, budget, positions):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for game in positions:
+            engine.best_move(game, budget)
+    return (time.perf_counter() - start) / (ROUNDS * len(positions))
+
+def main():
+    positions = games()
+
+    pool = UCIEnginePool(size=POOL_SIZE)
+    start = time.perf_counter()
+    pool.start()
+    print(f"startup ({POOL_SIZE} processes): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    engine = pool._idle.get()
+    start = time.perf_counter()
+    for _ in range(PINGS):
+        engine.is_alive()
+    pool._idle.put(engine)
+    print(f"dispatch (isready round trip): {(time.perf_counter() - start) / PINGS * 1000:.3f} ms\n")
+
+    in_process = SunfishEngine()
+    print(f"{'level':<14}{'in-process ms':>15}{'uci pool ms':>14}{'overhead ms':>14}")
+    for level in ('beginner', 'casual'):
+        budget = AI_LEVELS[level]
+        local = per_move(in_process, budget, positions)
+        remote = per_move(pool, budget, positions)
+        print(f"{level:<14}{local * 1000:>15.2f}{remote * 1000:>14.2f}{(remote - local) * 1000:>14.2f}")
+
+    pool.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Per-request latency of /makemove with and without the game cache.
+
+The first 60 plies of the 105 ply Yates–Znosko-Borovsky test game are stored in the mock
+database, and the rest of the game is played through the Flask test client. This is run three ways:
+    uncached:   Every request reads the whole game.
+    validated:  Cached games are used after reading their version (the default).
+    trusted:    Cached games are used without reading anything (GAME_CACHE_VALIDATE=false).
+
+Usage:
+    python -m bench.bench_game_cache
+"""
+
+import time
+from unittest.mock import patch
+from server.server import app
+from server.game import Game, WHITE, BLACK
+from server.game_cache import GAME_CACHE
+from test.routes.mock_firebase import MockClient, MockAuth
+from .pgn_games import load_test_games
+
+GAME = 'yates_znosko_borovsky'
+START = 60
+REPEAT = 20
+
+def stored_game(moves):
+    game = Game('player_1', 'bench')
+    game.add_player('player_1', side=WHITE)
+    game.add_player('player_2', side=BLACK)
+    for san in moves[:START]:
+        game.move(san)
+    return game.to_dict()
+
+def play(client, db, moves, game_dict):
+    """Plays the rest of the game, returns the mean milliseconds per request."""
+    players = {WHITE: 'player_1', BLACK: 'player_2'}
+    elapsed = 0
+    for _ in range(REPEAT):
+        # Written around the cache, which trusted mode can't see
+        db.collection('games').document('bench').set(game_dict)
+        GAME_CACHE.invalidate('bench')
+        for ply, san in enumerate(moves[START:], START):
+            form = {'game_id': 'bench', 'user_id': players[WHITE if ply % 2 == 0 else BLACK], 'move': san}
+            start = time.perf_counter()
+            response = client.post('/makemove', data=form)
+            elapsed += time.perf_counter() - start
+            assert response.status_code == 200, response.data
+    return elapsed / (REPEAT * (len(moves) - START)) * 1000
+
+def main():
+    client = app.test_client()
+    moves = load_test_games()[GAME]
+    game_dict = stored_game(moves)
+
+    print(f"{GAME}, /makemove from ply {START} to {len(moves)}\n")
+    print(f"{'mode':<12}{'ms/request':>12}{'hit rate':>10}{'full reads':>12}")
+    for mode in ('uncached', 'validated', 'trusted'):
+        GAME_CACHE.clear()
+        with patch('server.server.db', new_callable=MockClient) as db, \
+                patch('firebase_admin.auth', new_callable=MockAuth) as auth, \
+                patch.object(GAME_CACHE, 'validate', mode != 'trusted'):
+            for user in ('player_1', 'player_2'):
+                auth._mock_add_user(user)
+            if mode == 'uncached':
+                with patch.object(GAME_CACHE._entries, 'set', lambda key, value: None):
+                    ms = play(client, db, moves, game_dict)
+            else:
+                ms = play(client, db, moves, game_dict)
+        requests = REPEAT * (len(moves) - START)
+        print(f"{mode:<12}{ms:>12.3f}{GAME_CACHE.hit_rate:>10.2f}{GAME_CACHE.misses / requests:>12.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Game ID allocation throughput under parallel game creation.
+
+Worker threads create games in the mock database, which is made to take LATENCY seconds per
+read or write (mock operations are otherwise instant and atomic), as each ID allocation and
+game write would over the network. This is run for each way of allocating IDs:
+    counter:    Each game reads counts/games, writes the game, reads the count again and sets
+                it to the game's ID, as create_game used to.
+    blocks of N:    Each worker reserves N IDs at a time with IdAllocator.
+Duplicates are IDs given to more than one game, whose games overwrote each other.
+
+Usage:
+    python -m bench.bench_game_ids
+"""
+
+import threading
+import time
+from collections import Counter
+from server.id_allocator import IdAllocator
+from test.routes.mock_firebase import MockClient
+
+LATENCY = 0.002
+WORKERS = 8
+GAMES_PER_WORKER = 50
+BLOCK_SIZES = (1, 20, 100)
+
+class RemoteDocument:
+    """Document reference that waits LATENCY before each operation, and makes it atomic."""
+
+    lock = threading.Lock()
+
+    def __init__(self, document):
+        self.document = document
+        self.operations = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.document, name)
+
+        def call(*args, **kwargs):
+            time.sleep(LATENCY)
+            with self.lock:
+                self.operations += 1
+                return method(*args, **kwargs)
+        return call
+
+def counter_id(db, counter):
+    """Creates a game with the old read, write, read and set of the count. Returns its ID."""
+    game_id = str(int(counter.get().to_dict()['count']) + 1)
+    RemoteDocument(db.collection('games').document(game_id)).set({'id': game_id})
+    counter_dict = counter.get().to_dict()
+    counter_dict['count'] = int(game_id)
+    counter.set(counter_dict)
+    return game_id
+
+def block_id(allocator):
+    """Creates games with IDs from the given allocator. Returns a function giving the game's ID."""
+    def create(db, counter):
+        game_id = allocator.next_id(counter)
+        RemoteDocument(db.collection('games').document(game_id)).create({'id': game_id})
+        return game_id
+    return create
+
+def run(make_create):
+    """Games per second, duplicate IDs, and counter operations per game, with a 'create' per worker."""
+    db = MockClient()
+    db.collection('counts').add({'count': 0}, document_id='games')
+    counter = RemoteDocument(db.collection('counts').document('games'))
+    ids = []
+
+    def worker(create):
+        for _ in range(GAMES_PER_WORKER):
+            ids.append(create(db, counter))
+
+    threads = [threading.Thread(target=worker, args=(make_create(),)) for _ in range(WORKERS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    duplicates = sum(count - 1 for count in Counter(ids).values())
+    return len(ids) / elapsed, duplicates, counter.operations / len(ids)
+
+def main():
+    modes = [('counter', lambda: counter_id)]
+    modes += [(f'blocks of {size}', lambda size=size: block_id(IdAllocator(size))) for size in BLOCK_SIZES]
+
+    print(f"{WORKERS} workers creating {GAMES_PER_WORKER} games each, {LATENCY * 1000:.0f} ms per database operation\n")
+    print(f"{'allocation':<15}{'games/s':>10}{'duplicates':>12}{'counter ops/game':>18}")
+    for mode, make_create in modes:
+        games_per_second, duplicates, operations = run(make_create)
+        print(f"{mode:<15}{games_per_second:>10.0f}{duplicates:>12}{operations:>18.2f}")
+
+if __name__ == '__main__':
+    main()
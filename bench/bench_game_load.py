@@ -0,0 +1,31 @@
+"""Benchmark of Game.from_dict on the test PGN games.
+
+Compares loading each game from its stored board snapshot (the default) with replaying
+its whole history (verify=True, and the only option for games stored before snapshots).
+
+Usage:
+    python -m bench.bench_game_load
+"""
+
+import timeit
+from server.game import Game, WHITE, BLACK
+from .pgn_games import load_test_games
+
+REPEAT = 200
+
+def main():
+    print(f"{'game':<24}{'plies':>6}{'snapshot (ms)':>15}{'replay (ms)':>13}{'speedup':>9}")
+    for name, moves in load_test_games().items():
+        game = Game('1', '1')
+        game.add_player('1', side=WHITE)
+        game.add_player('2', side=BLACK)
+        for san in moves:
+            game.move(san)
+        stored = game.to_dict()
+
+        snapshot = timeit.timeit(lambda: Game.from_dict(stored), number=REPEAT) / REPEAT * 1000
+        replay = timeit.timeit(lambda: Game.from_dict(stored, verify=True), number=REPEAT) / REPEAT * 1000
+        print(f"{name:<24}{len(moves):>6}{snapshot:>15.3f}{replay:>13.3f}{replay / snapshot:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
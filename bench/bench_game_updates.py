@@ -0,0 +1,61 @@
+"""Bytes written and latency of the routes that change a game without making a move.
+
+The 105 ply Yates–Znosko-Borovsky test game is written to the mock database through the game
+cache, and /drawoffer, /respondoffer, /resign and /joingame are called through the Flask
+test client, with the stored game reset before every request. This is run two ways:
+    set:        The game's snapshot document is rewritten, as before.
+    update:     Only the fields that changed are written, conditional on the game's update time.
+Written bytes are measured as compact JSON.
+
+Usage:
+    python -m bench.bench_game_updates
+"""
+
+import json
+import time
+from unittest.mock import patch
+from server.server import app
+from server.game_cache import GAME_CACHE
+from server.game import Game
+from server.unit_of_work import UnitOfWork
+from test.routes.mock_firebase import MockClient, MockAuth
+from .bench_routes import GAME, stored_game, requests
+
+REPEAT = 200
+
+def run_route(client, db, route, form, game_dict):
+    """Mean bytes written to the game's document and milliseconds per request."""
+    document = db.collection('games').document('bench')
+    # The moves are only written once, and the snapshot (through the game cache) before every request
+    stored_dict = GAME_CACHE.set(document, Game.from_dict(game_dict))
+    written = elapsed = 0
+    for _ in range(REPEAT):
+        GAME_CACHE.set(document, Game.from_dict(game_dict), stored_dict)
+        writes = len(document.writes)
+        start = time.perf_counter()
+        response = client.post(route, data=form)
+        elapsed += time.perf_counter() - start
+        assert response.status_code == 200, response.data
+        written += sum(len(json.dumps(data, separators=(',', ':'))) for _, data in document.writes[writes:])
+    return written / REPEAT, elapsed / REPEAT * 1000
+
+def main():
+    client = app.test_client()
+    modes = [('set', UnitOfWork.set_game), ('update', UnitOfWork.update_game)]
+    results = {}
+    for mode, write in modes:
+        with patch('server.server.db', new_callable=MockClient) as db, \
+                patch('firebase_admin.auth', new_callable=MockAuth) as auth, \
+                patch.object(UnitOfWork, 'update_game', write):
+            for user in ('player_1', 'player_2'):
+                auth._mock_add_user(user)
+            for route, form, route_dict in requests(stored_game())[1:]:
+                results.setdefault(route, []).append(run_route(client, db, route, form, route_dict))
+
+    print(f"{GAME}, {len(stored_game()['history'])} plies, bytes written and mean ms per request\n")
+    print(f"{'route':<15}" + ''.join(f"{mode + ' (B)':>12}{mode + ' (ms)':>12}" for mode, _ in modes))
+    for route, runs in results.items():
+        print(f"{route:<15}" + ''.join(f"{written:>12.0f}{ms:>12.3f}" for written, ms in runs))
+
+if __name__ == '__main__':
+    main()
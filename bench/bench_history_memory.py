@@ -0,0 +1,44 @@
+"""Memory used by the move history of the test PGN games, and the cost of serialising it.
+
+The history is kept as MoveRecord objects and the initial positions as a 64-entry array,
+and only turned into the dicts sent to clients by to_dict. This measures the memory of
+both forms (by copying them with tracemalloc running), and the time taken by to_dict.
+
+Usage:
+    python -m bench.bench_history_memory
+"""
+
+import copy
+import timeit
+import tracemalloc
+from server.game import Game, WHITE, BLACK
+from .pgn_games import load_test_games
+
+REPEAT = 1000
+
+def allocated(obj):
+    """Bytes allocated by a deep copy of obj."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copied = copy.deepcopy(obj)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del copied
+    return size
+
+def main():
+    print(f"{'game':<24}{'plies':>6}{'compact (B)':>13}{'dicts (B)':>11}{'to_dict (ms)':>14}")
+    for name, moves in load_test_games().items():
+        game = Game('1', '1')
+        game.add_player('1', side=WHITE)
+        game.add_player('2', side=BLACK)
+        for san in moves:
+            game.move(san)
+
+        compact = allocated((game._history, game._initial_positions))
+        dicts = allocated((game.history, game.initial_positions))
+        to_dict = timeit.timeit(game.to_dict, number=REPEAT) / REPEAT * 1000
+        print(f"{name:<24}{len(moves):>6}{compact:>13}{dicts:>11}{to_dict:>14.3f}")
+
+if __name__ == '__main__':
+    main()
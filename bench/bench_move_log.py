@@ -0,0 +1,60 @@
+"""Bytes written per move, and time to read a game back, with each storage layout.
+
+The 105 ply Yates–Znosko-Borovsky test game is played move by move, writing the game to the
+mock database after each move the way /makemove does:
+    document:   The whole game dict is written to the game's document.
+    move log:   The move is appended to the moves subcollection, and the snapshot (the game
+                without its history and PGN) is written to the game's document (see game_store).
+Written bytes are measured as compact JSON.
+
+Usage:
+    python -m bench.bench_move_log
+"""
+
+import json
+import timeit
+from unittest.mock import patch
+from server.game import Game, WHITE, BLACK
+from server.game_store import read_game, write_game
+from test.routes.mock_firebase import MockClient, MockDocumentReference
+from .pgn_games import load_test_games
+
+GAME = 'yates_znosko_borovsky'
+REPEAT = 100
+
+def play(write):
+    """Plays the game, writing it after every move. Returns the bytes written for each move, and the game's document."""
+    db = MockClient()
+    doc_ref = db.collection('games').document('bench')
+    written = []
+    set_document = MockDocumentReference.set
+
+    def measured_set(document, data):
+        written[-1] += len(json.dumps(data, separators=(',', ':')))
+        set_document(document, data)
+
+    game = Game('player_1', 'bench')
+    game.add_player('player_1', WHITE)
+    game.add_player('player_2', BLACK)
+    stored_dict = None
+    with patch.object(MockDocumentReference, 'set', measured_set):
+        for san in load_test_games()[GAME]:
+            game.move(san)
+            written.append(0)
+            stored_dict = write(doc_ref, game.to_dict(), stored_dict)
+    return written, doc_ref
+
+def write_document(doc_ref, game_dict, stored_dict):
+    doc_ref.set(game_dict)
+    return game_dict
+
+def main():
+    print(f"{GAME}, {len(load_test_games()[GAME])} plies\n")
+    print(f"{'layout':<12}{'first move (B)':>16}{'last move (B)':>16}{'whole game (KB)':>18}{'read (ms)':>12}")
+    for name, write in (('document', write_document), ('move log', write_game)):
+        written, doc_ref = play(write)
+        read = timeit.timeit(lambda: read_game(doc_ref), number=REPEAT) / REPEAT * 1000
+        print(f"{name:<12}{written[0]:>16}{written[-1]:>16}{sum(written) / 1024:>18.0f}{read:>12.3f}")
+
+if __name__ == '__main__':
+    main()
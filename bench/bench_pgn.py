@@ -0,0 +1,50 @@
+"""Benchmark of keeping the PGN up to date over the Andreikin–Karjakin test game.
+
+After every move the server serialises the game (route responses, Socket.IO 'move' events
+and Firestore writes all call to_dict). This compares the incrementally maintained
+Game.pgn with regenerating the PGN from the move stack, both for a single read at the end
+of the game and summed over one read after each move.
+
+Usage:
+    python -m bench.bench_pgn
+"""
+
+import time
+import chess
+import timeit
+from server.game import Game, WHITE, BLACK
+from .pgn_games import load_test_games
+
+GAME = 'andreikin_karjakin'
+REPEAT = 200
+
+def regenerate(game):
+    """The PGN as it used to be generated, by replaying the move stack from the start."""
+    return chess.Board().variation_san(game.board.move_stack)
+
+def play(read_pgn):
+    """Plays the test game, reading the PGN after every move. Returns the game and the time spent reading."""
+    game = Game('1', '1')
+    game.add_player('1', side=WHITE)
+    game.add_player('2', side=BLACK)
+    elapsed = 0
+    for san in load_test_games()[GAME]:
+        game.move(san)
+        start = time.perf_counter()
+        read_pgn(game)
+        elapsed += time.perf_counter() - start
+    return game, elapsed
+
+def main():
+    game, _ = play(lambda game: None)
+    assert game.pgn == regenerate(game)
+
+    print(f"{GAME}, {len(game.history)} plies\n")
+    print(f"{'':<14}{'final read (ms)':>17}{'all reads (ms)':>16}")
+    for name, read_pgn in (('incremental', lambda game: game.pgn), ('regenerated', regenerate)):
+        final = timeit.timeit(lambda: read_pgn(game), number=REPEAT) / REPEAT * 1000
+        total = sum(play(read_pgn)[1] for _ in range(REPEAT // 10)) / (REPEAT // 10) * 1000
+        print(f"{name:<14}{final:>17.4f}{total:>16.4f}")
+
+if __name__ == '__main__':
+    main()
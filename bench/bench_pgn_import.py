@@ -0,0 +1,76 @@
+"""Throughput of the bulk PGN importer (see server/pgn_import.py), in games per second.
+
+Imports a PGN file with one worker process and with a pool of them, and compares both with
+replaying each game through Game.move (the way games were imported before). Without a file, the
+test PGN games are written to a temporary file, repeated until there are --games games.
+
+Usage:
+    python -m bench.bench_pgn_import [games.pgn] [--games 2000] [--processes 4]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import itertools
+import multiprocessing
+from server.game import Game, WHITE, BLACK
+from server.pgn_import import import_pgn, read_games, parse_movetext, DEFAULT_PLAYERS
+from .pgn_games import load_test_games
+
+def write_test_pgn(path, count):
+    """Writes the test games to a PGN file, repeated until there are count games."""
+    games = itertools.cycle(load_test_games().items())
+    with open(path, 'w') as pgn_file:
+        for index in range(count):
+            name, moves = next(games)
+            numbered = [f'{ply // 2 + 1}. {san}' if ply % 2 == 0 else san for ply, san in enumerate(moves)]
+            pgn_file.write(f'[Event "{name}"]\n[Round "{index + 1}"]\n[Result "*"]\n\n')
+            pgn_file.write(' '.join(numbered) + ' *\n\n')
+
+def replay(path):
+    """Imports each game by replaying its moves through Game.move."""
+    count = 0
+    with open(path) as pgn_file:
+        for tags, movetext in read_games(pgn_file):
+            moves, _ = parse_movetext(movetext)
+            game = Game('import')
+            for side, player in DEFAULT_PLAYERS.items():
+                game.add_player(player, side)
+            for san in moves:
+                game.move(san)
+            game.to_dict()
+            count += 1
+    return count
+
+def import_all(path, processes):
+    with open(path) as pgn_file:
+        return sum(1 for _ in import_pgn(pgn_file, processes))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pgn', nargs='?', help='PGN file to import (defaults to the repeated test games)')
+    parser.add_argument('--games', type=int, default=2000, help='Number of test games to write without a file')
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.pgn
+        if path is None:
+            path = os.path.join(directory, 'games.pgn')
+            write_test_pgn(path, args.games)
+
+        runs = [
+            ('Game.move replay', lambda: replay(path)),
+            ('importer, 1 process', lambda: import_all(path, 1)),
+            (f'importer, {args.processes} processes', lambda: import_all(path, args.processes)),
+        ]
+        print(f"{os.path.basename(path)}, {os.path.getsize(path) / 1024:.0f} KB\n")
+        for name, run in runs:
+            start = time.perf_counter()
+            count = run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<28}{count:>8} games{elapsed:>8.2f}s{count / elapsed:>10.0f} games/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Per-route latency for a long game, with the board built lazily or on load.
+
+The 105 ply Yates–Znosko-Borovsky test game is stored in the mock database and each route
+is called through the Flask test client, with the stored game reset before every request.
+This is run three ways:
+    legacy:     The game is stored without a board snapshot, so from_dict replays the history.
+    eager:      The board is built from the snapshot as soon as the game is loaded.
+    lazy:       The board is only built if the route needs it (the default).
+
+Usage:
+    python -m bench.bench_routes
+"""
+
+import copy
+import time
+from unittest.mock import patch
+from server.server import app
+from server.game import Game, WHITE, BLACK
+from test.routes.mock_firebase import MockClient, MockAuth
+from .pgn_games import load_test_games
+
+GAME = 'yates_znosko_borovsky'
+REPEAT = 200
+
+def stored_game(snapshot=True):
+    """The dict stored for the test game, with a free black slot."""
+    game = Game('player_1', 'bench')
+    game.add_player('player_1', side=WHITE)
+    game.add_player('player_2', side=BLACK)
+    for san in load_test_games()[GAME]:
+        game.move(san)
+    game_dict = game.to_dict()
+    if not snapshot:
+        for key in ('fen', 'pgn', 'repetitions'):
+            del game_dict[key]
+    return game_dict
+
+def requests(game_dict):
+    """(route, form) pairs for the routes that load the game."""
+    game = Game.from_dict(game_dict)
+    mover = game.players[game.turn]
+    move = game.board.san(next(iter(game.board.legal_moves)))
+    without_black = {**game_dict, 'players': {WHITE: 'player_1', BLACK: None}}
+    return [
+        ('/makemove', {'game_id': 'bench', 'user_id': mover, 'move': move}, game_dict),
+        ('/drawoffer', {'game_id': 'bench', 'user_id': 'player_1'}, game_dict),
+        ('/respondoffer', {'game_id': 'bench', 'user_id': 'player_2', 'response': 'false'}, game_dict),
+        ('/resign', {'game_id': 'bench', 'user_id': 'player_2'}, game_dict),
+        ('/joingame', {'game_id': 'bench', 'player_id': 'player_2', 'side': BLACK}, without_black),
+    ]
+
+def time_route(client, db, route, form, game_dict):
+    """Mean milliseconds per request."""
+    document = db.collection('games').document('bench')
+    elapsed = 0
+    for _ in range(REPEAT):
+        document.set(game_dict)
+        start = time.perf_counter()
+        response = client.post(route, data=form)
+        elapsed += time.perf_counter() - start
+        assert response.status_code == 200, response.data
+    return elapsed / REPEAT * 1000
+
+def eager_from_dict(from_dict):
+    def load(input_dict, verify=False):
+        game = from_dict(input_dict, verify)
+        game.board
+        return game
+    return load
+
+def main():
+    client = app.test_client()
+    modes = [
+        ('legacy', stored_game(snapshot=False), Game.from_dict),
+        ('eager', stored_game(), eager_from_dict(Game.from_dict)),
+        ('lazy', stored_game(), Game.from_dict),
+    ]
+    results = {}
+    for mode, game_dict, from_dict in modes:
+        with patch('server.server.db', new_callable=MockClient) as db, \
+                patch('firebase_admin.auth', new_callable=MockAuth) as auth, \
+                patch.object(Game, 'from_dict', from_dict):
+            for user in ('player_1', 'player_2'):
+                auth._mock_add_user(user)
+            for route, form, route_dict in requests(game_dict):
+                results.setdefault(route, []).append(time_route(client, db, route, form, copy.deepcopy(route_dict)))
+
+    print(f"{GAME}, {len(stored_game()['history'])} plies, mean ms per request\n")
+    print(f"{'route':<15}" + ''.join(f"{mode:>10}" for mode, _, _ in modes))
+    for route, times in results.items():
+        print(f"{route:<15}" + ''.join(f"{t:>10.3f}" for t in times))
+
+if __name__ == '__main__':
+    main()
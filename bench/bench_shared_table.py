@@ -0,0 +1,64 @@
+"""Benchmark of the shared-memory transposition table with several engine processes.
+
+PROCESSES workers search the benchmark positions with the same time budget, each starting
+at a different offset into the list (like gunicorn workers serving different moves of the
+same games). This is run once with private tables and once with a shared table, and the
+depth reached and the shared table hit rate are reported.
+
+Usage:
+    python -m bench.bench_shared_table
+"""
+
+import os
+import tempfile
+import multiprocessing
+from sunfish.tools import parseFEN
+from sunfish.sunfish import Searcher
+from sunfish.shared_table import SharedTable, SharedSearcher
+from .bench_ai_levels import positions
+
+PROCESSES = 4
+SECS = 0.5
+TABLE_MB = 64
+
+def worker(args):
+    index, fens, path = args
+    table = SharedTable(path, TABLE_MB) if path is not None else None
+    # Rotate the positions so that each worker reaches them at a different time
+    offset = index * len(fens) // PROCESSES
+    depths, nodes, hits, lookups = [], [], 0, 0
+    for fen in fens[offset:] + fens[:offset]:
+        searcher = Searcher() if table is None else SharedSearcher(table)
+        searcher.search(parseFEN(fen), secs=SECS)
+        depths.append(searcher.depth)
+        nodes.append(searcher.nodes)
+        if table is not None:
+            hits += searcher.hits
+            lookups += searcher.hits + searcher.misses
+    return depths, nodes, hits, lookups
+
+def run(fens, path):
+    with multiprocessing.Pool(PROCESSES) as pool:
+        results = pool.map(worker, [(i, fens, path) for i in range(PROCESSES)])
+    depths = [d for r in results for d in r[0]]
+    nodes = [n for r in results for n in r[1]]
+    hits = sum(r[2] for r in results)
+    lookups = sum(r[3] for r in results)
+    return sum(depths) / len(depths), sum(nodes) / len(nodes), hits / lookups if lookups else 0
+
+def main():
+    fens = positions()[::2]
+    print(f"{PROCESSES} processes, {len(fens)} positions each, {SECS}s per search\n")
+    print(f"{'table':<10}{'mean depth':>12}{'mean nodes':>12}{'hit rate':>10}")
+
+    depth, nodes, _ = run(fens, None)
+    print(f"{'private':<10}{depth:>12.2f}{nodes:>12.0f}{'-':>10}")
+
+    with tempfile.TemporaryDirectory(dir='/dev/shm' if os.path.isdir('/dev/shm') else None) as directory:
+        path = os.path.join(directory, 'table')
+        SharedTable(path, TABLE_MB).clear()
+        depth, nodes, hit_rate = run(fens, path)
+        print(f"{'shared':<10}{depth:>12.2f}{nodes:>12.0f}{hit_rate:>10.1%}")
+
+if __name__ == '__main__':
+    main()
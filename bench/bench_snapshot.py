@@ -0,0 +1,41 @@
+"""Benchmark of the binary game snapshot against the dict form, on the test PGN games.
+
+Reports the size of each form (the dict as compact JSON), and the time to encode and
+decode it. Decoding a snapshot doesn't rebuild the history, so 'decode + history' also
+times reading the history afterwards, which replays the moves.
+
+Usage:
+    python -m bench.bench_snapshot
+"""
+
+import json
+import timeit
+from server.game import Game, WHITE, BLACK
+from .pgn_games import load_test_games
+
+REPEAT = 200
+
+def per_call(function):
+    return timeit.timeit(function, number=REPEAT) / REPEAT * 1000
+
+def main():
+    print(f"{'':<24}{'':>6}{'size (B)':>16}{'encode (ms)':>16}{'decode (ms)':>16}{'decode + history':>18}")
+    print(f"{'game':<24}{'plies':>6}{'dict':>8}{'bytes':>8}{'dict':>8}{'bytes':>8}{'dict':>8}{'bytes':>8}{'bytes':>18}")
+    for name, moves in load_test_games().items():
+        game = Game('1', '1', time_controls=600)
+        game.add_player('1', side=WHITE)
+        game.add_player('2', side=BLACK)
+        for san in moves:
+            game.move(san)
+
+        game_dict = game.to_dict()
+        data = game.to_bytes()
+        sizes = (len(json.dumps(game_dict, separators=(',', ':'))), len(data))
+        encode = (per_call(game.to_dict), per_call(game.to_bytes))
+        decode = (per_call(lambda: Game.from_dict(game_dict)), per_call(lambda: Game.from_bytes(data)))
+        with_history = per_call(lambda: Game.from_bytes(data).history)
+        print(f"{name:<24}{len(moves):>6}{sizes[0]:>8}{sizes[1]:>8}"
+              f"{encode[0]:>8.3f}{encode[1]:>8.3f}{decode[0]:>8.3f}{decode[1]:>8.3f}{with_history:>18.3f}")
+
+if __name__ == '__main__':
+    main()
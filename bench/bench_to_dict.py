@@ -0,0 +1,41 @@
+"""Microbenchmark of Game.to_dict on the longest test PGN games.
+
+to_dict reads result, in_progress and game_over, which share one evaluation of the board
+per ply. 'cold' is straight after a move (the status has to be evaluated), 'warm' is any
+further call at the same ply. The status properties are also timed on their own.
+
+Usage:
+    python -m bench.bench_to_dict
+"""
+
+import timeit
+from server.game import Game, WHITE, BLACK
+from .pgn_games import load_test_games
+
+REPEAT = 1000
+
+def main():
+    games = sorted(load_test_games().items(), key=lambda item: -len(item[1]))[:3]
+    print(f"{'game':<24}{'plies':>6}{'status cold':>13}{'status warm':>13}{'to_dict cold':>14}{'to_dict warm':>14}  (ms)")
+    for name, moves in games:
+        game = Game('1', '1')
+        game.add_player('1', side=WHITE)
+        game.add_player('2', side=BLACK)
+        for san in moves:
+            game.move(san)
+
+        def status():
+            return game.result, game.in_progress, game.game_over
+
+        def cold(function):
+            def call():
+                game._status_cache = None
+                function()
+            return call
+
+        times = [timeit.timeit(function, number=REPEAT) / REPEAT * 1000
+                 for function in (cold(status), status, cold(game.to_dict), game.to_dict)]
+        print(f"{name:<24}{len(moves):>6}" + ''.join(f"{t:>13.3f} " for t in times))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""The PGN games used by the test suite, shared by the benchmarks."""
+
+import re
+from os import listdir
+from os.path import isfile, join, dirname, basename, splitext
+
+PGN_DIR = join(dirname(__file__), '..', 'test', 'game', 'pgn')
+
+def load_test_games():
+    """Loads the games in test/game/pgn into a dict of SAN move lists.
+
+    Usage:
+        load_test_games()['fools_mate']
+        #=> ['f3', 'e5', 'g4', 'Qh4']
+    """
+    games = dict()
+    for f in sorted(listdir(PGN_DIR)):
+        path = join(PGN_DIR, f)
+        if not isfile(path):
+            continue
+        with open(path) as pgn_file:
+            moves = [re.sub(r'^\d+\. ', '', line.rstrip()).split() for line in pgn_file]
+        games[basename(splitext(f)[0])] = [san for line in moves for san in line]
+    return games
@@ -0,0 +1,135 @@
+"""Self-play harness for comparing two Sunfish search configurations.
+
+Configuration A plays configuration B from each opening, once with each colour, with the
+games spread over a pool of worker processes. Reports A's wins/draws/losses with a 95%
+confidence interval on the score (and the matching Elo difference), alongside the nodes per
+second and average time per move of each configuration, so that a change to the engine or
+to a budget can be judged on both speed and strength before it is deployed.
+
+A configuration is either an AI level name (see AI_LEVELS) or a budget such as
+'nodes=5000', 'depth=3' or 'secs=0.5' (several can be combined with commas).
+
+Usage:
+    python -m bench.selfplay casual nodes=5000 --workers 4 --rounds 2
+"""
+
+import math
+import time
+import argparse
+import multiprocessing
+import chess
+from server.sunfish_ai import AI_LEVELS
+from sunfish.tools import parseFEN, mrender
+from sunfish.sunfish import Searcher
+
+# Balanced openings (as SAN), each played once with each colour per round
+OPENINGS = [
+    [],
+    ['e4', 'e5', 'Nf3', 'Nc6', 'Bb5'],
+    ['e4', 'c5', 'Nf3', 'd6', 'd4', 'cxd4', 'Nxd4', 'Nf6', 'Nc3'],
+    ['e4', 'e6', 'd4', 'd5', 'Nc3'],
+    ['e4', 'c6', 'd4', 'd5', 'e5'],
+    ['d4', 'd5', 'c4', 'e6', 'Nc3', 'Nf6'],
+    ['d4', 'Nf6', 'c4', 'g6', 'Nc3', 'Bg7', 'e4', 'd6'],
+    ['c4', 'e5', 'Nc3', 'Nf6', 'g3'],
+    ['Nf3', 'd5', 'g3', 'Nf6', 'Bg2'],
+    ['e4', 'e5', 'Nf3', 'Nc6', 'Bc4', 'Bc5', 'c3'],
+]
+
+# Games still going after this many plies are adjudicated as draws
+MAX_PLIES = 200
+
+def parse_config(text):
+    """Parses an AI level name or 'key=value,...' into a Searcher.search budget."""
+    if text in AI_LEVELS:
+        return dict(AI_LEVELS[text])
+    budget = {}
+    for part in text.split(','):
+        key, value = part.split('=')
+        if key not in ('secs', 'nodes', 'depth'):
+            raise argparse.ArgumentTypeError(f"Unknown budget '{key}' in '{text}'.")
+        budget[key] = float(value) if key == 'secs' else int(value)
+    return budget
+
+def play_game(args):
+    """Plays one game, returns (score for A, stats for A, stats for B).
+
+    Stats are [nodes, seconds, moves] totals for that configuration.
+    """
+    opening, budget_a, budget_b, a_is_white = args
+    board = chess.Board()
+    for san in opening:
+        board.push_san(san)
+
+    stats = {True: [0, 0.0, 0], False: [0, 0.0, 0]} # keyed by 'is A'
+    forfeit = None
+    while not board.is_game_over(claim_draw=True) and len(board.move_stack) < MAX_PLIES:
+        is_a = (board.turn == chess.WHITE) == a_is_white
+        position = parseFEN(board.fen())
+        searcher = Searcher()
+        start = time.process_time()
+        move, _ = searcher.search(position, **(budget_a if is_a else budget_b))
+        stats[is_a][0] += searcher.nodes
+        stats[is_a][1] += time.process_time() - start
+        stats[is_a][2] += 1
+        move = chess.Move.from_uci(mrender(position, move))
+        # Sunfish only generates pseudo-legal moves, an illegal move loses the game
+        if move not in board.legal_moves:
+            forfeit = is_a
+            break
+        board.push(move)
+
+    result = board.result(claim_draw=True)
+    if forfeit is not None:
+        score = 0.0 if forfeit else 1.0
+    elif result == '1/2-1/2' or result == '*':
+        score = 0.5
+    else:
+        score = 1.0 if (result == '1-0') == a_is_white else 0.0
+    return score, stats[True], stats[False]
+
+def elo(score):
+    """Elo difference corresponding to an expected score."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+def report(name, stats):
+    nodes, seconds, moves = stats
+    print(f"{name}: {nodes / seconds:.0f} nodes/s, {seconds / moves * 1000:.1f} ms/move over {moves} moves")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('a', type=parse_config, help='Configuration A')
+    parser.add_argument('b', type=parse_config, help='Configuration B')
+    parser.add_argument('--rounds', type=int, default=1, help='Times to play each opening with each colour')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    jobs = [(opening, args.a, args.b, a_is_white)
+            for _ in range(args.rounds)
+            for opening in OPENINGS
+            for a_is_white in (True, False)]
+
+    start = time.time()
+    with multiprocessing.Pool(args.workers) as pool:
+        results = pool.map(play_game, jobs)
+    elapsed = time.time() - start
+
+    scores = [r[0] for r in results]
+    n = len(scores)
+    wins, draws = scores.count(1.0), scores.count(0.5)
+    mean = sum(scores) / n
+    # 95% confidence interval from the standard error of the per-game scores
+    stddev = math.sqrt(sum((s - mean) ** 2 for s in scores) / (n - 1)) if n > 1 else 0
+    margin = 1.96 * stddev / math.sqrt(n)
+
+    print(f"A = {args.a}, B = {args.b}")
+    print(f"{n} games in {elapsed:.1f}s with {args.workers} workers\n")
+    print(f"A: +{wins} ={draws} -{n - wins - draws}")
+    print(f"score {mean:.3f} +/- {margin:.3f}, elo {elo(mean):+.0f} "
+          f"[{elo(mean - margin):+.0f}, {elo(mean + margin):+.0f}]\n")
+    report('A', [sum(r[1][i] for r in results) for i in range(3)])
+    report('B', [sum(r[2][i] for r in results) for i in range(3)])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+class LRUCache:
+    """In-process cache that evicts the least recently used entry once it is full.
+
+    Counts hits and misses, so that the hit rate of a cache can be logged or benchmarked.
+    Not shared between processes (each gunicorn worker has its own).
+    """
+
+    def __init__(self, size):
+        if not isinstance(size, int):
+            raise TypeError(f"Expected 'size' argument to be an int, got: {type(size)}.")
+        if size <= 0:
+            raise ValueError(f"Cannot create a cache with size {size}.")
+
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Returns the value for key (marking it as recently used), or default if it isn't cached."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Caches value for key, evicting the least recently used entry if the cache is full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Removes key from the cache (if it is cached)."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes all entries, and resets the hit and miss counts."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits (0 if there weren't any lookups)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
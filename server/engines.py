@@ -0,0 +1,237 @@
+"""Chess engine backends used to produce AI moves.
+
+Two backends are provided:
+    SunfishEngine:  Runs the bundled Sunfish searcher inside the server process.
+    UCIEnginePool:  Dispatches searches to a pool of long-lived UCI engine subprocesses.
+                    By default these run the bundled Sunfish through `sunfish/uci.py`.
+
+Both take a search budget in the same form as Searcher.search (secs, nodes and/or depth).
+"""
+
+import os
+import sys
+import time
+import queue
+import select
+import atexit
+import threading
+import subprocess
+import chess
+from sunfish.tools import parseFEN, renderSAN
+from sunfish.sunfish import Searcher
+from sunfish.shared_table import SharedSearcher
+
+# Command that starts the bundled Sunfish UCI wrapper
+SUNFISH_UCI_COMMAND = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sunfish', 'uci.py')]
+
+class EngineError(RuntimeError):
+    """Raised when an engine process stops responding or exits."""
+    pass
+
+class Engine:
+    """Interface for producing a move for a Game with a given search budget."""
+
+    def best_move(self, game, budget) -> str:
+        """Returns the best move (in SAN) for the side to play in the game."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Releases any resources held by the engine."""
+        pass
+
+class SunfishEngine(Engine):
+    """The Sunfish searcher, run in-process.
+
+    If given a SharedTable, searches use it as a transposition table shared with
+    every other process on the machine (see sunfish/shared_table.py).
+    """
+
+    def __init__(self, shared_table=None):
+        self.shared_table = shared_table
+
+    def best_move(self, game, budget) -> str:
+        position = parseFEN(game.fen)
+        searcher = Searcher() if self.shared_table is None else SharedSearcher(self.shared_table)
+        move, _ = searcher.search(position, **budget)
+        return renderSAN(position, move)
+
+class UCIEngine:
+    """A single UCI engine subprocess.
+
+    Reads are done with select and a timeout so that a hung engine can't block the
+    server forever (and so that they cooperate with eventlet's monkey patching).
+    """
+
+    def __init__(self, command, timeout=10):
+        self.command = command
+        self.timeout = timeout
+        self.process = None
+        self.last_used = 0
+        self._buffer = b''
+        self.start()
+
+    def start(self) -> None:
+        """Starts the engine process and performs the UCI handshake."""
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._buffer = b''
+        try:
+            self._send('uci')
+            self._read_until('uciok')
+        except EngineError:
+            # Leave a dead process behind so that the pool restarts it on next use
+            self.kill()
+            raise
+        self.last_used = time.time()
+
+    def restart(self) -> None:
+        """Kills the engine process (if still running) and starts a new one."""
+        self.kill()
+        self.start()
+
+    def kill(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+    def quit(self) -> None:
+        """Asks the engine to exit, killing it if it doesn't."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        try:
+            self._send('quit')
+            self.process.wait(timeout=1)
+        except (EngineError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def is_alive(self) -> bool:
+        """Health check: the process is running and answers 'isready' in time."""
+        if self.process.poll() is not None:
+            return False
+        try:
+            self._send('isready')
+            self._read_until('readyok')
+        except EngineError:
+            return False
+        return True
+
+    def go(self, fen, budget) -> str:
+        """Searches the position given by the FEN, returns the best move in UCI notation."""
+        self._send(f'position fen {fen}')
+        self._send('go ' + ' '.join(self._go_arguments(budget)))
+        line = self._read_until('bestmove')
+        self.last_used = time.time()
+        return line.split()[1]
+
+    @staticmethod
+    def _go_arguments(budget):
+        arguments = []
+        if 'depth' in budget:
+            arguments += ['depth', str(budget['depth'])]
+        if 'nodes' in budget:
+            arguments += ['nodes', str(budget['nodes'])]
+        if 'secs' in budget:
+            arguments += ['movetime', str(int(budget['secs'] * 1000))]
+        return arguments
+
+    def _send(self, command):
+        try:
+            self.process.stdin.write((command + '\n').encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise EngineError(f"Engine {self.command} terminated: {e}")
+
+    def _read_until(self, prefix) -> str:
+        """Reads lines from the engine until one starts with prefix, and returns it."""
+        deadline = time.time() + self.timeout
+        fd = self.process.stdout.fileno()
+        while True:
+            while b'\n' not in self._buffer:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise EngineError(f"Engine {self.command} timed out waiting for '{prefix}'.")
+                ready, _, _ = select.select([fd], [], [], remaining)
+                if not ready:
+                    continue
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    raise EngineError(f"Engine {self.command} terminated.")
+                self._buffer += chunk
+            line, self._buffer = self._buffer.split(b'\n', 1)
+            line = line.decode().strip()
+            if line.startswith(prefix):
+                return line
+
+class UCIEnginePool(Engine):
+    """A pool of long-lived UCI engine processes.
+
+    The processes are started once (on first use) and reused across games. An engine is
+    health-checked before use if it has been idle for longer than `health_check_interval`
+    seconds, and restarted if it has died or stopped responding.
+    """
+
+    def __init__(self, command=None, size=2, timeout=10, health_check_interval=30):
+        self.command = command if command is not None else SUNFISH_UCI_COMMAND
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+        self._engines = []
+
+    def start(self) -> None:
+        """Starts all of the engine processes."""
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                engine = UCIEngine(self.command, timeout=self.timeout)
+                self._engines.append(engine)
+                self._idle.put(engine)
+            self._started = True
+            atexit.register(self.close)
+
+    def best_move(self, game, budget) -> str:
+        uci = self._dispatch(game.fen, budget)
+        return game.board.san(chess.Move.from_uci(uci))
+
+    def health_check(self) -> None:
+        """Checks every idle engine, restarting any that don't respond."""
+        for _ in range(self._idle.qsize()):
+            engine = self._idle.get()
+            if not engine.is_alive():
+                engine.restart()
+            self._idle.put(engine)
+
+    def _acquire(self) -> UCIEngine:
+        self.start()
+        try:
+            engine = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise EngineError('No engine became available in time.')
+
+        if engine.process.poll() is not None:
+            engine.restart()
+        elif time.time() - engine.last_used > self.health_check_interval and not engine.is_alive():
+            engine.restart()
+        return engine
+
+    def _dispatch(self, fen, budget) -> str:
+        engine = self._acquire()
+        try:
+            try:
+                return engine.go(fen, budget)
+            except EngineError:
+                # The engine died mid-search, retry once on a fresh process
+                engine.restart()
+                return engine.go(fen, budget)
+        finally:
+            self._idle.put(engine)
+
+    def close(self) -> None:
+        with self._lock:
+            for engine in self._engines:
+                engine.quit()
+            self._engines = []
+            self._idle = queue.Queue()
+            self._started = False
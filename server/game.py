@@ -1,6 +1,9 @@
 import chess
 import chess.pgn
-from itertools import product
+import chess.polyglot
+import struct
+from array import array
+from .cache import LRUCache
 
 WHITE = 'w'
 BLACK = 'b'
@@ -11,6 +14,116 @@ SCORES = {
     'draw': '1/2-1/2'
 }
 
+# Zobrist hash of the starting position (see Game._position_hash)
+STARTING_POSITION = format(chess.polyglot.zobrist_hash(chess.Board()), '016x')
+
+NO_SQUARE = -1
+
+# Binary snapshot format (see Game.to_bytes)
+SNAPSHOT_MAGIC = b'NG'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<2sB')
+SNAPSHOT_STATE = struct.Struct('<BiiiHBB')     # flags, time controls, remaining time (w, b), plies, reason, repetitions
+SNAPSHOT_REPETITION = struct.Struct('<QB')     # position hash, count
+SNAPSHOT_NONE = 0xFF                            # Length of a string that is None, or a time that is None (as -1)
+BOARD_GAME_OVER_REASONS = (
+    None,
+    'Five-fold repetition',
+    'Checkmate',
+    'Stalemate',
+    'Insufficient material',
+    'Seventy-five move rule',
+    'Fifty move rule',
+    'Three-fold repetition'
+)
+
+def _pack_string(value) -> bytes:
+    """Length-prefixed UTF-8 (for the binary snapshot format)."""
+    if value is None:
+        return bytes([SNAPSHOT_NONE])
+    encoded = value.encode('utf-8')
+    if len(encoded) >= SNAPSHOT_NONE:
+        raise ValueError(f"Cannot store '{value}' in a snapshot: longer than {SNAPSHOT_NONE - 1} bytes.")
+    return bytes([len(encoded)]) + encoded
+
+def _unpack_string(data, offset) -> tuple:
+    """Reads a string written by _pack_string, returns it and the offset after it."""
+    length = data[offset]
+    if length == SNAPSHOT_NONE:
+        return None, offset + 1
+    return data[offset + 1:offset + 1 + length].decode('utf-8'), offset + 1 + length
+
+def _pack_move(move) -> int:
+    """Packs a move into 16 bits: from square, to square and promotion piece type."""
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+def _unpack_move(packed) -> chess.Move:
+    return chess.Move(packed & 0x3F, (packed >> 6) & 0x3F, (packed >> 12) or None)
+
+# Legal moves of recently played positions (see Game.legal_moves)
+LEGAL_MOVES_CACHE_SIZE = 1024
+LEGAL_MOVES = LRUCache(LEGAL_MOVES_CACHE_SIZE)
+
+class MoveRecord:
+    """Compact record of a move in the game history (see Game._construct_move_record).
+
+    Pieces are stored as python-chess piece types and squares as python-chess square indices.
+    The extended move description sent to clients is only generated by to_dict.
+    """
+
+    __slots__ = (
+        'san', 'side', 'ply_count', 'move_count', 'piece', 'initial_pos_piece', 'from_square', 'to_square',
+        'promotion', 'capture', 'capture_initial_pos', 'castle', 'en_passant'
+    )
+
+    def __init__(self, san, side, ply_count, move_count, piece, initial_pos_piece, from_square, to_square,
+                 promotion=None, capture=None, capture_initial_pos=None, castle=None, en_passant=None):
+        self.san = san
+        self.side = side
+        self.ply_count = ply_count
+        self.move_count = move_count
+        self.piece = piece
+        self.initial_pos_piece = initial_pos_piece
+        self.from_square = from_square
+        self.to_square = to_square
+        self.promotion = promotion                      # Promotion piece type
+        self.capture = capture                          # Captured piece type
+        self.capture_initial_pos = capture_initial_pos  # Initial square of the captured piece
+        self.castle = castle                            # 'k' or 'q'
+        self.en_passant = en_passant                    # Square of the pawn captured en passant
+
+    def to_dict(self) -> dict:
+        """Generates the extended move description of the move (as stored in Game.history)."""
+        square_name = lambda square: None if square is None else chess.square_name(square)
+        piece_name = lambda piece_type: None if piece_type is None else chess.PIECE_SYMBOLS[piece_type]
+        return {
+            'san': self.san,
+            'side': self.side,
+            'ply_count': self.ply_count,
+            'move_count': self.move_count,
+            'piece': piece_name(self.piece),
+            'initial_pos_piece': square_name(self.initial_pos_piece),
+            'from': chess.square_name(self.from_square),
+            'to': chess.square_name(self.to_square),
+            'promotion': {
+                'promotion': self.promotion is not None,
+                'piece': piece_name(self.promotion)
+            },
+            'capture': {
+                'capture': self.capture is not None,
+                'piece': piece_name(self.capture),
+                'initial_pos_piece': square_name(self.capture_initial_pos)
+            },
+            'castle': {
+                'castle': self.castle is not None,
+                'side': self.castle
+            },
+            'en_passant': {
+                'en_passant': self.en_passant is not None,
+                'square': square_name(self.en_passant)
+            }
+        }
+
 class Game:
     """Class representing and encapsulating the logic required for handling a chess game with time controls.
 
@@ -19,21 +132,36 @@ class Game:
         _creator:           The ID of the user that created the game.
         _time_controls:     The time controls for the game (starting time for each side) in seconds.
         _remaining_time:    The remaining time for both sides.
-        _board:             The internal board object for the game.
+        _board:             The internal board object for the game (None until it is first used, see board).
+        _fen:               The FEN the internal board is built from (only kept up to date while _board is None).
         _players:           The sides of the game and their corresponding players.
         _public:            Whether the game is publicly listed for players to join.
+        _ai_level:          The difficulty level of the AI opponent (None for the server default).
         _plies:             The ply count (version number).
-        _history:           The game move history.
+        _history:           The game move history (MoveRecord objects) of the moves made since the game was created
+                            or loaded. Moves made before it was loaded are kept in _stored_history, in dict form.
         _resigned:          The resignation status for both sides.
         _draw_offers:       The draw offer status for both sides.
             MEANING:
                 _draw_offers[WHITE]['made']     represents whether white has made a draw offer or not.
                 _draw_offers[WHITE]['accepted'] represents whether white's draw offer had been accepted by black.
                                                 and vice-versa for black.
-        _initial_positions: A dictionary mapping squares with pieces to the square that piece started.
+        _initial_positions: An array mapping each square (python-chess square index) to the square the piece on it
+                            started on, or NO_SQUARE for empty squares.
             For example:
-                If you move the e2 pawn to e4, then there will be an entry "e4": "e2" since the pawn in
+                If you move the e2 pawn to e4, then there will be an entry [chess.E4] = chess.E2 since the pawn in
                 square e4 was initially at e2.
+        _repetitions:       The number of times each position occurred since the last irreversible move, keyed by
+                            Zobrist hash (hex string). Used for repetition draws instead of replaying the move
+                            stack, which is empty when the game was loaded from a snapshot.
+        _position:          The Zobrist hash of the current position (None until needed, after loading a snapshot).
+        _pgn:               The PGN movetext of the game, appended to with each move.
+        _packed_moves:      The moves made before the game was loaded from a binary snapshot, until _stored_history
+                            and _pgn are rebuilt from them (None otherwise, see from_bytes).
+        _status_cache:      The last evaluated game status, and the state it was evaluated for (see _status).
+        _board_status:      The game-over reason of the position on the board, and the ply count it was evaluated at.
+                            Restored from the stored game-over status by from_dict, so that the board isn't needed.
+        _legal_moves_cache: The legal moves in the current position, and the ply count they were generated at.
 
     Properties:
         The internal attributes listed above can be accessed through properties defined in this class.
@@ -45,7 +173,7 @@ class Game:
         methods provided in the class. Each of these instance methods has their own docstring description.
     """
 
-    def __init__(self, creator_id, game_id=None, time_controls=None, public=True):
+    def __init__(self, creator_id, game_id=None, time_controls=None, public=True, ai_level=None):
         if isinstance(creator_id, str):
             self._creator = creator_id
         else:
@@ -73,18 +201,36 @@ class Game:
         else:
             raise TypeError(f"Expected 'public' argument to be a bool, got: {type(public)}.")
 
+        if isinstance(ai_level, str):
+            self._ai_level = ai_level
+        elif ai_level is None:
+            self._ai_level = ai_level
+        else:
+            raise TypeError(f"Expected 'ai_level' argument to be a str (or None), got: {type(ai_level)}.")
+
         self._remaining_time = {WHITE: time_controls, BLACK: time_controls}
-        self._board = chess.Board()
+        self._board = None
+        self._fen = chess.STARTING_FEN
         self._players = {WHITE: None, BLACK: None}
         self._plies = 0
         self._history = []
+        self._stored_history = []
         self._resigned = {WHITE: False, BLACK: False}
         self._draw_offers = {
             WHITE: {'made': False, 'accepted': False},
             BLACK: {'made': False, 'accepted': False}
         }
 
-        self._initial_positions = {''.join(sq): ''.join(sq) for sq in product(chess.FILE_NAMES, ['1', '2', '7', '8'])}
+        self._initial_positions = array('b', (
+            square if chess.square_rank(square) in (0, 1, 6, 7) else NO_SQUARE for square in chess.SQUARES
+        ))
+        self._repetitions = {STARTING_POSITION: 1}
+        self._position = STARTING_POSITION
+        self._pgn = ''
+        self._packed_moves = None
+        self._status_cache = None
+        self._board_status = None
+        self._legal_moves_cache = None
 
     @property
     def id(self) -> str:
@@ -98,7 +244,13 @@ class Game:
 
     @property
     def board(self) -> chess.Board:
-        """The internal chessboard object."""
+        """The internal chessboard object.
+
+        The board is only built the first time it is needed, so that loading a game to change its
+        metadata (players, draw offers, resignations) never has to set up a python-chess board.
+        """
+        if self._board is None:
+            self._board = chess.Board(self._fen)
         return self._board
 
     @property
@@ -111,6 +263,11 @@ class Game:
         """Whether the game is publicly listed or not."""
         return self._public
 
+    @property
+    def ai_level(self) -> str:
+        """The difficulty level of the AI opponent (None if the server default is used)."""
+        return self._ai_level
+
     @property
     def time_controls(self) -> int:
         """The time controls for the game (seconds per side at the start)."""
@@ -133,26 +290,36 @@ class Game:
     @property
     def move_count(self) -> int:
         """The full-move number (incremented after each time black moves)."""
+        if self._board is None:
+            return int(self._fen.split(' ')[5])
         return self._board.fullmove_number
 
     @property
     def fen(self) -> str:
         """The FEN string representing the current board state."""
+        if self._board is None:
+            return self._fen
         return self._board.fen()
 
     @property
     def pgn(self) -> str:
         """The PGN string representing the game move history."""
-        return chess.Board().variation_san(self._board.move_stack)
+        if self._packed_moves is not None:
+            self._unpack_history()
+        return self._pgn
 
     @property
     def history(self) -> list:
         """Game move history (list of extended move descriptions)."""
-        return self._history
+        if self._packed_moves is not None:
+            self._unpack_history()
+        return self._stored_history + [record.to_dict() for record in self._history]
 
     @property
     def turn(self) -> str:
         """The current side to move ('w' or 'b')."""
+        if self._board is None:
+            return self._fen.split(' ')[1]
         return WHITE if self._board.turn else BLACK
 
     @property
@@ -173,9 +340,159 @@ class Game:
     @property
     def result(self) -> str:
         """The game result (1-0, 0-1, 1/2-1/2, or * if the game is in progress)."""
+        return self._status()['result']
+
+    @property
+    def in_progress(self) -> bool:
+        """Whether the game is in progress, or has ended."""
+        return self.result == '*'
+
+    @property
+    def game_over(self) -> dict:
+        """The game-over status (and game-over reason if the game is over)."""
+        return dict(self._status()['game_over'])
+
+    @property
+    def legal_moves(self) -> dict:
+        """The legal moves for the side to play, keyed by SAN (empty if the game is over).
+
+        Each move is a dict with its 'san', 'uci', 'from' and 'to' squares and 'promotion' piece (or None).
+        The moves are generated once per ply, and cached by game ID and ply count so that other requests
+        for the same game can validate moves with a dict lookup.
+        """
+        if not self.in_progress:
+            return {}
+
+        key = self._legal_moves_key()
+        legal_moves = LEGAL_MOVES.get(key)
+        if legal_moves is None:
+            legal_moves = {}
+            for move in self._legal_moves():
+                san = self.board.san(move)
+                legal_moves[san] = {
+                    'san': san,
+                    'uci': move.uci(),
+                    'from': chess.square_name(move.from_square),
+                    'to': chess.square_name(move.to_square),
+                    'promotion': None if move.promotion is None else chess.PIECE_SYMBOLS[move.promotion]
+                }
+            LEGAL_MOVES.set(key, legal_moves)
+        return legal_moves
+
+    @property
+    def initial_positions(self) -> dict:
+        """Dictionary mapping the squares with pieces to the square that piece started on (e.g. {'e4': 'e2'})."""
+        return {
+            chess.SQUARE_NAMES[square]: chess.SQUARE_NAMES[initial]
+            for square, initial in enumerate(self._initial_positions) if initial != NO_SQUARE
+        }
+
+    @property
+    def repetitions(self) -> dict:
+        """Occurrences of each position since the last irreversible move (keyed by position hash)."""
+        return self._repetitions
+
+    def _position_hash(self) -> str:
+        """Zobrist hash of the current position, as stored in self._repetitions."""
+        return format(chess.polyglot.zobrist_hash(self.board), '016x')
+
+    def _current_position(self) -> str:
+        """Zobrist hash of the current position (see self._position)."""
+        if self._position is None:
+            self._position = self._position_hash()
+        return self._position
+
+    def _record_position(self, irreversible) -> None:
+        """Counts the current position in self._repetitions, after a move has been made on the board.
+
+        Arguments:
+            irreversible: Whether the move made was irreversible (no earlier position can occur again).
+        """
+        if irreversible:
+            self._repetitions = {}
+        self._position = self._position_hash()
+        self._repetitions[self._position] = self._repetitions.get(self._position, 0) + 1
+
+    def _is_fivefold_repetition(self) -> bool:
+        """Equivalent to chess.Board.is_fivefold_repetition, without replaying the move stack."""
+        return self._repetitions[self._current_position()] >= 5
+
+    def _can_claim_threefold_repetition(self) -> bool:
+        """Equivalent to chess.Board.can_claim_threefold_repetition, without replaying the move stack."""
+        # Threefold repetition occurred
+        if self._repetitions[self._current_position()] >= 3:
+            return True
+
+        # A legal move can only reach a third repetition if some position has already occurred twice
+        if max(self._repetitions.values()) < 2:
+            return False
+
+        # The next legal move is a threefold repetition
+        for move in self._legal_moves():
+            self.board.push(move)
+            repeated = self._repetitions.get(self._position_hash(), 0) >= 2
+            self.board.pop()
+            if repeated:
+                return True
+
+        return False
+
+    def _board_game_over_reason(self) -> str:
+        """The reason the position on the board ends the game (None if it doesn't).
+
+        Equivalent to chess.Board.is_game_over(claim_draw=True), using the stored repetitions.
+        When several reasons apply, the one with the highest priority is returned.
+        """
+        if self._is_fivefold_repetition():
+            return 'Five-fold repetition'
+        if not self._has_legal_moves():
+            return 'Checkmate' if self.board.is_check() else 'Stalemate'
+        if self.board.is_insufficient_material():
+            return 'Insufficient material'
+        if self.board.is_seventyfive_moves():
+            return 'Seventy-five move rule'
+        if self.board.can_claim_fifty_moves():
+            return 'Fifty move rule'
+        # Checked last, since it is the most expensive
+        if self._can_claim_threefold_repetition():
+            return 'Three-fold repetition'
+        return None
+
+    def _status_key(self) -> tuple:
+        """The state that the game status depends on (see _status)."""
+        return (
+            self._plies,
+            self._resigned[WHITE],
+            self._resigned[BLACK],
+            self._draw_offers[WHITE]['accepted'],
+            self._draw_offers[BLACK]['accepted'],
+            self._remaining_time[WHITE],
+            self._remaining_time[BLACK]
+        )
+
+    def _status(self) -> dict:
+        """Evaluates the result and game-over status of the game.
+
+        The status is cached until the ply count, resignations, accepted draw offers or remaining time
+        change, so the board is only evaluated once for every property that depends on it.
+        """
+        key = self._status_key()
+        if self._status_cache is not None and self._status_cache[0] == key:
+            return self._status_cache[1]
 
         # Always claim a draw when possible (By three-fold repetition or fifty-move rule)
-        result = self._board.result(claim_draw=True)
+        if self._board_status is not None and self._board_status[0] == self._plies:
+            reason = self._board_status[1]
+        else:
+            reason = self._board_game_over_reason()
+            self._board_status = (self._plies, reason)
+
+        if reason == 'Checkmate':
+            result = SCORES[BLACK] if self.turn == WHITE else SCORES[WHITE]
+        elif reason is not None:
+            result = SCORES['draw']
+        else:
+            result = '*'
 
         # Override result to black win if white resigns
         if self._resigned[WHITE]:
@@ -201,140 +518,75 @@ class Game:
         if (self._remaining_time[WHITE] == 0) and (self._remaining_time[BLACK] == 0):
             result = SCORES['draw']
 
-        return result
-
-    @property
-    def in_progress(self) -> bool:
-        """Whether the game is in progress, or has ended."""
-        return self.result == '*'
-
-    @property
-    def game_over(self) -> dict:
-        """The game-over status (and game-over reason if the game is over)."""
-
-        # Always claim a draw when possible (By three-fold repetition or fifty-move rule)
-        if self._board.is_game_over(claim_draw=True):
-            if self._board.can_claim_threefold_repetition():
-                reason = 'Three-fold repetition'
-            if self._board.can_claim_fifty_moves():
-                reason = 'Fifty move rule'
-            if self._board.is_seventyfive_moves():
-                reason = 'Seventy-five move rule'
-            if self._board.is_insufficient_material():
-                reason = 'Insufficient material'
-            if self._board.is_checkmate():
-                reason = 'Checkmate'
-            if self._board.is_stalemate():
-                reason = 'Stalemate'
-            if self._board.is_fivefold_repetition():
-                reason = 'Five-fold repetition'
-
-            return {'game_over': True, 'reason': reason}
-
-        # Check for resignation
-        if self._resigned[WHITE] or self._resigned[BLACK]:
-            return {'game_over': True, 'reason': 'Resignation'}
-
-        # Check for accepted draw offers
-        if self._draw_offers[WHITE]['accepted'] or self._draw_offers[BLACK]['accepted']:
-            return {'game_over': True, 'reason': 'Draw by agreement'}
-
-        # Time as a game-over reason should take more priority over the other reasons
-        if (self._remaining_time[WHITE] == 0) or (self._remaining_time[BLACK] == 0):
-            return {'game_over': True, 'reason': 'Time'}
-
-        # If none of the above, then the game is not over
-        return {'game_over': False, 'reason': None}
-
-    @property
-    def initial_positions(self) -> dict:
-        return self._initial_positions
-
-    def _get_en_passant_square(self) -> str:
-        """If an en passant move was just made, this returns the square of the captured piece"""
+        # The board's game-over reason takes priority over the ones below
+        if reason is None:
+            if self._resigned[WHITE] or self._resigned[BLACK]:
+                reason = 'Resignation'
+            elif self._draw_offers[WHITE]['accepted'] or self._draw_offers[BLACK]['accepted']:
+                reason = 'Draw by agreement'
+            # Time as a game-over reason should take more priority over the other reasons
+            elif (self._remaining_time[WHITE] == 0) or (self._remaining_time[BLACK] == 0):
+                reason = 'Time'
+
+        status = {'result': result, 'game_over': {'game_over': reason is not None, 'reason': reason}}
+        self._status_cache = (key, status)
+        return status
+
+    def _get_en_passant_square(self) -> int:
+        """If the given move is en passant, this returns the square of the pawn it captures (call before making it)."""
         # NOTE: The 'down' shift performed below to get the square behind the en-passant square comes from:
         # https://github.com/niklasf/python-chess/blob/102ca5d89e23d5bb9413fb384a78ac4eb4f48bf9/chess/__init__.py#L1963
         down = -8 if self.turn == WHITE else 8
-        return chess.square_name(self._board.ep_square + down)
-
-    def _get_initial_pos_piece(self, move) -> str:
-        """Given a move, gets the initial position of the piece that moved
+        return self.board.ep_square + down
 
-        Assumes that _update_initial_positions has already been called.
-        """
-        return self.initial_positions[chess.square_name(move.to_square)]
-
-    def _construct_move_description(self, move) -> dict:
-        """Constructs an extended move description for a single move, detailing all necessary information about the move.
+    def _construct_move_record(self, move, san, captured_initial_position) -> MoveRecord:
+        """Constructs the history record for a single move, detailing all necessary information about the move.
 
-        NOTE: This function must be called directly after the move to be described has actually been made.
-            This is because it relies on move stack manipulation to work; the function temporarily pops the move
-            from the move stack whilst constructing the description, then re-pushes the move onto the move stack.
+        NOTE: This function must be called directly before the move to be described is made on the board,
+            and after _update_initial_positions has been called for it.
 
         Arguments:
             move: The requested move (chess.Move object).
+            san: The move in Standard Algebraic Notation.
+            captured_initial_position: The initial square of the captured piece (returned by _update_initial_positions).
         Returns:
-            Extended move description, detailing all necessary and relevant information regarding the move.
+            MoveRecord describing the move (MoveRecord.to_dict gives the extended move description).
+        Raises:
+            ValueError: When the move is not legal in the current position.
         """
 
-        # Check that the provided move is actually on the top of the move stack
-        if self._board.peek() != move:
-            raise ValueError(f"Expected move '{move}' to be on the top of move stack, got: '{self._board.peek()}'.")
-
-        # Temporarily pop the move from the move stack (in order to construct the extended move description)
-        self._board.pop()
-
-        # Construct the extended move description
-        description = {
-            'side': self.turn,
-            'ply_count': self.ply_count,
-            'move_count': self.move_count,
-            'piece': self._board.piece_at(move.from_square).symbol().lower(),
-            'initial_pos_piece': self._get_initial_pos_piece(move),
-            'from': chess.square_name(move.from_square),
-            'to': chess.square_name(move.to_square),
-            'promotion': {
-                'promotion': False if move.promotion is None else True,
-                'piece': None
-            },
-            'capture': {
-                'capture': self._board.is_capture(move),
-                'piece': None,
-                'initial_pos_piece': None
-            },
-            'castle': {
-                'castle': self._board.is_castling(move),
-                'side': None
-            },
-            'en_passant': {
-                'en_passant': self._board.is_en_passant(move),
-                'square': None
-            }
-        }
-
-        # Update the promotion piece if promotion took place
-        if description['promotion']['promotion']:
-            description['promotion']['piece'] = chess.PIECE_SYMBOLS[move.promotion].lower()
+        # Check that the provided move can actually be made next
+        if not self.board.is_legal(move):
+            raise ValueError(f"Expected move '{move}' to be legal in the current position.")
+
+        record = MoveRecord(
+            san,
+            self.turn,
+            self.ply_count + 1,
+            self.move_count,
+            self.board.piece_type_at(move.from_square),
+            self._initial_positions[move.to_square],
+            move.from_square,
+            move.to_square,
+            promotion=move.promotion
+        )
 
-        # Update the capture piece and en-passant square value to account for en-passant capture
-        if description['capture']['capture']:
-            if description['en_passant']['en_passant']:
-                description['en_passant']['square'] = self._get_en_passant_square()
-                description['capture']['piece'] = 'p' # Always capturing a pawn
+        # Set the capture piece and en-passant square value to account for en-passant capture
+        if self.board.is_capture(move):
+            record.capture_initial_pos = captured_initial_position
+            if self.board.is_en_passant(move):
+                record.en_passant = self._get_en_passant_square()
+                record.capture = chess.PAWN # Always capturing a pawn
             else:
-                description['capture']['piece'] = self._board.piece_at(move.to_square).symbol().lower()
-
-        # Update the castling side value if castling took place
-        if description['castle']['castle']:
-            if self._board.is_kingside_castling(move):
-                description['castle']['side'] = 'k'
-            elif self._board.is_queenside_castling(move):
-                description['castle']['side'] = 'q'
+                record.capture = self.board.piece_type_at(move.to_square)
 
-        # Re-push the move back on the move stack
-        self._board.push(move)
+        # Set the castling side value if castling took place
+        if self.board.is_kingside_castling(move):
+            record.castle = 'k'
+        elif self.board.is_queenside_castling(move):
+            record.castle = 'q'
 
-        return description
+        return record
 
     def _invert(self, color) -> str:
         """Inverts 'w' or 'b'."""
@@ -343,44 +595,65 @@ class Game:
         else:
             return BLACK if color == WHITE else WHITE
 
-    def _update_initial_positions(self, move, side) -> None:
-        """Updates the square to initial position dict."""
-        to = chess.square_name(move.to_square)
-        from_ = chess.square_name(move.from_square)
+    def _update_initial_positions(self, move, side) -> int:
+        """Updates the square to initial position array.
 
-        # save the captured piece's initial position
-        captured_initial_position = self._initial_positions.get(to, None)
+        Returns:
+            The initial square of the captured piece (None if the move isn't a capture).
+        """
+        positions = self._initial_positions
 
-        # update the dictionary
-        self._initial_positions[to] = self._initial_positions[from_]
-        del(self._initial_positions[from_])
+        # save the captured piece's initial position
+        captured_initial_position = positions[move.to_square]
 
-        # if taking, then should remove piece from dict, which already happens
+        # update the array
+        positions[move.to_square] = positions[move.from_square]
+        positions[move.from_square] = NO_SQUARE
 
         # check if castling to update rook
-        if self._board.is_castling(move):
-            rank = '1' if side == WHITE else '8'
+        if self.board.is_castling(move):
+            rank = 0 if side == WHITE else 7
 
-            if self._board.is_kingside_castling(move):
+            if self.board.is_kingside_castling(move):
                 # rook must be on file h because hasn't moved
-                old_rook_pos = 'h' + rank
-                new_rook_pos = 'f' + rank
-                self._initial_positions[new_rook_pos] = old_rook_pos
-                del(self._initial_positions[old_rook_pos])
+                old_rook_pos, new_rook_pos = chess.square(7, rank), chess.square(5, rank)
             else:
                 # queenside castling
                 # rook must be on file a because hasn't moved
-                old_rook_pos = 'a' + rank
-                new_rook_pos = 'd' + rank
-                self._initial_positions[new_rook_pos] = old_rook_pos
-                del(self._initial_positions[old_rook_pos])
+                old_rook_pos, new_rook_pos = chess.square(0, rank), chess.square(3, rank)
+            positions[new_rook_pos] = old_rook_pos
+            positions[old_rook_pos] = NO_SQUARE
 
         # check if en_passant
-        if self._board.is_en_passant(move):
-            en_passant_square = self._get_en_passant_square()
-            del self._initial_positions[en_passant_square]
+        if self.board.is_en_passant(move):
+            positions[self._get_en_passant_square()] = NO_SQUARE
 
-        return captured_initial_position
+        return None if captured_initial_position == NO_SQUARE else captured_initial_position
+
+    def parse_move(self, san) -> chess.Move:
+        """Parses a requested move, without making it.
+
+        If the legal moves for the current ply are cached (see legal_moves), standard SAN is looked up
+        there instead of being parsed.
+
+        Arguments:
+            san: The requested move (in Standard Algebraic Notation).
+        Returns:
+            The parsed move (chess.Move object).
+        Raises:
+            ValueError: When the given move is invalid SAN (in the current game context).
+        """
+        legal_moves = LEGAL_MOVES.get(self._legal_moves_key())
+        if legal_moves is not None and san in legal_moves:
+            return chess.Move.from_uci(legal_moves[san]['uci'])
+
+        move = self.board.parse_san(san)
+
+        # parse_san only returns legal moves, apart from null moves ('--')
+        if not move:
+            raise ValueError(f"Illegal move '{san}' in the current position.")
+
+        return move
 
     def move(self, san) -> dict:
         """Makes a requested move on the internal board.
@@ -392,25 +665,111 @@ class Game:
         Raises:
             ValueError: When the given move is invalid SAN (in the current game context).
         """
+        self._check_can_move(san)
+        move = self.parse_move(san)
+
+        # The requested SAN is recorded in the history as it is, but the PGN needs standard SAN
+        # (e.g. with '+' for checks).
+        return self._make_move(move, san, self.board.san(move))
+
+    def move_uci(self, uci) -> dict:
+        """Makes a requested move on the internal board.
+
+        Arguments:
+            uci: The requested move (in UCI notation, e.g. 'e2e4').
+        Returns:
+            Detailed description (in dictionary form) representing the move that was made.
+        Raises:
+            ValueError: When the given move is invalid UCI, or illegal (in the current game context).
+        """
+        return self.move_obj(chess.Move.from_uci(uci))
+
+    def move_obj(self, move) -> dict:
+        """Makes a requested move on the internal board.
+
+        Arguments:
+            move: The requested move (chess.Move object).
+        Returns:
+            Detailed description (in dictionary form) representing the move that was made.
+        Raises:
+            ValueError: When the given move is illegal (in the current game context).
+        """
+        self._check_can_move(move)
+
+        if move not in self._legal_moves():
+            raise ValueError(f"Illegal move '{move}' in the current position.")
+
+        san = self.board.san(move)
+        return self._make_move(move, san, san)
+
+    def _check_can_move(self, move) -> None:
+        """Raises a RuntimeError if no move can be made by the side to play."""
 
         # Prevent a move from being made if the game is over
         if not self.in_progress:
-            raise RuntimeError(f"Cannot make move '{san}' for side '{self.turn}' in ended game.")
+            raise RuntimeError(f"Cannot make move '{move}' for side '{self.turn}' in ended game.")
 
         # Check if the side has a player assigned to it
         if self.players[self.turn] is None:
-            raise RuntimeError(f"Cannot make move '{san}' for side '{self.turn}': No player found.")
+            raise RuntimeError(f"Cannot make move '{move}' for side '{self.turn}': No player found.")
+
+    def _legal_moves(self) -> set:
+        """The set of legal moves in the current position (cached for the current ply)."""
+        if self._legal_moves_cache is None or self._legal_moves_cache[0] != self._plies:
+            self._legal_moves_cache = (self._plies, set(self.board.legal_moves))
+        return self._legal_moves_cache[1]
+
+    def _legal_moves_key(self) -> tuple:
+        """Key of the current position in LEGAL_MOVES.
+
+        The FEN is included so that a game ID that gets reused can't be served the moves of another game.
+        """
+        return (self.id, self.ply_count, self.fen)
 
-        # copy the board to validate the move without affecting state
-        # NOTE: At this point, validate_board.push_san() raises a ValueError if the SAN is invalid in the current context.
-        validate_board = self._board.copy(stack=False)
-        validate_board.push_san(san)
+    def _has_legal_moves(self) -> bool:
+        """Whether the side to play has any legal move (without generating them all, unless they're cached)."""
+        if self._legal_moves_cache is not None and self._legal_moves_cache[0] == self._plies:
+            return bool(self._legal_moves_cache[1])
+        return any(self.board.generate_legal_moves())
+
+    def _append_pgn(self, san) -> None:
+        """Appends a move to the PGN, before it is made on the board.
+
+        Arguments:
+            san: The move in Standard Algebraic Notation, as generated by chess.Board.san.
+        """
+        if self.board.turn == chess.WHITE:
+            san = f'{self.board.fullmove_number}. {san}'
+        elif not self._pgn:
+            # The PGN starts with a move by black
+            san = f'{self.board.fullmove_number}...{san}'
+        self._pgn = f'{self._pgn} {san}' if self._pgn else san
+
+    def _make_move(self, move, san, pgn_san) -> dict:
+        """Makes a legal move on the internal board, and records it in the game history.
+
+        Arguments:
+            move: The move to make (chess.Move object), which must be legal.
+            san: The move in Standard Algebraic Notation (as it will be recorded in the history).
+            pgn_san: The move in Standard Algebraic Notation, as generated by chess.Board.san.
+        Returns:
+            Detailed description (in dictionary form) representing the move that was made.
+        """
 
         # Update piece to initial position dict
-        captured_initial_position = self._update_initial_positions(self._board.parse_san(san), self.turn)
+        captured_initial_position = self._update_initial_positions(move, self.turn)
+
+        # Construct the history record for the move
+        record = self._construct_move_record(move, san, captured_initial_position)
+
+        self._append_pgn(pgn_san)
+
+        # Positions before an irreversible move can never be repeated
+        irreversible = self.board.is_irreversible(move)
 
         # Make the move on the internal board
-        move = self._board.push_san(san)
+        self.board.push(move)
+        self._record_position(irreversible)
 
         # Increment ply count after move is successfully made
         self._plies += 1
@@ -419,19 +778,10 @@ class Game:
         for side in (WHITE, BLACK):
             self.decline_draw(side=side)
 
-        # Construct the extended move description (adding a SAN field)
-        # HACK: For logical purposes, it makes most sense for the SAN notation of the move
-        #   to be at the start of the detailed move dict (despite dicts not actually being ordered)
-        #   this was the cleanest way I could find to do it - just merging two dicts together.
-        detailed_move = {**{'san': san}, **self._construct_move_description(move)}
-
-        # Set capture.initial_pos_piece
-        detailed_move['capture']['initial_pos_piece'] = captured_initial_position
-
-        # Add the detailed move to self._history
-        self._history.append(detailed_move)
+        # Add the move to self._history
+        self._history.append(record)
 
-        return detailed_move
+        return record.to_dict()
 
     def add_player(self, id_, side) -> None:
         """Adds a player to the current game.
@@ -583,14 +933,15 @@ class Game:
         if side not in (WHITE, BLACK):
             raise ValueError(f"Invalid side '{side}': expected one of ('w', 'b').")
 
-        # Don't allow draw declining if the game is not in progress
-        if not self.in_progress:
-            return
-
         # Don't allow draw declining if the opposite side hasn't made a draw offer
+        # (Checked first, since every move declines any draw offers, and most moves are made without one)
         if not self._draw_offers[self._invert(side)]['made']:
             return
 
+        # Don't allow draw declining if the game is not in progress
+        if not self.in_progress:
+            return
+
         # Don't allow draw declining if the offer was already accepted
         if self._draw_offers[self._invert(side)]['accepted']:
             return
@@ -606,7 +957,7 @@ class Game:
         NOTE: The piece colours will appear inverted if a light text colour is used, for example on a dark-background terminal.
         """
 
-        output = self._board.__str__()
+        output = self.board.__str__()
 
         # Replace white ASCII piece characters with unicode characters
         for piece in ['R', 'N', 'B', 'Q', 'K', 'P']:
@@ -635,7 +986,8 @@ class Game:
             creator_id=input_dict['creator_id'],
             game_id=game_id,
             time_controls=int(input_dict['time_per_player']),
-            public=(input_dict.get('public', 'true').lower() == 'true')
+            public=(input_dict.get('public', 'true').lower() == 'true'),
+            ai_level=input_dict.get('ai_level', None)
         )
 
         if input_dict['player1_id'] != 'OPEN':
@@ -646,7 +998,20 @@ class Game:
         return game
 
     @classmethod
-    def from_dict(cls, input_dict):
+    def from_dict(cls, input_dict, verify=False):
+        """Factory method to create a Game object from a dict produced by to_dict.
+
+        The board is restored directly from the stored FEN and repetition hashes, so loading
+        doesn't depend on the length of the game. Dicts stored before these fields existed
+        are loaded by replaying the history.
+
+        Arguments:
+            input_dict: Dictionary representation of the Game object.
+            verify: Replay the whole history, and check that it reaches the stored snapshot.
+        Raises:
+            KeyError: When required keys are missing from the input dictionary.
+            ValueError: When verifying, and the history doesn't match the stored snapshot.
+        """
         missing_keys = []
         required_keys = [
             'id',
@@ -673,25 +1038,171 @@ class Game:
         # Create a new game object
         game = cls(input_dict['creator'], input_dict['id'])
 
-        # Generate a new internal board (FEN)
-        game._board = chess.Board()
-
         # Load in necessary attributes for starting the game
-        game._players = input_dict['players']
+        # Copied, since the dict may be cached (see GameCache) and these are changed in place
+        game._players = dict(input_dict['players'])
         game._time_controls = input_dict['time_controls']
-
-        # Load in the played game moves, and replay them on the new internal board
-        for move in input_dict['history']:
-            game._history.append(move)
-            game._board.push_san(move['san'])
+        game._stored_history = list(input_dict['history'])
+
+        has_snapshot = all(key in input_dict for key in ('fen', 'repetitions', 'pgn'))
+        if has_snapshot and not verify:
+            # Restore the board from the snapshot
+            game._fen = input_dict['fen']
+            game._repetitions = dict(input_dict['repetitions'])
+            game._position = None
+            game._pgn = input_dict['pgn']
+
+            # Board game-over reasons take priority over the others, so any other reason means there was none
+            if 'game_over' in input_dict:
+                reason = input_dict['game_over']['reason']
+                if reason in ('Resignation', 'Draw by agreement', 'Time'):
+                    reason = None
+                game._board_status = (input_dict['ply_count'], reason)
+        else:
+            # Replay the played game moves on a new internal board
+            game._board = chess.Board(game._fen)
+            for move in game._stored_history:
+                parsed = game._board.parse_san(move['san'])
+                game._append_pgn(game._board.san(parsed))
+                irreversible = game._board.is_irreversible(parsed)
+                game._board.push(parsed)
+                game._record_position(irreversible)
+
+            if has_snapshot and (game.fen != input_dict['fen'] or game._repetitions != input_dict['repetitions']):
+                raise ValueError(f"History of game '{input_dict['id']}' doesn't match its stored board.")
 
         # Load in any remaining attributes from the input dictionary
         game._public = input_dict['public']
-        game._remaining_time = input_dict['remaining_time']
+        game._ai_level = input_dict.get('ai_level', None)
+        game._remaining_time = dict(input_dict['remaining_time'])
         game._plies = input_dict['ply_count']
-        game._resigned = input_dict['resigned']
-        game._draw_offers = input_dict['draw_offers']
-        game._initial_positions = input_dict['initial_positions']
+        game._resigned = dict(input_dict['resigned'])
+        game._draw_offers = {side: dict(offer) for side, offer in input_dict['draw_offers'].items()}
+        game._initial_positions = array('b', [NO_SQUARE] * 64)
+        for square, initial in input_dict['initial_positions'].items():
+            game._initial_positions[chess.SQUARE_NAMES.index(square)] = chess.SQUARE_NAMES.index(initial)
+        game._status_cache = None
+        game._legal_moves_cache = None
+
+        return game
+
+    def _moves(self) -> list:
+        """All of the moves made in the game (chess.Move objects)."""
+        if self._packed_moves is not None:
+            moves = list(self._packed_moves)
+        else:
+            moves = [
+                chess.Move(
+                    chess.SQUARE_NAMES.index(move['from']),
+                    chess.SQUARE_NAMES.index(move['to']),
+                    chess.PIECE_SYMBOLS.index(move['promotion']['piece']) if move['promotion']['promotion'] else None
+                ) for move in self._stored_history
+            ]
+        return moves + [chess.Move(record.from_square, record.to_square, record.promotion) for record in self._history]
+
+    def _unpack_history(self) -> None:
+        """Rebuilds the history and PGN of a game loaded from a binary snapshot, by replaying its moves."""
+        replay = Game(self._creator)
+        for move in self._packed_moves:
+            san = replay.board.san(move)
+            replay._make_move(move, san, san)
+        self._stored_history = replay.history + self._stored_history
+        self._pgn = f'{replay.pgn} {self._pgn}'.strip() if self._pgn else replay.pgn
+        self._packed_moves = None
+
+    def to_bytes(self) -> bytes:
+        """Generates a compact binary snapshot of the Game object, for caching and internal transport.
+
+        The snapshot holds the board (as FEN), clocks, flags, repetition counts and initial positions, and
+        the moves at 2 bytes per ply. The history and PGN are rebuilt from the moves when they are first
+        read after from_bytes, with the SAN of each move in standard form.
+        """
+        self._status()
+        reason = self._board_status[1]
+        time_value = lambda value: -1 if value is None else value
+        flags = (
+            self._public,
+            self._resigned[WHITE], self._resigned[BLACK],
+            self._draw_offers[WHITE]['made'], self._draw_offers[WHITE]['accepted'],
+            self._draw_offers[BLACK]['made'], self._draw_offers[BLACK]['accepted']
+        )
+        moves = self._moves()
+
+        return b''.join([
+            SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+            _pack_string(self._id),
+            _pack_string(self._creator),
+            _pack_string(self._players[WHITE]),
+            _pack_string(self._players[BLACK]),
+            _pack_string(self._ai_level),
+            _pack_string(self.fen),
+            SNAPSHOT_STATE.pack(
+                sum(flag << bit for bit, flag in enumerate(flags)),
+                time_value(self._time_controls),
+                time_value(self._remaining_time[WHITE]),
+                time_value(self._remaining_time[BLACK]),
+                self._plies,
+                BOARD_GAME_OVER_REASONS.index(reason),
+                len(self._repetitions)
+            ),
+            b''.join(SNAPSHOT_REPETITION.pack(int(position, 16), count) for position, count in self._repetitions.items()),
+            self._initial_positions.tobytes(),
+            array('H', (_pack_move(move) for move in moves)).tobytes()
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Factory method to create a Game object from a binary snapshot produced by to_bytes.
+
+        Raises:
+            ValueError: When the data isn't a snapshot, or was written by an unsupported version.
+        """
+        magic, version = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError('Expected a binary game snapshot.')
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f'Unsupported game snapshot version: {version}.')
+
+        offset = SNAPSHOT_HEADER.size
+        strings = []
+        for _ in range(6):
+            value, offset = _unpack_string(data, offset)
+            strings.append(value)
+        game_id, creator, white, black, ai_level, fen = strings
+
+        flags, time_controls, white_time, black_time, plies, reason, repetitions = SNAPSHOT_STATE.unpack_from(data, offset)
+        offset += SNAPSHOT_STATE.size
+        flags = [bool(flags & (1 << bit)) for bit in range(7)]
+        time_value = lambda value: None if value == -1 else value
+
+        game = cls(creator, game_id)
+        game._players = {WHITE: white, BLACK: black}
+        game._public = flags[0]
+        game._ai_level = ai_level
+        game._time_controls = time_value(time_controls)
+        game._remaining_time = {WHITE: time_value(white_time), BLACK: time_value(black_time)}
+        game._resigned = {WHITE: flags[1], BLACK: flags[2]}
+        game._draw_offers = {
+            WHITE: {'made': flags[3], 'accepted': flags[4]},
+            BLACK: {'made': flags[5], 'accepted': flags[6]}
+        }
+        game._plies = plies
+        game._fen = fen
+        game._board_status = (plies, BOARD_GAME_OVER_REASONS[reason])
+
+        game._repetitions = {}
+        for _ in range(repetitions):
+            position, count = SNAPSHOT_REPETITION.unpack_from(data, offset)
+            game._repetitions[format(position, '016x')] = count
+            offset += SNAPSHOT_REPETITION.size
+        game._position = None
+
+        game._initial_positions = array('b', data[offset:offset + 64])
+        offset += 64
+
+        moves = array('H')
+        moves.frombytes(data[offset:offset + 2 * plies])
+        game._packed_moves = [_unpack_move(move) for move in moves]
 
         return game
 
@@ -707,6 +1218,7 @@ class Game:
             'creator':              self.creator,
             'players':              self.players,
             'public':               self.public,
+            'ai_level':             self.ai_level,
             'free_slots':           self.free_slots,
             'time_controls':        self.time_controls,
             'remaining_time':       self.remaining_time,
@@ -721,5 +1233,6 @@ class Game:
             'pgn':                  self.pgn,
             'history':              self.history,
             'fen':                  self.fen,
-            'initial_positions':    self.initial_positions
+            'initial_positions':    self.initial_positions,
+            'repetitions':          self.repetitions
         }
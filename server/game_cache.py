@@ -0,0 +1,212 @@
+"""In-process cache of games in front of the games collection in Firestore.
+
+Every write through the cache stores a new random update token with the game. A cached game is
+only used while the stored game has the same ply count and update token, so a write made by
+another worker (or outside the server) invalidates it. Checking the version only reads those two
+fields instead of the whole document, and the cached game is loaded without the board.
+
+Single-worker deployments, where every write goes through the same cache, can skip the check
+and the Firestore read along with it by setting GAME_CACHE_VALIDATE=false.
+
+Changes that don't make a move (draw offers, resignations and players joining) only update the
+fields that changed. Firestore can only make a write conditional on the update time of the
+document, so the cache keeps the update time of the last version it saw of each game, and the
+update fails with a GameConflictError if the game has been written since it was loaded.
+"""
+
+import os
+import uuid
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud.firestore import LastUpdateOption
+from .cache import LRUCache
+from .game import Game
+from .game_store import read_game, write_game, MOVE_FIELDS
+
+UPDATE_TOKEN = 'update_token'
+VERSION_FIELDS = ['ply_count', UPDATE_TOKEN]
+
+GAME_CACHE_SIZE = int(os.environ.get('GAME_CACHE_SIZE', 256))
+GAME_CACHE_VALIDATE = os.environ.get('GAME_CACHE_VALIDATE', 'true').lower() != 'false'
+
+class GameConflictError(Exception):
+    """Raised when a game is updated after being written by another request."""
+    pass
+
+class GameCache:
+    """Least recently used cache of stored game dicts, validated against Firestore by version.
+
+    Entries are the dicts that were read or written, and every get returns a new Game loaded from
+    one, so that a request that fails after changing its Game can't leave the cache out of date.
+
+    Metrics:
+        hits:       Lookups served from the cache.
+        misses:     Lookups that read the whole document (including stale ones).
+        stale:      Lookups that found a cached game, but an older version than the stored one.
+    """
+
+    def __init__(self, size, validate=True):
+        self.validate = validate
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._entries = LRUCache(size)
+        # (ply_count, update_token, update_time) of the last version seen of each game, cached or not
+        self._versions = LRUCache(size)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, doc_ref) -> Game:
+        """Loads a game through the cache.
+
+        Arguments:
+            doc_ref: The Firestore document reference of the game.
+        Returns:
+            The Game object (None if the document doesn't exist).
+        """
+        game_dict = self.get_dict(doc_ref)
+        return Game.from_dict(game_dict) if game_dict is not None else None
+
+    def get_dict(self, doc_ref) -> dict:
+        """Reads a stored game dict through the cache.
+
+        Arguments:
+            doc_ref: The Firestore document reference of the game.
+        Returns:
+            The stored game dict, which must not be modified (None if the document doesn't exist).
+        """
+        entry = self._entries.get(doc_ref.id)
+        if entry is not None:
+            if not self.validate or self._is_current(doc_ref, entry):
+                self.hits += 1
+                return entry[2]
+            self.stale += 1
+            self._entries.delete(doc_ref.id)
+
+        self.misses += 1
+        doc = doc_ref.get()
+        game_dict = read_game(doc_ref, doc)
+        if game_dict is None:
+            return None
+        self._versions.set(doc_ref.id, (game_dict['ply_count'], game_dict.get(UPDATE_TOKEN), doc.update_time))
+        # Games written without a token can't be told apart from other writes at the same ply
+        if game_dict.get(UPDATE_TOKEN) is not None:
+            self._entries.set(doc_ref.id, (game_dict['ply_count'], game_dict[UPDATE_TOKEN], game_dict))
+        return game_dict
+
+    def set(self, doc_ref, game, stored_dict=None) -> dict:
+        """Writes a game to Firestore and to the cache.
+
+        Arguments:
+            doc_ref: The Firestore document reference of the game.
+            game: The Game object to store.
+            stored_dict: The game dict the game was loaded from, if any (see write_game).
+        Returns:
+            The game dict that was written (including its new update token).
+        """
+        game_dict = game.to_dict()
+        game_dict[UPDATE_TOKEN] = uuid.uuid4().hex
+        game_dict = write_game(doc_ref, game_dict, stored_dict)
+        self._entries.set(doc_ref.id, (game_dict['ply_count'], game_dict[UPDATE_TOKEN], game_dict))
+        # The update time of the write isn't known until the version is read again
+        self._versions.delete(doc_ref.id)
+        return game_dict
+
+    def update(self, doc_ref, game, stored_dict) -> dict:
+        """Writes the fields of a game that changed since it was loaded, to Firestore and to the cache.
+
+        The update is only made if the stored game is still the version it was loaded from, so it
+        can't overwrite a move (or any other change) made concurrently. Nothing is written if no
+        field changed, and games that have had moves made since they were loaded are written with
+        set instead.
+
+        Arguments:
+            doc_ref: The Firestore document reference of the game.
+            game: The Game object to store.
+            stored_dict: The game dict the game was loaded from.
+        Returns:
+            The stored game dict (including its new update token).
+        Raises:
+            GameConflictError: When the stored game has changed since it was loaded.
+        """
+        game_dict = game.to_dict()
+        if stored_dict is None or game_dict['ply_count'] != stored_dict['ply_count']:
+            return self.set(doc_ref, game, stored_dict)
+
+        field_updates = {key: value for key, value in game_dict.items()
+                         if key not in MOVE_FIELDS and stored_dict.get(key) != value}
+        if not field_updates:
+            return stored_dict
+        field_updates[UPDATE_TOKEN] = uuid.uuid4().hex
+
+        option = LastUpdateOption(self._update_time(doc_ref, stored_dict))
+        try:
+            result = doc_ref.update(field_updates, option=option)
+        except FailedPrecondition:
+            self.invalidate(doc_ref.id)
+            raise GameConflictError(f"Game '{doc_ref.id}' was changed by another request.")
+
+        game_dict = {**stored_dict, **field_updates}
+        self._entries.set(doc_ref.id, (game_dict['ply_count'], game_dict[UPDATE_TOKEN], game_dict))
+        self._versions.set(doc_ref.id, (game_dict['ply_count'], game_dict[UPDATE_TOKEN], result.update_time))
+        return game_dict
+
+    def invalidate(self, game_id) -> None:
+        """Removes a game from the cache (if it is cached)."""
+        self._entries.delete(game_id)
+        self._versions.delete(game_id)
+
+    def clear(self) -> None:
+        """Removes all games, and resets the metrics."""
+        self._entries.clear()
+        self._versions.clear()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits (0 if there weren't any lookups)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """The metrics of the cache, valid for flask.jsonify."""
+        return {
+            'size':         self._entries.size,
+            'games':        len(self._entries),
+            'hits':         self.hits,
+            'misses':       self.misses,
+            'stale':        self.stale,
+            'hit_rate':     self.hit_rate
+        }
+
+    def _is_current(self, doc_ref, entry) -> bool:
+        """Whether a cached entry has the same version as the stored game (reading only the version fields)."""
+        version = doc_ref.get(field_paths=VERSION_FIELDS)
+        if not version.exists:
+            return False
+        version_dict = version.to_dict()
+        self._versions.set(doc_ref.id, (version_dict.get('ply_count'), version_dict.get(UPDATE_TOKEN), version.update_time))
+        return (version_dict.get('ply_count'), version_dict.get(UPDATE_TOKEN)) == entry[:2]
+
+    def _update_time(self, doc_ref, stored_dict):
+        """The update time of the version of a game that a stored dict was read from.
+
+        Raises:
+            GameConflictError: When the stored game is no longer that version.
+        """
+        loaded = (stored_dict['ply_count'], stored_dict.get(UPDATE_TOKEN))
+        version = self._versions.get(doc_ref.id)
+        if version is not None and version[:2] == loaded:
+            return version[2]
+
+        # Only games written by this worker since they were read have to be read again
+        snapshot = doc_ref.get(field_paths=VERSION_FIELDS)
+        version_dict = snapshot.to_dict() if snapshot.exists else {}
+        if (version_dict.get('ply_count'), version_dict.get(UPDATE_TOKEN)) != loaded:
+            self.invalidate(doc_ref.id)
+            raise GameConflictError(f"Game '{doc_ref.id}' was changed by another request.")
+        return snapshot.update_time
+
+GAME_CACHE = GameCache(GAME_CACHE_SIZE, validate=GAME_CACHE_VALIDATE)
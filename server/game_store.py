@@ -0,0 +1,128 @@
+"""Storage layout of games in Firestore.
+
+Games used to be stored as a single document holding the whole of Game.to_dict, so every move
+rewrote the full history and PGN. Games are now stored as:
+    games/{id}:                 The game without its history and PGN (the current snapshot).
+    games/{id}/moves/{ply}:     One document per move, holding its history entry and PGN movetext.
+
+A move only writes its own move document and the snapshot. The move documents are written before
+the snapshot, which is what readers go by, so a failed write never leaves a snapshot that refers to
+missing moves. Games in the old layout are still loaded, and are moved to the new one the next time
+they are written, or all at once with:
+
+    python -m server.game_store
+"""
+
+import re
+from .game import Game
+
+MOVES_COLLECTION = 'moves'
+
+# Marks snapshot documents of games stored with a move log
+LAYOUT = 'layout'
+MOVE_LOG = 'move_log'
+
+# Fields kept in the move documents instead of the snapshot
+MOVE_FIELDS = ('history', 'pgn')
+
+# The PGN movetext of each ply (see Game._append_pgn)
+PGN_PLY = re.compile(r'\d+\.\.\.\S+|\d+\. \S+|\S+')
+
+def move_id(ply) -> str:
+    """ID of the move document of a ply (zero-padded, so that they sort in order)."""
+    return f'{ply:05d}'
+
+def split_pgn(pgn) -> list:
+    """Splits PGN movetext into the movetext of each ply, e.g. '1. e4 e5' into ['1. e4', 'e5']."""
+    return PGN_PLY.findall(pgn)
+
+def read_game(doc_ref, doc=None) -> dict:
+    """Reads a game stored in either layout.
+
+    Arguments:
+        doc_ref: The Firestore document reference of the game.
+        doc: The snapshot of the game document, if it has already been read.
+    Returns:
+        The game dict, in the form produced by Game.to_dict (None if the game doesn't exist).
+    """
+    if doc is None:
+        doc = doc_ref.get()
+    if not doc.exists:
+        return None
+    game_dict = doc.to_dict()
+    if game_dict.get(LAYOUT) != MOVE_LOG:
+        return game_dict
+
+    # Moves beyond the snapshot's ply count are left over from a failed write
+    moves = doc_ref.collection(MOVES_COLLECTION).where('ply', '<', game_dict['ply_count']).get()
+    moves = sorted((move.to_dict() for move in moves), key=lambda move: move['ply'])
+    if len(moves) != game_dict['ply_count']:
+        raise ValueError(f"Game '{doc_ref.id}' has {len(moves)} stored moves, expected {game_dict['ply_count']}.")
+
+    game_dict['history'] = [move['move'] for move in moves]
+    game_dict['pgn'] = ' '.join(move['pgn'] for move in moves)
+    return game_dict
+
+def write_game(doc_ref, game_dict, stored_dict=None) -> dict:
+    """Writes a game in the move log layout.
+
+    Arguments:
+        doc_ref: The Firestore document reference of the game.
+        game_dict: The game dict to write (see Game.to_dict).
+        stored_dict: The game dict that was read (see read_game), if any. Only the moves made since
+                     it are written, unless it was stored in the old layout.
+    Returns:
+        The game dict, marked as stored in the move log layout.
+    """
+    stored_plies = 0
+    if stored_dict is not None and stored_dict.get(LAYOUT) == MOVE_LOG:
+        stored_plies = min(stored_dict['ply_count'], game_dict['ply_count'])
+
+    if game_dict['ply_count'] > stored_plies:
+        pgn = split_pgn(game_dict['pgn'])
+        moves = doc_ref.collection(MOVES_COLLECTION)
+        for ply in range(stored_plies, game_dict['ply_count']):
+            moves.document(move_id(ply)).set({'ply': ply, 'move': game_dict['history'][ply], 'pgn': pgn[ply]})
+
+    game_dict = {**game_dict, LAYOUT: MOVE_LOG}
+    doc_ref.set({key: value for key, value in game_dict.items() if key not in MOVE_FIELDS})
+    return game_dict
+
+def _with_snapshot(game_dict) -> dict:
+    """A game dict in the old layout, with the board snapshot of games stored before it existed."""
+    return {**game_dict, **Game.from_dict(game_dict).to_dict()}
+
+def migrate_game(doc_ref) -> bool:
+    """Moves a game stored in the old layout to the move log layout.
+
+    Returns:
+        Whether the game was migrated (False if it doesn't exist, or was already migrated).
+    """
+    game_dict = read_game(doc_ref)
+    if game_dict is None or game_dict.get(LAYOUT) == MOVE_LOG:
+        return False
+    write_game(doc_ref, _with_snapshot(game_dict))
+    return True
+
+def migrate_games(collection) -> int:
+    """Moves every game in a collection stored in the old layout to the move log layout.
+
+    Returns:
+        The number of games that were migrated.
+    """
+    migrated = 0
+    for doc in collection.get():
+        game_dict = doc.to_dict()
+        if game_dict.get(LAYOUT) != MOVE_LOG:
+            write_game(collection.document(doc.id), _with_snapshot(game_dict))
+            migrated += 1
+    return migrated
+
+def main():
+    # Connects to Firestore the same way as the server
+    from .server import db, GAMES_COLLECTION
+    migrated = migrate_games(db.collection(GAMES_COLLECTION))
+    print(f"Migrated {migrated} games to the move log layout.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Allocation of sequential game IDs in blocks.
+
+Game IDs come from the count in counts/games. Reading and writing it for every new game made it
+a hotspot that every game creation contended on, and two concurrent creations could read the same
+count and overwrite each other's game. Instead, each worker reserves a block of IDs at a time by
+advancing the count, conditional on it not having changed since it was read, and hands the IDs
+out from memory. Only one game creation per block touches the count.
+
+IDs are still unique and increasing within a worker, but not across workers, and the unused IDs of
+a block are skipped when a worker restarts. The block size is set by GAME_ID_BLOCK_SIZE.
+"""
+
+import os
+import threading
+from google.api_core.exceptions import Conflict, FailedPrecondition
+from google.cloud.firestore import LastUpdateOption
+
+GAME_ID_BLOCK_SIZE = int(os.environ.get('GAME_ID_BLOCK_SIZE', 20))
+
+# Attempts at reserving a block before giving up, when other workers keep advancing the count
+RESERVE_ATTEMPTS = 10
+
+class IdAllocator:
+    """Hands out sequential IDs from blocks reserved on a counter document.
+
+    Metrics:
+        allocated:      IDs handed out.
+        reservations:   Blocks reserved.
+        conflicts:      Reservations retried because another worker advanced the count first.
+    """
+
+    def __init__(self, block_size):
+        if not isinstance(block_size, int):
+            raise TypeError(f"Expected 'block_size' argument to be an int, got: {type(block_size)}.")
+        if block_size <= 0:
+            raise ValueError(f"Cannot allocate IDs in blocks of {block_size}.")
+
+        self.block_size = block_size
+        self.allocated = 0
+        self.reservations = 0
+        self.conflicts = 0
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+
+    def next_id(self, counter_ref) -> str:
+        """The next ID, reserving a new block on the counter document if the current one is used up.
+
+        Arguments:
+            counter_ref: The Firestore document reference of the counter, which holds the last
+                         reserved ID as 'count' (created if it doesn't exist).
+        Returns:
+            The ID, as a string.
+        """
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve(counter_ref)
+            self._next += 1
+            self.allocated += 1
+            return str(self._next)
+
+    def clear(self) -> None:
+        """Drops the current block, and resets the metrics."""
+        with self._lock:
+            self._next = self._end = 0
+            self.allocated = 0
+            self.reservations = 0
+            self.conflicts = 0
+
+    def stats(self) -> dict:
+        """The metrics of the allocator, valid for flask.jsonify."""
+        return {
+            'block_size':       self.block_size,
+            'allocated':        self.allocated,
+            'reservations':     self.reservations,
+            'conflicts':        self.conflicts
+        }
+
+    def _reserve(self, counter_ref) -> tuple:
+        """Advances the count by a block.
+
+        Returns:
+            (first, end) of the reserved block, where the IDs are first + 1 to end.
+        Raises:
+            RuntimeError: When the count kept changing while it was being advanced.
+        """
+        for _ in range(RESERVE_ATTEMPTS):
+            counter = counter_ref.get()
+            try:
+                if counter.exists:
+                    count = int(counter.to_dict()['count'])
+                    counter_ref.update({'count': count + self.block_size},
+                                       option=LastUpdateOption(counter.update_time))
+                else:
+                    count = 0
+                    counter_ref.create({'count': self.block_size})
+            except (FailedPrecondition, Conflict):
+                self.conflicts += 1
+                continue
+            self.reservations += 1
+            return count, count + self.block_size
+        raise RuntimeError(f"Couldn't reserve a block of IDs after {RESERVE_ATTEMPTS} attempts.")
+
+GAME_IDS = IdAllocator(GAME_ID_BLOCK_SIZE)
@@ -0,0 +1,241 @@
+"""Bulk import of PGN files into Game dicts (in the form produced by Game.to_dict).
+
+Games are read from the file one at a time, and converted in a pool of worker processes.
+Each move is parsed once and made with Game._make_move, skipping the checks that Game.move
+makes for moves requested by players.
+
+Usage:
+    python -m server.pgn_import games.pgn --output games.jsonl --processes 4
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import itertools
+import collections
+import multiprocessing
+from .game import Game, WHITE, BLACK, SCORES
+
+# Tag pair, e.g. [White "Carlsen, Magnus"]
+TAG_PAIR = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+
+# Comments, NAGs and move numbers in movetext (variations are removed separately, since they can be nested)
+COMMENT = re.compile(r'\{[^}]*\}|;[^\n]*')
+VARIATION = re.compile(r'\([^()]*\)')
+MOVE_NUMBER = re.compile(r'^\d+\.+')
+ANNOTATION = re.compile(r'[?!]+$')
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+# Player IDs used for imported games without player names
+DEFAULT_PLAYERS = {WHITE: 'white', BLACK: 'black'}
+
+# Games sent to each worker process at a time, and the number of games read ahead per process
+CHUNK_SIZE = 16
+READ_AHEAD = 4
+
+class PGNImportError(ValueError):
+    """Raised when a game in a PGN file can't be imported."""
+    pass
+
+def read_games(lines):
+    """Splits the lines of a PGN file into games, reading them lazily.
+
+    Arguments:
+        lines: An iterable of lines, such as an open file.
+    Yields:
+        (tags, movetext) for each game, where tags is a dict of its tag pairs.
+    """
+    tags, movetext = {}, []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('%'):
+            continue
+
+        if line.startswith('['):
+            if movetext:
+                # A tag pair after movetext starts the next game (for games without a termination marker)
+                yield tags, '\n'.join(movetext)
+                tags, movetext = {}, []
+            match = TAG_PAIR.match(line)
+            if match:
+                tags[match.group(1)] = match.group(2).replace('\\"', '"').replace('\\\\', '\\')
+        elif line:
+            movetext.append(line)
+            if line.split()[-1] in RESULTS:
+                yield tags, '\n'.join(movetext)
+                tags, movetext = {}, []
+
+    if tags or movetext:
+        yield tags, '\n'.join(movetext)
+
+def parse_movetext(movetext):
+    """Extracts the moves (as SAN) and the result from PGN movetext.
+
+    Comments, variations, NAGs, move numbers and move annotations (e.g. '!?') are ignored.
+
+    Returns:
+        (moves, result), where result is None if the movetext has no termination marker.
+    """
+    movetext = COMMENT.sub(' ', movetext)
+    while True:
+        movetext, removed = VARIATION.subn(' ', movetext)
+        if not removed:
+            break
+
+    moves, result = [], None
+    for token in movetext.split():
+        token = MOVE_NUMBER.sub('', token)
+        if not token or token.startswith('$'):
+            continue
+        if token in RESULTS:
+            result = token
+            continue
+        moves.append(ANNOTATION.sub('', token))
+    return moves, result
+
+def import_game(tags, movetext, creator_id='import', game_id=None):
+    """Converts a game from a PGN file into a Game dict.
+
+    The players are named after the White and Black tags. When the game is still in progress after
+    its last move, a decisive result is recorded as a resignation, and a drawn one as an accepted
+    draw offer, so that the result of the Game matches the PGN.
+
+    Arguments:
+        tags: The tag pairs of the game (as returned by read_games).
+        movetext: The movetext of the game.
+        creator_id: The ID of the user recorded as the creator of the game.
+        game_id: The ID of the game.
+    Returns:
+        Dictionary representation of the game (see Game.to_dict).
+    Raises:
+        ValueError: When the game starts from a custom position, or has an invalid or illegal move.
+    """
+    if tags.get('SetUp') == '1' or 'FEN' in tags:
+        raise ValueError("Games from a custom starting position can't be imported.")
+
+    moves, result = parse_movetext(movetext)
+    result = tags.get('Result', result)
+
+    game = Game(creator_id, game_id)
+    players = {side: tags.get(tag, '?') for side, tag in ((WHITE, 'White'), (BLACK, 'Black'))}
+    if '?' in players.values() or players[WHITE] == players[BLACK]:
+        players = DEFAULT_PLAYERS
+    for side, player in players.items():
+        game.add_player(player, side)
+
+    board = game.board
+    for ply, san in enumerate(moves):
+        try:
+            move = board.parse_san(san)
+        except ValueError:
+            raise ValueError(f"Illegal move '{san}' at ply {ply + 1}.")
+        if not move:
+            raise ValueError(f"Illegal move '{san}' at ply {ply + 1}.")
+        standard_san = board.san(move)
+        game._make_move(move, standard_san, standard_san)
+
+    if game.in_progress:
+        if result == SCORES[WHITE]:
+            game.resign(BLACK)
+        elif result == SCORES[BLACK]:
+            game.resign(WHITE)
+        elif result == SCORES['draw']:
+            game.offer_draw(WHITE)
+            game.accept_draw(BLACK)
+
+    return game.to_dict()
+
+def _import_chunk(args):
+    """Imports a chunk of games in a worker process.
+
+    Returns:
+        (index, dict) for each game, with the error message in place of the dict if it couldn't be imported.
+    """
+    chunk, creator_id = args
+    imported = []
+    for index, tags, movetext in chunk:
+        try:
+            imported.append((index, import_game(tags, movetext, creator_id)))
+        except (ValueError, RuntimeError) as e:
+            imported.append((index, str(e)))
+    return imported
+
+def _chunks(games, creator_id):
+    """Groups numbered games into chunks for the worker processes."""
+    games = ((index, tags, movetext) for index, (tags, movetext) in enumerate(games))
+    while True:
+        chunk = list(itertools.islice(games, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk, creator_id
+
+def import_pgn(lines, processes=None, creator_id='import', skip_invalid=False):
+    """Imports every game in a PGN file, in a pool of worker processes.
+
+    The file is read lazily, at most READ_AHEAD chunks of games per process ahead of the games that
+    have been yielded, so files of any size can be imported. Games are yielded in file order.
+
+    Arguments:
+        lines: An iterable of lines, such as an open file.
+        processes: The number of worker processes (defaults to the number of CPUs). With 1, games are
+                   imported in the calling process.
+        creator_id: The ID of the user recorded as the creator of each game.
+        skip_invalid: Skip games that can't be imported, instead of raising PGNImportError.
+    Yields:
+        Dictionary representation of each game (see Game.to_dict).
+    Raises:
+        PGNImportError: When a game can't be imported (unless skip_invalid is set).
+    """
+    processes = processes or multiprocessing.cpu_count()
+    chunks = _chunks(read_games(lines), creator_id)
+
+    if processes == 1:
+        results = map(_import_chunk, chunks)
+        yield from _collect(results, skip_invalid)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        # Pool.imap reads its whole input up front, so chunks are submitted as earlier ones are collected
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_import_chunk, (chunk,)))
+            if len(pending) >= processes * READ_AHEAD:
+                yield from _collect([pending.popleft().get()], skip_invalid)
+        yield from _collect((result.get() for result in pending), skip_invalid)
+
+def _collect(results, skip_invalid):
+    """Yields the imported games from chunk results, raising or skipping the ones that failed."""
+    for chunk in results:
+        for index, imported in chunk:
+            if isinstance(imported, dict):
+                yield imported
+            elif not skip_invalid:
+                raise PGNImportError(f"Cannot import game {index + 1}: {imported}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pgn', help='PGN file to import')
+    parser.add_argument('--output', help='File to write the games to as JSON lines (defaults to stdout)')
+    parser.add_argument('--processes', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--creator', default='import', help='ID of the user recorded as the creator of each game')
+    parser.add_argument('--skip-invalid', action='store_true', help="Skip games that can't be imported")
+    args = parser.parse_args()
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    start = time.perf_counter()
+    count = 0
+    with open(args.pgn, errors='replace') as pgn_file:
+        for game_dict in import_pgn(pgn_file, args.processes, args.creator, args.skip_invalid):
+            output.write(json.dumps(game_dict) + '\n')
+            count += 1
+    elapsed = time.perf_counter() - start
+    if output is not sys.stdout:
+        output.close()
+
+    print(f"Imported {count} games in {elapsed:.1f}s ({count / elapsed:.0f} games/s)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
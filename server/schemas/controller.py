@@ -9,13 +9,13 @@ class ControllerRegisterInput(Schema):
     board_id        = fields.String(required=True)
     board_version   = fields.String(required=True)
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
 
     @validates('board_id')
     def validate_controller_not_registered(self, value):
-        controller_ref = self.db.collection(CONTROLLER_COLLECTION).document(value).get()
+        controller_ref = self.unit_of_work.get(CONTROLLER_COLLECTION, value)
         if not controller_ref.exists:
             return
 
@@ -30,13 +30,13 @@ class ControllerPollInput(Schema):
     ply_count = fields.Integer(required=True)
     error = fields.Integer() # could be None
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
 
     @validates('board_id')
     def validate_controller_registered(self, value):
-        controller_ref = self.db.collection(CONTROLLER_COLLECTION).document(value).get()
+        controller_ref = self.unit_of_work.get(CONTROLLER_COLLECTION, value)
         if not controller_ref.exists:
             raise ValidationError(f'Controller {value} not registered')
 
@@ -53,7 +53,7 @@ class ControllerPollInput(Schema):
 
     @validates_schema(skip_on_field_errors=True)
     def validate_ply_and_error_within_bounds(self, data):
-        controller = self.db.collection(CONTROLLER_COLLECTION).document(data['board_id']).get().to_dict()
+        controller = self.unit_of_work.get(CONTROLLER_COLLECTION, data['board_id']).to_dict()
 
         game_id = controller['game_id']
 
@@ -61,7 +61,7 @@ class ControllerPollInput(Schema):
         if game_id is None:
             return
 
-        game = self.db.collection(GAMES_COLLECTION).document(game_id).get().to_dict()
+        game = self.unit_of_work.game_dict(game_id)
 
         if data['ply_count'] > game['ply_count']:
             raise ValidationError('ply_count cannot be greater than the stored one for the game')
@@ -1,7 +1,7 @@
 import time
 import firebase_admin.auth
 from marshmallow import Schema, fields, validates, validates_schema, ValidationError
-from server.game import Game
+from server.sunfish_ai import AI_LEVELS
 from .controller import TIMEOUT
 
 OPEN_SLOT = "OPEN"
@@ -24,20 +24,17 @@ class MakeMoveInput(Schema):
     # Identifier for the game to make the move on
     game_id = fields.String(required=True)
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
 
     @validates_schema
     def validate_move(self, data):
-        # Validate 'game_id'
-        game_ref = self.db.collection(GAME_COLLECTION).document(data['game_id']).get()
-        if not game_ref.exists:
+        # Validate 'game_id', and create a game object for validation
+        game = self.unit_of_work.game(data['game_id'])
+        if game is None:
             raise ValidationError(f"Game {data['game_id']} doesn\'t exist!")
 
-        # Create a game object for validation
-        game = Game.from_dict(game_ref.to_dict())
-
         # Validate 'user_id'
         if data['user_id'] == OPEN_SLOT or data['user_id'] == AI:
             pass
@@ -58,8 +55,8 @@ class MakeMoveInput(Schema):
 
         # Validate 'move'
         try:
-            # Check move is valid SAN and applicable to the board
-            game.move(data['move'])
+            # Check move is valid SAN and legal on the board (without making it)
+            game.parse_move(data['move'])
         except ValueError:
             raise ValidationError(f"Invalid move {data['move']} in current context.")
 
@@ -77,10 +74,17 @@ class CreateGameInput(Schema):
     # Whether the game is publicly listed or not
     # NOTE: Not actually required since this defaults to True when initializing the game object anyway.
     public = fields.Boolean(required=False)
+    # Difficulty level of the AI opponent (one of AI_LEVELS), defaults to DEFAULT_AI_LEVEL
+    ai_level = fields.String(required=False)
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
+
+    @validates('ai_level')
+    def validate_ai_level(self, value):
+        if value not in AI_LEVELS:
+            raise ValidationError(f'Expected ai_level to be one of {sorted(AI_LEVELS)}.')
 
     @validates('time_per_player')
     def validate_time(self, value):
@@ -110,7 +114,7 @@ class CreateGameInput(Schema):
 
     @validates('board_id')
     def board_exists_and_is_active(self, value):
-        controller_ref = self.db.collection(CONTROLLER_COLLECTION).document(value).get()
+        controller_ref = self.unit_of_work.get(CONTROLLER_COLLECTION, value)
         if not controller_ref.exists:
             raise ValidationError('Controller never registered')
 
@@ -127,14 +131,13 @@ class JoinGameInput(Schema):
     # side to join
     side = fields.String(required=False)
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
 
     @validates('game_id')
     def game_exists(self, value):
-        game_ref = self.db.collection(GAME_COLLECTION).document(value).get()
-        if not game_ref.exists:
+        if self.unit_of_work.game_dict(value) is None:
             raise ValidationError('Game doesn\'t exist!')
 
     @validates('player_id')
@@ -152,20 +155,17 @@ class DrawOfferInput(Schema):
     # Identifier for the game to make the move on
     game_id = fields.String(required=True)
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
 
     @validates_schema
     def validate_draw_offer(self, data):
-        # Check if game exists
-        game_ref = self.db.collection(GAME_COLLECTION).document(data['game_id']).get()
-        if not game_ref.exists:
+        # Check if game exists, and create a game object for validation
+        game = self.unit_of_work.game(data['game_id'])
+        if game is None:
             raise ValidationError('Game doesn\'t exist!')
 
-        # Create a game object for validation
-        game = Game.from_dict(game_ref.to_dict())
-
         # Check if user exists
         assert_player_exists(data['user_id'])
 
@@ -183,20 +183,17 @@ class RespondOfferInput(Schema):
     # Decline -> False
     response = fields.Boolean(required=True)
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
 
     @validates_schema
     def validate_offer_response(self, data):
-        # Check if game exists
-        game_ref = self.db.collection(GAME_COLLECTION).document(data['game_id']).get()
-        if not game_ref.exists:
+        # Check if game exists, and create a game object for validation
+        game = self.unit_of_work.game(data['game_id'])
+        if game is None:
             raise ValidationError('Game doesn\'t exist!')
 
-        # Create a game object for validation
-        game = Game.from_dict(game_ref.to_dict())
-
         # Check if user exists
         assert_player_exists(data['user_id'])
 
@@ -210,20 +207,17 @@ class ResignInput(Schema):
     # Identifier for the game to make the move on
     game_id = fields.String(required=True)
 
-    def __init__(self, db):
+    def __init__(self, unit_of_work):
         super().__init__()
-        self.db = db
+        self.unit_of_work = unit_of_work
 
     @validates_schema
     def validate_resignation(self, data):
-        # Check if game exists
-        game_ref = self.db.collection(GAME_COLLECTION).document(data['game_id']).get()
-        if not game_ref.exists:
+        # Check if game exists, and create a game object for validation
+        game = self.unit_of_work.game(data['game_id'])
+        if game is None:
             raise ValidationError('Game doesn\'t exist!')
 
-        # Create a game object for validation
-        game = Game.from_dict(game_ref.to_dict())
-
         # Check if user exists
         assert_player_exists(data['user_id'])
 
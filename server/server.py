@@ -2,12 +2,15 @@ import os
 import json
 import time
 import logging
-from flask import Flask, request, abort, jsonify
+from flask import Flask, request, abort, jsonify, g
 from flask_cors import CORS
 from flask_socketio import SocketIO, join_room
 from schemas.game import MakeMoveInput, CreateGameInput, JoinGameInput, DrawOfferInput, RespondOfferInput, ResignInput
 from schemas.controller import ControllerRegisterInput, ControllerPollInput
-from .game import Game, WHITE
+from .game import Game, WHITE, LEGAL_MOVES
+from .game_cache import GAME_CACHE, GameConflictError
+from .id_allocator import GAME_IDS
+from .unit_of_work import UnitOfWork
 from .sunfish_ai import get_ai_move
 import google.cloud
 from google.cloud import firestore
@@ -41,25 +44,36 @@ CONTROLLER_COLLECTION = "controllers"
 COUNTS_COLLECTION = "counts"
 
 BAD_REQUEST = 400
+CONFLICT = 409
 REQUEST_OK = 'OK'
 
 app = Flask(__name__)
 CORS(app)
 socketio = SocketIO(app)
 
+def unit_of_work():
+    """The unit of work of the current request, shared by the input schemas and the route."""
+    if 'unit_of_work' not in g:
+        g.unit_of_work = UnitOfWork(db)
+    return g.unit_of_work
+
+@app.errorhandler(GameConflictError)
+def game_conflict(error):
+    # The game was changed by another request after it was loaded, so the client should retry
+    return str(error), CONFLICT
+
 @app.route('/')
 def main():
     return 'hello world'
 
 @app.route('/makemove', methods=['POST'])
 def make_move():
-    errors = MakeMoveInput(db).validate(request.form)
+    errors = MakeMoveInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
 
-    # Get the game reference and construct a Game object
-    game_ref = db.collection(GAMES_COLLECTION).document(request.form['game_id'])
-    game = Game.from_dict(game_ref.get().to_dict())
+    # Get the Game object (loaded by the input schema)
+    game = unit_of_work().game(request.form['game_id'])
 
     # Make the requested move on the game object
     game.move(request.form['move'])
@@ -74,11 +88,8 @@ def make_move():
         ai_san = get_ai_move(game)
         game.move(ai_san)
 
-    # Export the updated Game object to a dict
-    game_dict = game.to_dict()
-
-    # Write the updated Game dict to Firebase
-    game_ref.set(game_dict)
+    # Write the updated Game object to Firebase (and the game cache)
+    game_dict = unit_of_work().set_game(request.form['game_id'], game)
 
     # only need to emit update here if AI moved
     if opponent_is_ai:
@@ -88,25 +99,35 @@ def make_move():
 
 @app.route('/getgame/<game_id>')
 def get_game(game_id):
-    doc_ref = db.collection(GAMES_COLLECTION).document(game_id).get()
-    if doc_ref.exists:
-        return jsonify(doc_ref.to_dict())
+    game_dict = unit_of_work().game_dict(game_id)
+    if game_dict is not None:
+        return jsonify(game_dict)
     abort(BAD_REQUEST, "Document doesn't exist!")
 
+@app.route('/legalmoves/<game_id>')
+def legal_moves(game_id):
+    game = unit_of_work().game(game_id)
+    if game is None:
+        abort(BAD_REQUEST, "Document doesn't exist!")
+
+    # Legal moves are cached per ply, so clients can fetch them after every move
+    return jsonify({
+        'id': game.id,
+        'ply_count': game.ply_count,
+        'legal_moves': list(game.legal_moves.values())
+    })
+
 @app.route('/creategame', methods=["POST"])
 def create_game():
-    errors = CreateGameInput(db).validate(request.form)
+    errors = CreateGameInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
 
-    # Retrieve game ID count, increment it and cast it to a string.
-    count_ref = db.collection(COUNTS_COLLECTION).document(GAMES_COLLECTION)
-    count = str(int(count_ref.get().to_dict()['count']) + 1)
-
-    # Create a new document reference with the incremented ID.
-    doc_ref = db.collection(GAMES_COLLECTION).document(count)
+    # Allocate the game's ID from this worker's block of IDs (see id_allocator).
+    game_id = GAME_IDS.next_id(unit_of_work().reference(COUNTS_COLLECTION, GAMES_COLLECTION))
+    doc_ref = db.collection(GAMES_COLLECTION).document(game_id)
 
-    # Create a game from the validated schema and the incremented ID.
+    # Create a game from the validated schema and the allocated ID.
     game = Game.from_create_game_schema(request.form, doc_ref.id)
 
     # If the AI is the first player, make a move
@@ -117,25 +138,13 @@ def create_game():
         # have a game ID to listen for events on
 
     # Write the game's dict to the document reference.
-    # NOTE: `set` is used here rather than `create` in the event that
-    #   the counts are somehow modified on Firebase. For example, if
-    #   the count is somehow reset to 0, this will overwrite whatever
-    #   game is stored with ID 0, instead of raising an error.
-    doc_ref.set(game.to_dict())
+    unit_of_work().set_game(doc_ref.id, game)
 
-    # Assign controller to this game
+    # Assign controller to this game (read by the input schema)
     controller_id = request.form['board_id']
-    controller_ref = db.collection(CONTROLLER_COLLECTION).document(controller_id)
-    controller_dict = controller_ref.get().to_dict()
+    controller_dict = unit_of_work().get(CONTROLLER_COLLECTION, controller_id).to_dict()
     controller_dict['game_id'] = doc_ref.id
-    controller_ref.set(controller_dict)
-
-    # Update the incremented ID count on the `/counts/games` document.
-    # HACK: Firebase's `update` does not seem to work for this purpose,
-    #   otherwise we could do `count_ref.update({'count': int(count)})`.
-    game_count_document = count_ref.get().to_dict()
-    game_count_document['count'] = int(count)
-    count_ref.set(game_count_document)
+    unit_of_work().set(CONTROLLER_COLLECTION, controller_id, controller_dict)
 
     return get_game(doc_ref.id)
 
@@ -149,55 +158,52 @@ def game_list():
 
 @app.route('/joingame', methods=["POST"])
 def join_game():
-    errors = JoinGameInput(db).validate(request.form)
+    errors = JoinGameInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
     game_id     = request.form['game_id']
     player_id   = request.form['player_id']
     side        = request.form.get('side', None)
 
-    game_ref    = db.collection(GAMES_COLLECTION).document(game_id)
-    game_dict   = game_ref.get().to_dict()
-    g           = Game.from_dict(game_dict)
+    game        = unit_of_work().game(game_id)
     if side is None:
-        if g.players['w'] is None:
+        if game.players['w'] is None:
             side = 'w'
-        elif g.players['b'] is None:
+        elif game.players['b'] is None:
             side = 'b'
         else:
             abort(BAD_REQUEST, 'No free side to join')
     try:
-        g.add_player(player_id, side)
+        game.add_player(player_id, side)
     except Exception as e:
         abort(BAD_REQUEST, str(e))
-    game_ref.set(g.to_dict())
+    unit_of_work().update_game(game_id, game)
     return get_game(game_id)
 
 @app.route('/controllerregister', methods=['POST'])
 def register_controller():
-    errors = ControllerRegisterInput(db).validate(request.form)
+    errors = ControllerRegisterInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
     controller_id = request.form['board_id']
-    controller_ref = db.collection(CONTROLLER_COLLECTION).document(controller_id)
+    controller_doc = unit_of_work().get(CONTROLLER_COLLECTION, controller_id)
 
     controller_dict = {'game_id': None, 'last_ply_count': 0, **request.form}
     # avoid overwriting game_id
-    if controller_ref.get().exists:
-        controller_dict = controller_ref.get().to_dict()
+    if controller_doc.exists:
+        controller_dict = controller_doc.to_dict()
     controller_dict['last_seen'] = time.time()
 
-    controller_ref.set(controller_dict)
+    unit_of_work().set(CONTROLLER_COLLECTION, controller_id, controller_dict)
     return 'registered'
 
 @app.route('/controllerpoll', methods=['POST'])
 def controller_poll():
-    errors = ControllerPollInput(db).validate(request.form)
+    errors = ControllerPollInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
     controller_id = request.form['board_id']
-    controller_ref = db.collection(CONTROLLER_COLLECTION).document(controller_id)
-    controller_dict = controller_ref.get().to_dict()
+    controller_dict = unit_of_work().get(CONTROLLER_COLLECTION, controller_id).to_dict()
 
     game_id = controller_dict['game_id']
     error = int(request.form.get('error', -1))
@@ -212,7 +218,7 @@ def controller_poll():
     # update controller document
     controller_dict['last_seen'] = time.time()
     controller_dict['last_ply_count'] = ply_count
-    controller_ref.set(controller_dict)
+    unit_of_work().set(CONTROLLER_COLLECTION, controller_id, controller_dict)
 
     poll_response = {'game_over': {'game_over': False, 'reason': None},
                      'history': [], 'initial_positions': {}}
@@ -222,7 +228,7 @@ def controller_poll():
         socketio.emit("controller_error", error, room=game_id)
 
     if game_id is not None and error == -1:
-        game_dict = db.collection(GAMES_COLLECTION).document(game_id).get().to_dict()
+        game_dict = unit_of_work().game_dict(game_id)
         poll_response['game_over'] = game_dict['game_over']
         poll_response['initial_positions'] = game_dict['initial_positions']
 
@@ -232,6 +238,14 @@ def controller_poll():
 
     return jsonify(poll_response)
 
+@app.route('/cachestats')
+def cache_stats():
+    return jsonify({
+        'games': GAME_CACHE.stats(),
+        'game_ids': GAME_IDS.stats(),
+        'legal_moves': {'hits': LEGAL_MOVES.hits, 'misses': LEGAL_MOVES.misses, 'hit_rate': LEGAL_MOVES.hit_rate}
+    })
+
 @socketio.on('register')
 def register_for_game_updates(game_id):
     join_room(game_id)
@@ -239,24 +253,20 @@ def register_for_game_updates(game_id):
 
 @app.route('/drawoffer', methods=["POST"])
 def draw_offer():
-    errors = DrawOfferInput(db).validate(request.form)
+    errors = DrawOfferInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
 
-    # Get the game reference and construct a Game object
-    game_ref = db.collection(GAMES_COLLECTION).document(request.form['game_id'])
-    game = Game.from_dict(game_ref.get().to_dict())
+    # Get the Game object (loaded by the input schema)
+    game = unit_of_work().game(request.form['game_id'])
 
     # Retrieve the player's side and make the offer
     players = {player: side for side, player in game.players.items()}
     side = players[request.form['user_id']]
     game.offer_draw(side=side)
 
-    # Export the updated Game object to a dict
-    game_dict = game.to_dict()
-
-    # Write the updated Game dict to Firebase
-    game_ref.set(game_dict)
+    # Write the changed fields to Firebase (and the game cache)
+    game_dict = unit_of_work().update_game(request.form['game_id'], game)
 
     # Update all clients
     socketio.emit("drawOffer", request.form['user_id'], room=game.id)
@@ -265,13 +275,12 @@ def draw_offer():
 
 @app.route('/respondoffer', methods=["POST"])
 def respond_to_draw_offer():
-    errors = RespondOfferInput(db).validate(request.form)
+    errors = RespondOfferInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
 
-    # Get the game reference and construct a Game object
-    game_ref = db.collection(GAMES_COLLECTION).document(request.form['game_id'])
-    game = Game.from_dict(game_ref.get().to_dict())
+    # Get the Game object (loaded by the input schema)
+    game = unit_of_work().game(request.form['game_id'])
 
     # Retrieve the player's side
     players = {player: side for side, player in game.players.items()}
@@ -283,11 +292,8 @@ def respond_to_draw_offer():
     else:
         game.decline_draw(side=side)
 
-    # Export the updated Game object to a dict
-    game_dict = game.to_dict()
-
-    # Write the updated Game dict to Firebase
-    game_ref.set(game_dict)
+    # Write the changed fields to Firebase (and the game cache)
+    game_dict = unit_of_work().update_game(request.form['game_id'], game)
 
     # Update all clients
     id_draw_offers = {'id': request.form['user_id'], 'draws': game.draw_offers}
@@ -297,24 +303,20 @@ def respond_to_draw_offer():
 
 @app.route('/resign', methods=["POST"])
 def resign():
-    errors = ResignInput(db).validate(request.form)
+    errors = ResignInput(unit_of_work()).validate(request.form)
     if errors:
         abort(BAD_REQUEST, str(errors))
 
-    # Get the game reference and construct a Game object
-    game_ref = db.collection(GAMES_COLLECTION).document(request.form['game_id'])
-    game = Game.from_dict(game_ref.get().to_dict())
+    # Get the Game object (loaded by the input schema)
+    game = unit_of_work().game(request.form['game_id'])
 
     # Retrieve the player's side and make the resignation
     players = {player: side for side, player in game.players.items()}
     side = players[request.form['user_id']]
     game.resign(side=side)
 
-    # Export the updated Game object to a dict
-    game_dict = game.to_dict()
-
-    # Write the updated Game dict to Firebase
-    game_ref.set(game_dict)
+    # Write the changed fields to Firebase (and the game cache)
+    game_dict = unit_of_work().update_game(request.form['game_id'], game)
 
     # Update all clients
     socketio.emit("forfeit", request.form['user_id'], room=game.id)
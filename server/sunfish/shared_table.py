@@ -0,0 +1,150 @@
+import os
+import mmap
+import struct
+import hashlib
+
+import sunfish.sunfish as sunfish
+
+################################################################################
+# A transposition table in a memory mapped file, so that every process running
+# sunfish on one machine (gunicorn workers, UCI engine processes) reads and
+# writes the same table.
+#
+# Entries are lockless: each slot holds (key ^ data, data) as two 64 bit words,
+# so a slot torn by two processes writing at once fails the key check on read
+# and is treated as a miss.
+#
+# Enabled by setting SUNFISH_SHARED_TABLE to the path of the table file (ideally
+# on a tmpfs such as /dev/shm), with SUNFISH_SHARED_TABLE_MB as its size.
+################################################################################
+
+ENTRY = struct.Struct('<QQ')
+
+def position_key(pos, salt=b''):
+    ''' A 64 bit key for a position that is stable across processes
+        (unlike hash(), which is randomised per process for strings). '''
+    h = hashlib.blake2b(pos.board.encode(), digest_size=8)
+    h.update(bytes((pos.wc[0], pos.wc[1], pos.bc[0], pos.bc[1], pos.ep, pos.kp)) + salt)
+    return int.from_bytes(h.digest(), 'little') or 1
+
+class SharedTable:
+    ''' Fixed size table of 64 bit keys to 64 bit values, always replacing '''
+
+    def __init__(self, path, size_mb=64):
+        self.path = path
+        self.entries = size_mb * 1024 * 1024 // ENTRY.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # Every process truncates to the same size, so racing here is harmless
+            if os.fstat(fd).st_size < self.entries * ENTRY.size:
+                os.ftruncate(fd, self.entries * ENTRY.size)
+            self.mm = mmap.mmap(fd, self.entries * ENTRY.size)
+        finally:
+            os.close(fd)
+
+    def get(self, key):
+        check, data = ENTRY.unpack_from(self.mm, (key % self.entries) * ENTRY.size)
+        if check ^ data == key:
+            return data
+        return None
+
+    def put(self, key, data):
+        ENTRY.pack_into(self.mm, (key % self.entries) * ENTRY.size, key ^ data, data)
+
+    def clear(self):
+        self.mm[:] = bytes(len(self.mm))
+
+    def close(self):
+        self.mm.close()
+
+def open_from_environment():
+    ''' The SharedTable configured by the environment, or None if disabled '''
+    path = os.environ.get('SUNFISH_SHARED_TABLE')
+    if not path:
+        return None
+    return SharedTable(path, int(os.environ.get('SUNFISH_SHARED_TABLE_MB', 64)))
+
+class _Layered:
+    ''' A per-search LRUCache (exactly as Searcher uses) in front of the shared
+        table. The local layer guarantees the root move can't be evicted by
+        another process mid-search. '''
+
+    def __init__(self, table):
+        self.local = sunfish.LRUCache(sunfish.TABLE_SIZE)
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        data = self.table.get(self.shared_key(key))
+        if data is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        value = self.decode(data)
+        self.local[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self.local[key] = value
+        self.table.put(self.shared_key(key), self.encode(value))
+
+class SharedScoreTable(_Layered):
+    ''' tp_score: (pos, depth, root) -> Entry(lower, upper) '''
+
+    def shared_key(self, key):
+        pos, depth, root = key
+        return position_key(pos, struct.pack('<h?', depth, root))
+
+    @staticmethod
+    def encode(entry):
+        return ((entry.lower & 0xffffffff) << 32) | (entry.upper & 0xffffffff)
+
+    @staticmethod
+    def decode(data):
+        lower, upper = struct.unpack('<ii', struct.pack('<II', data >> 32, data & 0xffffffff))
+        return sunfish.Entry(lower, upper)
+
+class SharedMoveTable(_Layered):
+    ''' tp_move: pos -> move (or None for a null move). Null moves are kept as
+        () internally, since None means 'not found'. '''
+
+    def shared_key(self, pos):
+        return position_key(pos, b'm')
+
+    @staticmethod
+    def encode(move):
+        if not move:
+            return 1 << 16
+        return 1 << 17 | move[0] << 8 | move[1]
+
+    @staticmethod
+    def decode(data):
+        if data & (1 << 17):
+            return ((data >> 8) & 0xff, data & 0xff)
+        return ()
+
+    def get(self, key, default=None):
+        return super().get(key, default) or default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, () if value is None else value)
+
+class SharedSearcher(sunfish.Searcher):
+    ''' A Searcher whose transposition tables are backed by a SharedTable '''
+
+    def __init__(self, table):
+        super().__init__()
+        self.tp_score = SharedScoreTable(table)
+        self.tp_move = SharedMoveTable(table)
+
+    @property
+    def hits(self):
+        return self.tp_score.hits + self.tp_move.hits
+
+    @property
+    def misses(self):
+        return self.tp_score.misses + self.tp_move.misses
@@ -364,10 +364,17 @@ class Searcher:
             # Yield so the user may inspect the search
             yield
 
-    def search(self, pos, secs):
+    def search(self, pos, secs=None, nodes=None, depth=None):
+        """ Searches until any of the given budgets is used up.
+            secs is wall-clock time, nodes and depth are deterministic
+            limits that are checked after each iteration of deepening. """
         start = time.time()
         for _ in self._search(pos):
-            if time.time() - start > secs:
+            if secs is not None and time.time() - start > secs:
+                break
+            if nodes is not None and self.nodes >= nodes:
+                break
+            if depth is not None and self.depth >= depth:
                 break
         # If the game hasn't finished we can retrieve our move from the
         # transposition table.
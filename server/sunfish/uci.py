@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+################################################################################
+# A minimal UCI front end for sunfish, used as the default binary by the UCI
+# engine pool in server/engines.py.
+#
+# Supports: uci, isready, ucinewgame, position (startpos/fen + moves),
+#           go (depth, nodes, movetime), quit
+################################################################################
+
+import os
+import sys
+
+# Running as a script puts this directory first on the path, which would make
+# 'sunfish' resolve to sunfish.py instead of this package.
+sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import sunfish.sunfish as sunfish
+from sunfish.tools import parseFEN, mparse, mrender, get_color, FEN_INITIAL
+from sunfish.shared_table import SharedSearcher, open_from_environment
+
+def output(line):
+    print(line)
+    sys.stdout.flush()
+
+def parse_position(args):
+    ''' Parses the arguments of a 'position' command into a sunfish Position '''
+    if args[0] == 'startpos':
+        fen, rest = FEN_INITIAL, args[1:]
+    else:
+        fen, rest = ' '.join(args[1:7]), args[7:]
+    pos = parseFEN(fen)
+    if rest and rest[0] == 'moves':
+        for move in rest[1:]:
+            pos = pos.move(mparse(get_color(pos), move))
+    return pos
+
+def parse_go(args):
+    ''' Turns the arguments of a 'go' command into Searcher.search budgets '''
+    budget = {}
+    for key, value in zip(args[::2], args[1::2]):
+        if key == 'depth':
+            budget['depth'] = int(value)
+        elif key == 'nodes':
+            budget['nodes'] = int(value)
+        elif key == 'movetime':
+            budget['secs'] = int(value) / 1000
+    # Don't search forever if no (supported) budget was given
+    return budget or {'secs': 1}
+
+def main():
+    # Shares its transposition table with other processes if SUNFISH_SHARED_TABLE is set
+    shared_table = open_from_environment()
+    pos = parseFEN(FEN_INITIAL)
+    for line in sys.stdin:
+        args = line.split()
+        if not args:
+            continue
+        command = args[0]
+        if command == 'uci':
+            output('id name sunfish')
+            output('uciok')
+        elif command == 'isready':
+            output('readyok')
+        elif command == 'ucinewgame':
+            pos = parseFEN(FEN_INITIAL)
+        elif command == 'position':
+            pos = parse_position(args[1:])
+        elif command == 'go':
+            searcher = sunfish.Searcher() if shared_table is None else SharedSearcher(shared_table)
+            move, score = searcher.search(pos, **parse_go(args[1:]))
+            output(f'info depth {searcher.depth} nodes {searcher.nodes} score cp {score}')
+            output('bestmove ' + (mrender(pos, move) if move else '(none)'))
+        elif command == 'quit':
+            break
+
+if __name__ == '__main__':
+    main()
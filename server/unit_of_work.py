@@ -0,0 +1,100 @@
+import copy
+from .game import Game
+from .game_cache import GAME_CACHE
+
+GAMES_COLLECTION = "games"
+
+class WrittenSnapshot:
+    """Snapshot of a document written by a unit of work, in place of reading it back."""
+
+    def __init__(self, id_, data):
+        self.id = id_
+        self.exists = True
+        self._data = copy.deepcopy(data)
+
+    def to_dict(self) -> dict:
+        return copy.deepcopy(self._data)
+
+class UnitOfWork:
+    """The documents read and written while handling one request.
+
+    The input schemas and the route share the unit of work of a request (see server.unit_of_work),
+    so each document is read from Firestore (or the game cache) at most once per request, and each
+    game is only loaded into a Game object once. Documents written during the request replace the
+    ones that were read.
+
+    Nothing is kept between requests, since other requests (or workers) can change the documents.
+    """
+
+    def __init__(self, db, game_cache=GAME_CACHE):
+        self.db = db
+        self.game_cache = game_cache
+        self._snapshots = {}
+        self._game_dicts = {}
+        self._games = {}
+
+    def reference(self, collection, document_id):
+        """The Firestore document reference of a document."""
+        return self.db.collection(collection).document(document_id)
+
+    def get(self, collection, document_id):
+        """Reads a document (only from Firestore the first time it is read in the request).
+
+        Returns:
+            The document snapshot, which has to be checked with 'exists'.
+        """
+        key = (collection, document_id)
+        if key not in self._snapshots:
+            self._snapshots[key] = self.reference(collection, document_id).get()
+        return self._snapshots[key]
+
+    def set(self, collection, document_id, data) -> None:
+        """Writes a document to Firestore."""
+        self.reference(collection, document_id).set(data)
+        self._snapshots[(collection, document_id)] = WrittenSnapshot(document_id, data)
+
+    def game_dict(self, game_id) -> dict:
+        """Reads a stored game dict through the game cache (see GameCache.get_dict).
+
+        Returns:
+            The stored game dict, which must not be modified (None if the game doesn't exist).
+        """
+        if game_id not in self._game_dicts:
+            self._game_dicts[game_id] = self.game_cache.get_dict(self.reference(GAMES_COLLECTION, game_id))
+        return self._game_dicts[game_id]
+
+    def game(self, game_id) -> Game:
+        """Loads a game, shared by everything that handles the request.
+
+        Returns:
+            The Game object (None if the game doesn't exist).
+        """
+        if game_id not in self._games:
+            game_dict = self.game_dict(game_id)
+            self._games[game_id] = Game.from_dict(game_dict) if game_dict is not None else None
+        return self._games[game_id]
+
+    def set_game(self, game_id, game) -> dict:
+        """Writes a game to Firestore and the game cache (see GameCache.set).
+
+        Returns:
+            The game dict that was written.
+        """
+        game_dict = self.game_cache.set(self.reference(GAMES_COLLECTION, game_id), game, self._game_dicts.get(game_id))
+        self._game_dicts[game_id] = game_dict
+        self._games[game_id] = game
+        return game_dict
+
+    def update_game(self, game_id, game) -> dict:
+        """Writes the fields of a game changed by the request, unless the game changed since it was read
+        (see GameCache.update).
+
+        Returns:
+            The game dict that was written.
+        Raises:
+            GameConflictError: When the game was changed by another request.
+        """
+        game_dict = self.game_cache.update(self.reference(GAMES_COLLECTION, game_id), game, self._game_dicts.get(game_id))
+        self._game_dicts[game_id] = game_dict
+        self._games[game_id] = game
+        return game_dict
@@ -0,0 +1,68 @@
+"""Test cases for the engine backends."""
+
+import unittest
+from server.game import Game, WHITE, BLACK
+from server.engines import SunfishEngine, UCIEnginePool, UCIEngine, EngineError, SUNFISH_UCI_COMMAND
+
+BUDGET = {'depth': 2}
+
+class EnginesTest(unittest.TestCase):
+    # Setup and helper functions
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts one pool for all test cases, since starting processes is slow."""
+        cls.pool = UCIEnginePool(size=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.game = Game('1')
+        self.game.add_player('1', side=WHITE)
+        self.game.add_player('AI', side=BLACK)
+        self.game.move('e4')
+
+    def assertLegal(self, san):
+        self.assertIn(self.game.board.parse_san(san), self.game.board.legal_moves)
+
+    # Tests
+
+    def test_sunfish_engine_legal_move(self):
+        """The in-process engine produces a legal move."""
+        self.assertLegal(SunfishEngine().best_move(self.game, BUDGET))
+
+    def test_uci_pool_legal_move(self):
+        """The UCI pool produces a legal move."""
+        self.assertLegal(self.pool.best_move(self.game, BUDGET))
+
+    def test_uci_pool_matches_in_process(self):
+        """The bundled UCI wrapper searches exactly like the in-process engine."""
+        self.assertEqual(SunfishEngine().best_move(self.game, BUDGET), self.pool.best_move(self.game, BUDGET))
+
+    def test_uci_pool_reuses_processes(self):
+        """Processes are started once and reused across games."""
+        self.pool.best_move(self.game, BUDGET)
+        pids = {engine.process.pid for engine in self.pool._engines}
+        for _ in range(4):
+            self.pool.best_move(self.game, BUDGET)
+        self.assertEqual(pids, {engine.process.pid for engine in self.pool._engines})
+
+    def test_uci_pool_restarts_dead_engine(self):
+        """An engine that has died is restarted before it is used."""
+        self.pool.start()
+        for engine in self.pool._engines:
+            engine.kill()
+        self.assertLegal(self.pool.best_move(self.game, BUDGET))
+
+    def test_uci_health_check(self):
+        """A running engine passes the health check, a killed one doesn't."""
+        engine = UCIEngine(SUNFISH_UCI_COMMAND)
+        self.assertTrue(engine.is_alive())
+        engine.kill()
+        self.assertFalse(engine.is_alive())
+
+    def test_uci_bad_command(self):
+        """An engine that never completes the UCI handshake raises an EngineError."""
+        self.assertRaises(EngineError, lambda: UCIEngine(['cat'], timeout=0.5))
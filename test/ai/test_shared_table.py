@@ -0,0 +1,64 @@
+"""Test cases for the shared-memory transposition table."""
+
+import os
+import struct
+import tempfile
+import unittest
+import multiprocessing
+from sunfish.tools import parseFEN, FEN_INITIAL
+from sunfish.sunfish import Searcher, Entry
+from sunfish.shared_table import SharedTable, SharedSearcher, SharedScoreTable, ENTRY
+
+def search_in_child(path):
+    """Searches the initial position in another process, sharing the table at path."""
+    SharedSearcher(SharedTable(path, 1)).search(parseFEN(FEN_INITIAL), depth=4)
+
+class SharedTableTest(unittest.TestCase):
+    # Setup and helper functions
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'table')
+        self.table = SharedTable(self.path, 1)
+
+    def tearDown(self):
+        self.table.close()
+        self.directory.cleanup()
+
+    # Tests
+
+    def test_put_get(self):
+        """A value that was put can be read back with its key."""
+        self.table.put(12345, 678)
+        self.assertEqual(678, self.table.get(12345))
+
+    def test_get_missing(self):
+        """An empty slot is a miss."""
+        self.assertIsNone(self.table.get(12345))
+
+    def test_torn_entry_is_miss(self):
+        """An entry whose data doesn't match its check word is a miss."""
+        self.table.put(12345, 678)
+        offset = (12345 % self.table.entries) * ENTRY.size
+        struct.pack_into('<Q', self.table.mm, offset + 8, 679)
+        self.assertIsNone(self.table.get(12345))
+
+    def test_score_entry_round_trip(self):
+        """Negative and positive bounds survive encoding."""
+        entry = Entry(-69290, 69290)
+        self.assertEqual(entry, SharedScoreTable.decode(SharedScoreTable.encode(entry)))
+
+    def test_same_move_as_private_search(self):
+        """A search with a shared table finds the same move as a private one."""
+        pos = parseFEN(FEN_INITIAL)
+        self.assertEqual(Searcher().search(pos, depth=4)[0], SharedSearcher(self.table).search(pos, depth=4)[0])
+
+    def test_shared_between_processes(self):
+        """A search in another process fills the table for this one."""
+        process = multiprocessing.Process(target=search_in_child, args=(self.path,))
+        process.start()
+        process.join()
+        searcher = SharedSearcher(self.table)
+        searcher.search(parseFEN(FEN_INITIAL), depth=4)
+        self.assertGreater(searcher.hits, 0)
+        self.assertLess(searcher.nodes, 100)
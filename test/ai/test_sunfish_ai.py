@@ -0,0 +1,46 @@
+"""Test cases for the Sunfish AI interface."""
+
+import unittest
+import chess
+from server.game import Game, WHITE, BLACK
+from server.sunfish_ai import get_ai_move, AI_LEVELS
+from sunfish.tools import parseFEN, FEN_INITIAL
+from sunfish.sunfish import Searcher
+
+class SunfishAITest(unittest.TestCase):
+    # Setup and helper functions
+
+    def setUp(self):
+        self.game = Game('1', ai_level='beginner')
+        self.game.add_player('1', side=WHITE)
+        self.game.add_player('AI', side=BLACK)
+
+    # Tests
+
+    def test_search_depth_budget(self):
+        """A depth budget stops the search at exactly that depth."""
+        searcher = Searcher()
+        searcher.search(parseFEN(FEN_INITIAL), depth=2)
+        self.assertEqual(2, searcher.depth)
+
+    def test_search_node_budget(self):
+        """A node budget stops the search at the first depth that exceeds it."""
+        searcher = Searcher()
+        searcher.search(parseFEN(FEN_INITIAL), nodes=100)
+        self.assertGreaterEqual(searcher.nodes, 100)
+        self.assertLess(searcher.depth, 5)
+
+    def test_search_node_budget_deterministic(self):
+        """The same node budget always produces the same move."""
+        moves = {Searcher().search(parseFEN(FEN_INITIAL), nodes=1000)[0] for _ in range(3)}
+        self.assertEqual(1, len(moves))
+
+    def test_ai_move_legal_for_each_level(self):
+        """Every level except the timed one produces a legal move."""
+        self.game.move('e4')
+        for level, budget in AI_LEVELS.items():
+            if 'secs' in budget:
+                continue
+            self.game._ai_level = level
+            san = get_ai_move(self.game)
+            self.assertIn(self.game.board.parse_san(san), self.game.board.legal_moves)
@@ -0,0 +1,181 @@
+"""Test cases for the GameCache class."""
+
+import unittest
+from server.game import Game, WHITE, BLACK
+from server.game_cache import GameCache, GameConflictError, UPDATE_TOKEN
+from server.game_store import read_game
+from test.routes.mock_firebase import MockClient
+
+class GameCacheTest(unittest.TestCase):
+    # Setup and helper functions
+
+    def setUp(self):
+        self.cache = GameCache(2)
+        self.db = MockClient()
+        self.doc_ref = self.db.collection('games').document('1')
+
+        self.game = Game('creator', '1')
+        self.game.add_player('player_1', WHITE)
+        self.game.add_player('player_2', BLACK)
+
+    # Tests
+
+    def test_get_missing(self):
+        """Get a game that doesn't exist."""
+        self.assertIsNone(self.cache.get(self.doc_ref))
+        self.assertIsNone(self.cache.get_dict(self.doc_ref))
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_set(self):
+        """Write a game through the cache."""
+        game_dict = self.cache.set(self.doc_ref, self.game)
+        self.assertEqual(read_game(self.doc_ref), game_dict)
+        self.assertIsNotNone(game_dict[UPDATE_TOKEN])
+        self.assertEqual(len(self.cache), 1)
+
+    def test_get_after_set(self):
+        """Get a game that was written through the cache."""
+        self.game.move('e4')
+        self.cache.set(self.doc_ref, self.game)
+
+        game = self.cache.get(self.doc_ref)
+        self.assertEqual(game.fen, self.game.fen)
+        self.assertEqual(game.history, self.game.history)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 0))
+
+    def test_get_after_read(self):
+        """Get a game twice, that was written with a token elsewhere."""
+        self.doc_ref.set({**self.game.to_dict(), UPDATE_TOKEN: 'token'})
+        self.cache.get(self.doc_ref)
+        self.cache.get(self.doc_ref)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_get_without_token(self):
+        """Games written without an update token aren't cached."""
+        self.doc_ref.set(self.game.to_dict())
+        self.cache.get(self.doc_ref)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_stale_written_elsewhere(self):
+        """Get a game that was changed by another worker since it was cached."""
+        self.cache.set(self.doc_ref, self.game)
+
+        other_cache = GameCache(2)
+        game = other_cache.get(self.doc_ref)
+        game.offer_draw(WHITE)
+        other_cache.set(self.doc_ref, game)
+
+        game = self.cache.get(self.doc_ref)
+        self.assertTrue(game.draw_offers[WHITE]['made'])
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.stale), (0, 1, 1))
+
+    def test_stale_deleted(self):
+        """Get a game that was deleted since it was cached."""
+        self.cache.set(self.doc_ref, self.game)
+        self.doc_ref.exists = False
+        self.assertIsNone(self.cache.get(self.doc_ref))
+        self.assertEqual(self.cache.stale, 1)
+
+    def test_without_validation(self):
+        """Get a cached game without checking its version."""
+        cache = GameCache(2, validate=False)
+        cache.set(self.doc_ref, self.game)
+        self.doc_ref.set({**self.doc_ref.to_dict(), UPDATE_TOKEN: 'other'})
+        cache.get(self.doc_ref)
+        self.assertEqual((cache.hits, cache.stale), (1, 0))
+
+    def test_changes_not_cached(self):
+        """Changes to a game from the cache aren't cached until it is written."""
+        self.cache.set(self.doc_ref, self.game)
+        game = self.cache.get(self.doc_ref)
+        game.move('e4')
+        game.resign(BLACK)
+
+        game = self.cache.get(self.doc_ref)
+        self.assertEqual(game.ply_count, 0)
+        self.assertFalse(game.resigned[BLACK])
+
+    def test_eviction(self):
+        """Games are evicted once the cache is full."""
+        for game_id in ('1', '2', '3'):
+            self.cache.set(self.db.collection('games').document(game_id), Game('creator', game_id))
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get(self.doc_ref)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_invalidate(self):
+        """Invalidate a cached game."""
+        self.cache.set(self.doc_ref, self.game)
+        self.cache.invalidate('1')
+        self.cache.get(self.doc_ref)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_update(self):
+        """Update a game that was read through the cache, writing only the fields that changed."""
+        self.game.move('e4')
+        self.cache.set(self.doc_ref, self.game)
+        stored_dict = self.cache.get_dict(self.doc_ref)
+        game = Game.from_dict(stored_dict)
+        game.resign(BLACK)
+
+        game_dict = self.cache.update(self.doc_ref, game, stored_dict)
+        self.assertEqual(read_game(self.doc_ref), game_dict)
+        self.assertEqual(game_dict['result'], '1-0')
+        self.assertEqual(set(self.doc_ref._mock_updates()[0]),
+                         {'resigned', 'in_progress', 'result', 'game_over', UPDATE_TOKEN})
+        self.assertEqual(self.cache.get_dict(self.doc_ref), game_dict)
+
+    def test_update_reads_version_after_set(self):
+        """Updating a game written by the cache reads its version (for the update time of the write)."""
+        self.cache.validate = False
+        self.game.move('e4')
+        self.cache.set(self.doc_ref, self.game)
+        stored_dict = self.cache.get_dict(self.doc_ref)
+        reads = self.doc_ref.reads
+        game = Game.from_dict(stored_dict)
+        game.offer_draw(WHITE)
+        self.cache.update(self.doc_ref, game, stored_dict)
+        self.assertEqual(self.doc_ref.reads - reads, 1)
+        self.assertTrue(read_game(self.doc_ref)['draw_offers'][WHITE]['made'])
+
+    def test_update_conflict(self):
+        """Update a game that was changed by another worker since it was read."""
+        self.doc_ref.set(self.game.to_dict())
+        stored_dict = self.cache.get_dict(self.doc_ref)
+        other = Game.from_dict(stored_dict)
+        other.move('e4')
+        self.doc_ref.set(other.to_dict())
+
+        self.game.resign(WHITE)
+        self.assertRaises(GameConflictError, lambda: self.cache.update(self.doc_ref, self.game, stored_dict))
+        self.assertEqual(read_game(self.doc_ref), other.to_dict())
+        self.assertEqual(self.doc_ref._mock_updates(), [])
+
+    def test_update_conflict_after_set(self):
+        """Update a game written by the cache, that was changed by another worker since."""
+        self.cache.set(self.doc_ref, self.game)
+        stored_dict = self.cache.get_dict(self.doc_ref)
+        self.doc_ref.set({**stored_dict, 'ply_count': 1})
+        self.game.resign(WHITE)
+        self.assertRaises(GameConflictError, lambda: self.cache.update(self.doc_ref, self.game, stored_dict))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_update_after_move(self):
+        """Games with moves made since they were loaded are written in full."""
+        self.cache.set(self.doc_ref, self.game)
+        stored_dict = self.cache.get_dict(self.doc_ref)
+        self.game.move('e4')
+        game_dict = self.cache.update(self.doc_ref, self.game, stored_dict)
+        self.assertEqual(read_game(self.doc_ref)['history'], game_dict['history'])
+        self.assertEqual(self.doc_ref._mock_updates(), [])
+
+    def test_stats(self):
+        """Get the metrics of the cache, and clear them."""
+        self.cache.set(self.doc_ref, self.game)
+        self.cache.get(self.doc_ref)
+        self.cache.get(self.db.collection('games').document('2'))
+        self.assertEqual(self.cache.stats(), {'size': 2, 'games': 1, 'hits': 1, 'misses': 1, 'stale': 0, 'hit_rate': 0.5})
+
+        self.cache.clear()
+        self.assertEqual(self.cache.stats()['hit_rate'], 0.0)
+        self.assertEqual(len(self.cache), 0)
@@ -0,0 +1,55 @@
+"""Test cases for the LRUCache class."""
+
+import unittest
+from server.cache import LRUCache
+
+class LRUCacheTest(unittest.TestCase):
+    # Setup and helper functions
+
+    def setUp(self):
+        self.cache = LRUCache(2)
+
+    # Tests
+
+    def test_invalid_size_type(self):
+        """Create a cache with a size that isn't an int."""
+        self.assertRaises(TypeError, lambda: LRUCache('2'))
+
+    def test_invalid_size(self):
+        """Create a cache with no space."""
+        self.assertRaises(ValueError, lambda: LRUCache(0))
+
+    def test_get_missing(self):
+        """Get a key that isn't cached."""
+        self.assertEqual(self.cache.get('a', 'default'), 'default')
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_set_get(self):
+        """Get a key that is cached."""
+        self.cache.set('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_evicts_least_recently_used(self):
+        """Fill the cache, and check that the least recently used key is evicted."""
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_delete(self):
+        """Delete a cached key."""
+        self.cache.set('a', 1)
+        self.cache.delete('a')
+        self.assertNotIn('a', self.cache)
+
+    def test_hit_rate(self):
+        """Check the hit rate after a hit and a miss."""
+        self.assertEqual(self.cache.hit_rate, 0.0)
+        self.cache.set('a', 1)
+        self.cache.get('a')
+        self.cache.get('b')
+        self.assertEqual(self.cache.hit_rate, 0.5)
@@ -2,7 +2,7 @@
 
 import chess
 import unittest
-from server.game import Game, WHITE, BLACK, SCORES
+from server.game import Game, WHITE, BLACK, SCORES, LEGAL_MOVES
 
 import fileinput
 from os import listdir
@@ -99,6 +99,10 @@ class GameTest(unittest.TestCase):
         """Invalid time control value (negative int)."""
         self.assertRaises(ValueError, lambda: Game('1', time_controls=-60))
 
+    def test_init_invalid_ai_level_type(self):
+        """Invalid AI level type (not a string)."""
+        self.assertRaises(TypeError, lambda: Game('1', ai_level=1))
+
     def test_init_zero_time_control_result(self):
         """Time controls set to 0 (Each side has no time)."""
         self.assertEqual(self.game_ft.result, SCORES['draw'])
@@ -183,6 +187,12 @@ class GameTest(unittest.TestCase):
         """Play through test game 1 and check PGN string."""
         self.assertEqual(self.test_game_1.pgn, '1. f3 e5 2. g4 Qh4#')
 
+    def test_prop_pgn_standard_san(self):
+        """Check that moves requested in non-standard SAN are written to the PGN in standard SAN."""
+        self.assertEqual(self.test_game_4.history[26]['san'], 'cxd8b')
+        self.assertIn(' 14. cxd8=B ', self.test_game_4.pgn)
+        self.assertEqual(self.test_game_4.pgn, chess.Board().variation_san(self.test_game_4.board.move_stack))
+
     def test_prop_pgn_long(self):
         """Play through test game 2 and check PGN string."""
         self.assertEqual(self.test_game_2.pgn, '1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Ba4 Nf6 5. O-O Be7 6. Re1 b5 7. Bb3 d6 8. c3 Na5 9. Bc2 c5 10. d4 Qc7 11. h3 O-O 12. Nbd2 Bd7 13. Nf1 Nc6 14. d5 Nd8 15. g4 Ne8 16. Ng3 g6 17. Kh2 Ng7 18. Rg1 f6 19. Be3 Nf7 20. Rg2 Kh8 21. Qd2 Qc8 22. Rh1 Rg8 23. Rhg1 a5 24. Kh1 b4 25. c4 a4 26. Bd3 Qa6 27. Qe2 Raf8 28. Nd2 Qc8 29. f3 Ne8 30. Ndf1 Kg7 31. Bc1 h6 32. Ne3 Kh7 33. Rh2 Nh8 34. h4 Rf7 35. Nd1 Bf8 36. Nf2 Bg7 37. f4 Bf8 38. Qf3 Qd8 39. Nh3 Qe7 40. g5 Bxh3 41. f5 hxg5 42. hxg5 Rgg7 43. Rxh3+ Kg8 44. fxg6 Rxg6 45. Nf5 Qd7 46. Rg2 fxg5 47. Rgh2 Bg7 48. Rxh8+ Bxh8 49. Qh5 Rff6 50. Qxh8+ Kf7 51. Rh7+ Ng7 52. Rxg7+ Rxg7 53. Qxg7+')
@@ -354,6 +364,14 @@ class GameTest(unittest.TestCase):
         """When assigned to `false` in `__init__`."""
         self.assertEqual(self.game_wpt.public, False)
 
+    def test_prop_ai_level_unassigned(self):
+        """When not assigned in `__init__`."""
+        self.assertEqual(self.game.ai_level, None)
+
+    def test_prop_ai_level_assigned(self):
+        """When assigned in `__init__`."""
+        self.assertEqual(Game('1', ai_level='casual').ai_level, 'casual')
+
     # NOTE: 'result' property
     def test_prop_result_1_0_without_time(self):
         """When game is a win for white (1-0) not due to time."""
@@ -421,6 +439,53 @@ class GameTest(unittest.TestCase):
             self.game_wpt.move(move)
         self.assertEqual(self.game_wpt.game_over, {'game_over': True, 'reason': 'Three-fold repetition'})
 
+    def test_status_evaluated_once_per_ply(self):
+        """Check that the board is only evaluated once for all of the status properties."""
+        calls = []
+        evaluate = self.test_game_3._board_game_over_reason
+        self.test_game_3._board_game_over_reason = lambda: calls.append(1) or evaluate()
+        self.test_game_3._status_cache = None
+        self.test_game_3._board_status = None
+        self.test_game_3.to_dict()
+        self.test_game_3.to_dict()
+        self.assertEqual(len(calls), 1)
+
+    def test_status_updated_after_resignation(self):
+        """Check that the cached status is invalidated when a side resigns."""
+        self.assertTrue(self.game_wpt.in_progress)
+        self.game_wpt.resign(side=BLACK)
+        self.assertEqual(self.game_wpt.result, SCORES[WHITE])
+        self.assertEqual(self.game_wpt.game_over, {'game_over': True, 'reason': 'Resignation'})
+
+    def test_status_updated_after_time_runs_out(self):
+        """Check that the cached status is invalidated when the remaining time changes."""
+        self.assertTrue(self.game_wpt.in_progress)
+        self.game_wpt.time_delta(-60)
+        self.assertEqual(self.game_wpt.game_over, {'game_over': True, 'reason': 'Time'})
+
+    def test_repetitions_counts_positions(self):
+        """Check that repeated positions are counted."""
+        for move in ['Nc3', 'Nc6', 'Nb1', 'Nb8']:
+            self.game_wpt.move(move)
+        self.assertEqual(len(self.game_wpt.repetitions), 4)
+        self.assertEqual(self.game_wpt.repetitions[self.game_wpt._position_hash()], 2)
+
+    def test_repetitions_reset_by_irreversible_move(self):
+        """Check that positions before an irreversible move are forgotten."""
+        for move in ['Nc3', 'Nc6', 'Nb1', 'Nb8', 'e4']:
+            self.game_wpt.move(move)
+        self.assertEqual(self.game_wpt.repetitions, {self.game_wpt._position_hash(): 1})
+
+    def test_prop_game_over_fivefold(self):
+        """When game is over due to five-fold repetition (counted before the game was stored)."""
+        self.game_wpt.move('Nc3')
+        input_dict = self.game_wpt.to_dict()
+        input_dict['repetitions'] = {position: 5 for position in input_dict['repetitions']}
+        # Otherwise the board's game-over reason is taken from the stored status
+        del input_dict['game_over']
+        game = Game.from_dict(input_dict)
+        self.assertEqual(game.game_over, {'game_over': True, 'reason': 'Five-fold repetition'})
+
     def test_prop_game_over_draw_agreement(self):
         """When game is over due to draw agreement."""
         self.game_wpt.offer_draw()
@@ -512,6 +577,86 @@ class GameTest(unittest.TestCase):
         self.game_wpt.move('e4')
         self.assertEqual(len(self.game_wpt.history), 1)
 
+    def test_move_with_null_move(self):
+        """Make a null move, which python-chess parses as SAN."""
+        self.assertRaises(ValueError, lambda: self.game_wpt.move('--'))
+
+    # NOTE: 'move_uci' and 'move_obj' function tests
+    def test_move_uci(self):
+        """Make a move in UCI notation, and check that it is recorded in SAN."""
+        move = self.game_wpt.move_uci('g1f3')
+        self.assertEqual(move['san'], 'Nf3')
+        self.assertEqual(self.game_wpt.history, [move])
+
+    def test_move_uci_with_invalid_uci(self):
+        """Make a move with invalid UCI."""
+        self.assertRaises(ValueError, lambda: self.game_wpt.move_uci('e2'))
+
+    def test_move_uci_illegal(self):
+        """Make an illegal move in UCI notation."""
+        self.assertRaises(ValueError, lambda: self.game_wpt.move_uci('e2e5'))
+
+    def test_move_uci_in_finished_game(self):
+        """Make a move in UCI notation in a finished game."""
+        self.assertRaises(RuntimeError, lambda: self.test_game_1.move_uci('e2e4'))
+
+    def test_move_obj_matches_move(self):
+        """Make the same moves with move and move_obj, and compare the two dicts."""
+        for san in GameTest.moves['ep_promotions']:
+            self.game_wp.move_obj(self.game_wp.board.parse_san(san))
+        # The test game's SAN isn't normalised (e.g. 'cxd8b'), so the 'san' fields are left out
+        without_san = lambda history: [{k: v for k, v in move.items() if k != 'san'} for move in history]
+        self.assertEqual(without_san(self.test_game_4.history), without_san(self.game_wp.history))
+        self.assertEqual(self.test_game_4.initial_positions, self.game_wp.initial_positions)
+
+    # NOTE: 'parse_move' function tests
+    def test_parse_move_does_not_move(self):
+        """Parse a move, and check that it isn't made."""
+        self.assertEqual(self.game_wpt.parse_move('e4'), chess.Move.from_uci('e2e4'))
+        self.assertEqual(self.game_wpt.ply_count, 0)
+        self.assertEqual(self.game_wpt.fen, chess.STARTING_FEN)
+
+    def test_parse_move_with_invalid_san(self):
+        """Parse a move with invalid SAN in the current context."""
+        self.assertRaises(ValueError, lambda: self.game_wpt.parse_move('e6'))
+
+    # NOTE: 'legal_moves' property tests
+    def test_prop_legal_moves_start(self):
+        """Legal moves in the starting position."""
+        legal_moves = self.game_wpt.legal_moves
+        self.assertEqual(len(legal_moves), 20)
+        self.assertEqual(legal_moves['Nf3'], {'san': 'Nf3', 'uci': 'g1f3', 'from': 'g1', 'to': 'f3', 'promotion': None})
+
+    def test_prop_legal_moves_promotion(self):
+        """Legal moves include promotions, in standard SAN."""
+        for san in GameTest.moves['ep_promotions'][:26]:
+            self.game_wp.move(san)
+        self.assertEqual(self.game_wp.legal_moves['cxd8=B']['promotion'], 'b')
+
+    def test_prop_legal_moves_ended_game(self):
+        """There are no legal moves in an ended game."""
+        self.game_wpt.resign()
+        self.assertEqual(self.game_wpt.legal_moves, {})
+
+    def test_prop_legal_moves_cached(self):
+        """Legal moves are shared between Game objects for the same game and ply."""
+        for san in ['e4', 'e5', 'Nf3']:
+            self.game_wpt.move(san)
+        legal_moves = self.game_wpt.legal_moves
+        game = Game.from_dict(self.game_wpt.to_dict())
+        self.assertIs(game.legal_moves, legal_moves)
+
+    def test_parse_move_uses_cached_legal_moves(self):
+        """Parse a move when the legal moves are cached, without building the board."""
+        for san in ['e4', 'e5', 'Nf3']:
+            self.game_wpt.move(san)
+        LEGAL_MOVES.clear()
+        self.game_wpt.legal_moves
+        game = Game.from_dict(self.game_wpt.to_dict())
+        self.assertEqual(game.parse_move('Nc6'), chess.Move.from_uci('b8c6'))
+        self.assertIsNone(game._board)
+        self.assertEqual(LEGAL_MOVES.hits, 1)
+
     # NOTE: 'time_delta' function tests
     def test_time_delta_invalid_side(self):
         """Make a time delta to an invalid side."""
@@ -711,30 +856,31 @@ class GameTest(unittest.TestCase):
             BLACK: {'made': False, 'accepted': False}
         })
 
-    # NOTE: '_construct_move_description' function tests
+    # NOTE: '_construct_move_record' function tests
     #   Most of the functionality for this function is actually tested in the 'history' property.
-    def test_construct_move_description_wrong_move(self):
-        """Construct move description of a move which isn't on the top of the move stack."""
+    def test_construct_move_record_wrong_move(self):
+        """Construct the record of a move which isn't legal in the current position."""
         self.game_wpt.move('e4')
         move = chess.Move.from_uci('a7c6')
-        self.assertRaises(ValueError, lambda: self.game_wpt._construct_move_description(move))
+        self.assertRaises(ValueError, lambda: self.game_wpt._construct_move_record(move, 'Nc6', None))
 
-    def test_construct_move_description_correct_move(self):
-        """Construct move description of a move which is on the top of the move stack."""
+    def test_construct_move_record_correct_move(self):
+        """Construct the record of a move which is about to be made."""
         san = 'Nc3'
-        # need to update the internal position dict
-        self.game_wpt._update_initial_positions(self.game_wpt.board.parse_san(san), self.game_wpt.turn)
-        move = self.game_wpt.board.push_san(san)
+        # need to update the internal position array
+        move = self.game_wpt.board.parse_san(san)
+        captured_initial_position = self.game_wpt._update_initial_positions(move, self.game_wpt.turn)
 
-        # Check that the move stack manipulation done by the function is okay
-        self.assertEqual(self.game_wpt.board.peek(), move)
-        desc = self.game_wpt._construct_move_description(move)
-        self.assertEqual(self.game_wpt.board.peek(), move)
+        # Check that the board isn't changed by the function
+        fen = self.game_wpt.fen
+        desc = self.game_wpt._construct_move_record(move, san, captured_initial_position).to_dict()
+        self.assertEqual(self.game_wpt.fen, fen)
 
         # Check that the move description is correct
         self.assertEqual(desc, {
+            'san': 'Nc3',
             'side': 'w',
-            'ply_count': 0,
+            'ply_count': 1,
             'move_count': 1,
             'piece': 'n',
             'initial_pos_piece': 'b1',
@@ -821,13 +967,127 @@ class GameTest(unittest.TestCase):
         self.assertEqual(expected, Game.from_dict(input_dict).pgn)
 
     def test_from_dict_preserves_move_stack(self):
-        """Generate a Game object from a dict, and check that the move stack is preserved."""
+        """Generate a Game object from a dict in verification mode, and check that the move stack is preserved."""
         expected = self.test_game_1.board.move_stack
         input_dict = self.test_game_1.to_dict()
-        self.assertEqual(expected, Game.from_dict(input_dict).board.move_stack)
+        self.assertEqual(expected, Game.from_dict(input_dict, verify=True).board.move_stack)
+
+    def test_from_dict_snapshot_matches_replay(self):
+        """Load test game 2 from its snapshot and by replaying, and compare the two dicts."""
+        input_dict = self.test_game_2.to_dict()
+        expected = Game.from_dict(input_dict, verify=True).to_dict()
+        self.assertEqual(expected, Game.from_dict(input_dict).to_dict())
+
+    def test_from_dict_without_snapshot(self):
+        """Generate a Game object from a dict stored without a board snapshot (by replaying the history)."""
+        expected = self.test_game_3.to_dict()
+        input_dict = {k: v for k, v in expected.items() if k not in ('fen', 'pgn', 'repetitions')}
+        self.assertEqual(expected, Game.from_dict(input_dict).to_dict())
+
+    def test_from_dict_verify_mismatch(self):
+        """Verify a dict whose stored board doesn't match its history."""
+        input_dict = self.test_game_1.to_dict()
+        input_dict['fen'] = chess.STARTING_FEN
+        self.assertRaises(ValueError, lambda: Game.from_dict(input_dict, verify=True))
+
+    def test_from_dict_threefold_after_load(self):
+        """Repeat a position which occurred before the game was loaded from a dict."""
+        for move in ['Nc3', 'Nc6', 'Nb1', 'Nb8', 'Nc3', 'Nc6']:
+            self.game_wpt.move(move)
+        game = Game.from_dict(self.game_wpt.to_dict())
+        self.assertFalse(game.game_over['game_over'])
+        game.move('Nb1')
+        self.assertEqual(game.game_over, {'game_over': True, 'reason': 'Three-fold repetition'})
+
+    def test_from_dict_pgn_after_load(self):
+        """Make moves after loading a game from a dict, and check that the PGN continues."""
+        game = copy.deepcopy(self.game_wpt)
+        for san in ['e4', 'e5', 'Nf3']:
+            self.game_wpt.move(san)
+            game = Game.from_dict(game.to_dict())
+            game.move(san)
+        self.assertEqual(self.game_wpt.pgn, game.pgn)
 
     def test_from_dict_game_5(self):
         """Generate a Game object from a dict representation of test game 5, and compare the two dicts."""
         expected = self.test_game_5.to_dict()
         input_dict = expected
         self.assertEqual(expected, Game.from_dict(input_dict).to_dict())
+
+    def test_from_dict_board_not_built_for_metadata(self):
+        """Load a game, change its metadata and export it, without the board being built."""
+        game = Game.from_dict(self.test_game_2.to_dict())
+        game.offer_draw(side=WHITE)
+        game.decline_draw(side=BLACK)
+        game.resign(side=BLACK)
+        game.to_dict()
+        self.assertIsNone(game._board)
+
+    def test_from_dict_board_not_built_for_ended_game(self):
+        """Load a checkmated game, and check its status without the board being built."""
+        game = Game.from_dict(self.test_game_1.to_dict())
+        self.assertEqual(game.result, SCORES[BLACK])
+        self.assertEqual(game.game_over, {'game_over': True, 'reason': 'Checkmate'})
+        self.assertIsNone(game._board)
+
+    def test_from_dict_board_built_for_move(self):
+        """Load a game, and make a move on it."""
+        game = Game.from_dict(self.game_wpt.to_dict())
+        game.move('e4')
+        self.assertIsNotNone(game._board)
+        self.assertEqual(game.fen, 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1')
+
+    # NOTE: 'to_bytes' and 'from_bytes' function tests
+    def test_from_bytes_game_3(self):
+        """Generate a Game object from a binary snapshot of test game 3, and compare the two dicts."""
+        expected = self.test_game_3.to_dict()
+        self.assertEqual(expected, Game.from_bytes(self.test_game_3.to_bytes()).to_dict())
+
+    def test_from_bytes_empty_game(self):
+        """Generate a Game object from a binary snapshot of a game without players or time controls."""
+        expected = Game('1', ai_level='casual').to_dict()
+        self.assertEqual(expected, Game.from_bytes(Game('1', ai_level='casual').to_bytes()).to_dict())
+
+    def test_from_bytes_flags(self):
+        """Check that draw offers, resignations and remaining time are preserved."""
+        self.game_wpt.offer_draw(side=BLACK)
+        self.game_wpt.time_delta(-5, side=WHITE)
+        self.game_wpt.resign(side=WHITE)
+        expected = self.game_wpt.to_dict()
+        self.assertEqual(expected, Game.from_bytes(self.game_wpt.to_bytes()).to_dict())
+
+    def test_from_bytes_standard_san(self):
+        """Check that the history rebuilt from a binary snapshot has standard SAN."""
+        game = Game.from_bytes(self.test_game_1.to_bytes())
+        self.assertEqual([move['san'] for move in game.history], ['f3', 'e5', 'g4', 'Qh4#'])
+        self.assertEqual(game.pgn, self.test_game_1.pgn)
+
+    def test_from_bytes_then_move(self):
+        """Make moves after loading a game from a binary snapshot."""
+        for san in ['e4', 'e5']:
+            self.game_wpt.move(san)
+        game = Game.from_bytes(self.game_wpt.to_bytes())
+        for san in ['Nf3', 'Nc6']:
+            self.game_wpt.move(san)
+            game.move(san)
+        self.assertEqual(self.game_wpt.to_dict(), game.to_dict())
+
+    def test_from_bytes_size(self):
+        """Check the size of the binary snapshot of test game 2 (2 bytes per ply, and the current state)."""
+        data = self.test_game_2.to_bytes()
+        self.assertLess(len(data), 2 * self.test_game_2.ply_count + 200)
+
+    def test_from_bytes_invalid(self):
+        """Generate a Game object from data which isn't a binary snapshot."""
+        self.assertRaises(ValueError, lambda: Game.from_bytes(b'{"id": "1"}'))
+
+    def test_from_bytes_unsupported_version(self):
+        """Generate a Game object from a binary snapshot with an unsupported version."""
+        data = bytearray(self.game_wpt.to_bytes())
+        data[2] = 255
+        self.assertRaises(ValueError, lambda: Game.from_bytes(bytes(data)))
+
+    def test_from_dict_preserves_ai_level(self):
+        """Generate a Game object from a dict, and check that the AI level is preserved."""
+        input_dict = Game('1', ai_level='beginner').to_dict()
+        self.assertEqual('beginner', Game.from_dict(input_dict).ai_level)
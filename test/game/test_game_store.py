@@ -0,0 +1,122 @@
+"""Test cases for the storage layout of games in Firestore."""
+
+import unittest
+from server.game import Game, WHITE, BLACK
+from server.game_store import (read_game, write_game, migrate_game, migrate_games, split_pgn, move_id,
+                               MOVES_COLLECTION, LAYOUT, MOVE_LOG)
+from test.routes.mock_firebase import MockClient
+
+class GameStoreTest(unittest.TestCase):
+    # Setup and helper functions
+
+    def setUp(self):
+        self.db = MockClient()
+        self.doc_ref = self.db.collection('games').document('1')
+
+        self.game = Game('creator', '1')
+        self.game.add_player('player_1', WHITE)
+        self.game.add_player('player_2', BLACK)
+        for san in ('e4', 'e5', 'Nf3'):
+            self.game.move(san)
+
+    def moves(self, doc_ref=None):
+        """The stored move documents of a game, by ID."""
+        doc_ref = doc_ref or self.doc_ref
+        return {id_: doc.to_dict() for id_, doc in doc_ref.collection(MOVES_COLLECTION).documents.items() if doc.exists}
+
+    # Tests
+
+    def test_split_pgn(self):
+        """Split PGN movetext into plies."""
+        self.assertEqual(split_pgn(''), [])
+        self.assertEqual(split_pgn('1. e4 e5 2. Nf3'), ['1. e4', 'e5', '2. Nf3'])
+        self.assertEqual(split_pgn('1...e5 2. Nf3+'), ['1...e5', '2. Nf3+'])
+
+    def test_write_game(self):
+        """Write a game as a snapshot and a move log."""
+        game_dict = write_game(self.doc_ref, self.game.to_dict())
+        self.assertEqual(game_dict[LAYOUT], MOVE_LOG)
+
+        snapshot = self.doc_ref.to_dict()
+        self.assertNotIn('history', snapshot)
+        self.assertNotIn('pgn', snapshot)
+        self.assertEqual(snapshot['fen'], self.game.fen)
+
+        moves = self.moves()
+        self.assertEqual(sorted(moves), [move_id(0), move_id(1), move_id(2)])
+        self.assertEqual(moves[move_id(2)], {'ply': 2, 'move': self.game.history[2], 'pgn': '2. Nf3'})
+
+    def test_read_game(self):
+        """Read a game written as a move log."""
+        game_dict = write_game(self.doc_ref, self.game.to_dict())
+        self.assertEqual(read_game(self.doc_ref), game_dict)
+        self.assertEqual(Game.from_dict(read_game(self.doc_ref)).pgn, '1. e4 e5 2. Nf3')
+
+    def test_read_missing(self):
+        """Read a game that doesn't exist."""
+        self.assertIsNone(read_game(self.doc_ref))
+
+    def test_read_legacy(self):
+        """Read a game stored as a single document."""
+        self.doc_ref.set(self.game.to_dict())
+        self.assertEqual(read_game(self.doc_ref), self.game.to_dict())
+
+    def test_write_new_moves(self):
+        """Only the moves made since the game was read are written."""
+        write_game(self.doc_ref, self.game.to_dict())
+        stored_dict = read_game(self.doc_ref)
+        self.doc_ref.collection(MOVES_COLLECTION).document(move_id(0)).data['pgn'] = 'unchanged'
+
+        game = Game.from_dict(stored_dict)
+        game.move('Nc6')
+        write_game(self.doc_ref, game.to_dict(), stored_dict)
+
+        moves = self.moves()
+        self.assertEqual(len(moves), 4)
+        self.assertEqual(moves[move_id(0)]['pgn'], 'unchanged')
+        self.assertEqual(moves[move_id(3)]['pgn'], 'Nc6')
+
+    def test_write_from_legacy(self):
+        """Every move is written for a game that was read as a single document."""
+        self.doc_ref.set(self.game.to_dict())
+        stored_dict = read_game(self.doc_ref)
+        write_game(self.doc_ref, self.game.to_dict(), stored_dict)
+        self.assertEqual(len(self.moves()), 3)
+        self.assertEqual(read_game(self.doc_ref)['history'], self.game.history)
+
+    def test_read_ignores_leftover_moves(self):
+        """Moves beyond the stored ply count (from a failed write) are ignored."""
+        write_game(self.doc_ref, self.game.to_dict())
+        self.doc_ref.collection(MOVES_COLLECTION).document(move_id(3)).set({'ply': 3, 'move': {}, 'pgn': 'Nc6'})
+        self.assertEqual(len(read_game(self.doc_ref)['history']), 3)
+
+    def test_read_missing_moves(self):
+        """Read a game with missing moves."""
+        write_game(self.doc_ref, self.game.to_dict())
+        self.doc_ref.collection(MOVES_COLLECTION).document(move_id(1)).exists = False
+        self.assertRaises(ValueError, lambda: read_game(self.doc_ref))
+
+    def test_migrate_game(self):
+        """Migrate a game stored as a single document."""
+        self.doc_ref.set(self.game.to_dict())
+        self.assertTrue(migrate_game(self.doc_ref))
+        self.assertFalse(migrate_game(self.doc_ref))
+        self.assertFalse(migrate_game(self.db.collection('games').document('2')))
+        self.assertEqual(read_game(self.doc_ref), {**self.game.to_dict(), LAYOUT: MOVE_LOG})
+
+    def test_migrate_games(self):
+        """Migrate every game stored as a single document, including ones stored without a board snapshot."""
+        games = self.db.collection('games')
+        games.document('1').set(self.game.to_dict())
+        write_game(games.document('2'), self.game.to_dict())
+        without_snapshot = self.game.to_dict()
+        for key in ('fen', 'pgn', 'repetitions'):
+            del without_snapshot[key]
+        games.document('3').set(without_snapshot)
+
+        self.assertEqual(migrate_games(games), 2)
+        for game_id in ('1', '2', '3'):
+            game_dict = read_game(games.document(game_id))
+            self.assertEqual(game_dict[LAYOUT], MOVE_LOG)
+            self.assertEqual(game_dict['pgn'], '1. e4 e5 2. Nf3')
+            self.assertEqual(Game.from_dict(game_dict).fen, self.game.fen)
@@ -0,0 +1,83 @@
+"""Test cases for the IdAllocator class."""
+
+import unittest
+from unittest.mock import patch
+from server.id_allocator import IdAllocator, RESERVE_ATTEMPTS
+from test.routes.mock_firebase import MockClient, MockDocumentReference
+
+class IdAllocatorTest(unittest.TestCase):
+    # Setup and helper functions
+
+    def setUp(self):
+        self.db = MockClient()
+        self.counter = self.db.collection('counts').document('games')
+        self.allocator = IdAllocator(3)
+
+    # Tests
+
+    def test_invalid_block_size(self):
+        """Block sizes must be positive ints."""
+        self.assertRaises(TypeError, lambda: IdAllocator('3'))
+        self.assertRaises(ValueError, lambda: IdAllocator(0))
+
+    def test_sequential(self):
+        """IDs continue from the count, reserving a block at a time."""
+        self.db.collection('counts').add({'count': 10}, document_id='games')
+        ids = [self.allocator.next_id(self.counter) for _ in range(5)]
+        self.assertEqual(ids, ['11', '12', '13', '14', '15'])
+        self.assertEqual(self.counter.data['count'], 16)
+        self.assertEqual(self.allocator.reservations, 2)
+        self.assertEqual(self.counter.reads, 2)
+
+    def test_missing_counter(self):
+        """The counter is created if it doesn't exist."""
+        self.assertEqual(self.allocator.next_id(self.counter), '1')
+        self.assertEqual(self.counter.data, {'count': 3})
+
+    def test_workers_dont_overlap(self):
+        """Two workers reserve separate blocks."""
+        self.db.collection('counts').add({'count': 0}, document_id='games')
+        other = IdAllocator(3)
+        ids = [allocator.next_id(self.counter) for _ in range(4) for allocator in (self.allocator, other)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(self.counter.data['count'], 12)
+
+    def test_conflict(self):
+        """A reservation is retried if another worker advanced the count since it was read."""
+        self.db.collection('counts').add({'count': 0}, document_id='games')
+        get = MockDocumentReference.get
+        other = IdAllocator(3)
+
+        def get_then_reserve(document, field_paths=None):
+            # Another worker reserves a block between the read and the write of the first attempt
+            snapshot = get(document, field_paths)
+            if self.allocator.conflicts == 0 and other.reservations == 0:
+                other.next_id(document)
+            return snapshot
+
+        with patch.object(MockDocumentReference, 'get', get_then_reserve):
+            self.assertEqual(self.allocator.next_id(self.counter), '4')
+        self.assertEqual(self.allocator.conflicts, 1)
+        self.assertEqual(self.counter.data['count'], 6)
+
+    def test_gives_up(self):
+        """Reserving a block fails if the count keeps changing."""
+        self.db.collection('counts').add({'count': 0}, document_id='games')
+        get = MockDocumentReference.get
+
+        def get_then_change(document, field_paths=None):
+            snapshot = get(document, field_paths)
+            document.set({'count': document.data['count']})
+            return snapshot
+
+        with patch.object(MockDocumentReference, 'get', get_then_change):
+            self.assertRaises(RuntimeError, lambda: self.allocator.next_id(self.counter))
+        self.assertEqual(self.allocator.conflicts, RESERVE_ATTEMPTS)
+
+    def test_stats(self):
+        """Get the metrics of the allocator, and clear them."""
+        self.allocator.next_id(self.counter)
+        self.assertEqual(self.allocator.stats(), {'block_size': 3, 'allocated': 1, 'reservations': 1, 'conflicts': 0})
+        self.allocator.clear()
+        self.assertEqual(self.allocator.stats()['allocated'], 0)
+        self.assertEqual(self.allocator.next_id(self.counter), '4')
@@ -0,0 +1,121 @@
+"""Test cases for the bulk PGN importer."""
+
+import io
+import unittest
+from server.game import Game, WHITE, BLACK, SCORES
+from server.pgn_import import read_games, parse_movetext, import_game, import_pgn, PGNImportError
+
+PGN = '''[Event "Fool's mate"]
+[White "Alice"]
+[Black "Bob"]
+[Result "0-1"]
+
+1. f3 e5 2. g4 Qh4# 0-1
+
+[Event "Annotated"]
+[White "Alice \\"A\\" Smith"]
+[Black "?"]
+[Result "1-0"]
+
+1. e4 {Best by test} e5 2. Nf3!? (2. f4 exf4 (2... d5)) Nc6 $1
+3. Bb5 ; The Ruy Lopez
+a6 1-0
+
+[Event "Drawn"]
+[Result "1/2-1/2"]
+
+1. d4 d5 1/2-1/2
+'''
+
+class PGNImportTest(unittest.TestCase):
+    # Setup and helper functions
+
+    def setUp(self):
+        self.games = list(read_games(io.StringIO(PGN)))
+
+    def expected_game(self, moves):
+        """Game dict for the moves, made with Game.move."""
+        game = Game('import')
+        game.add_player('white', WHITE)
+        game.add_player('black', BLACK)
+        for san in moves:
+            game.move(san)
+        return game.to_dict()
+
+    # Tests
+
+    def test_read_games(self):
+        """Split a PGN file into games."""
+        self.assertEqual(len(self.games), 3)
+        self.assertEqual(self.games[0][0], {'Event': "Fool's mate", 'White': 'Alice', 'Black': 'Bob', 'Result': '0-1'})
+        self.assertEqual(self.games[0][1], '1. f3 e5 2. g4 Qh4# 0-1')
+        self.assertEqual(self.games[1][0]['White'], 'Alice "A" Smith')
+
+    def test_read_games_without_termination(self):
+        """Split games that have no termination marker."""
+        games = list(read_games(io.StringIO('[Event "1"]\n\n1. e4 e5\n[Event "2"]\n\n1. d4\n')))
+        self.assertEqual(games, [({'Event': '1'}, '1. e4 e5'), ({'Event': '2'}, '1. d4')])
+
+    def test_parse_movetext(self):
+        """Ignore comments, variations, NAGs and annotations."""
+        moves, result = parse_movetext(self.games[1][1])
+        self.assertEqual(moves, ['e4', 'e5', 'Nf3', 'Nc6', 'Bb5', 'a6'])
+        self.assertEqual(result, '1-0')
+
+    def test_parse_movetext_without_result(self):
+        """Parse movetext with no termination marker."""
+        self.assertEqual(parse_movetext('1.e4 e5 2.Nf3'), (['e4', 'e5', 'Nf3'], None))
+
+    def test_import_game(self):
+        """Import a game that ends on the board."""
+        game_dict = import_game(*self.games[0])
+        self.assertEqual(game_dict['players'], {WHITE: 'Alice', BLACK: 'Bob'})
+        self.assertEqual(game_dict['result'], SCORES[BLACK])
+        self.assertEqual(game_dict['game_over'], {'game_over': True, 'reason': 'Checkmate'})
+
+        expected = self.expected_game(['f3', 'e5', 'g4', 'Qh4#'])
+        for key in ('history', 'initial_positions', 'fen', 'pgn', 'repetitions', 'ply_count'):
+            self.assertEqual(game_dict[key], expected[key])
+
+    def test_import_game_resignation(self):
+        """Import a decisive game that doesn't end on the board."""
+        game_dict = import_game(*self.games[1])
+        self.assertEqual(game_dict['players'], {WHITE: 'white', BLACK: 'black'})
+        self.assertEqual(game_dict['resigned'], {WHITE: False, BLACK: True})
+        self.assertEqual(game_dict['result'], SCORES[WHITE])
+        self.assertEqual(game_dict['game_over'], {'game_over': True, 'reason': 'Resignation'})
+        self.assertEqual(game_dict['history'], self.expected_game(['e4', 'e5', 'Nf3', 'Nc6', 'Bb5', 'a6'])['history'])
+
+    def test_import_game_draw(self):
+        """Import a drawn game that doesn't end on the board."""
+        game_dict = import_game(*self.games[2])
+        self.assertEqual(game_dict['result'], SCORES['draw'])
+        self.assertEqual(game_dict['game_over'], {'game_over': True, 'reason': 'Draw by agreement'})
+
+    def test_import_game_loads(self):
+        """Load an imported game, and continue it."""
+        game = Game.from_dict(import_game({}, '1. e4 e5 2. Nf3'))
+        game.move('Nc6')
+        self.assertEqual(game.pgn, '1. e4 e5 2. Nf3 Nc6')
+        self.assertEqual(Game.from_dict(game.to_dict(), verify=True).fen, game.fen)
+
+    def test_import_game_illegal_move(self):
+        """Import a game with an illegal move."""
+        self.assertRaises(ValueError, lambda: import_game({}, '1. e4 e5 2. Ke3'))
+
+    def test_import_game_custom_position(self):
+        """Import a game from a custom starting position."""
+        self.assertRaises(ValueError, lambda: import_game({'SetUp': '1', 'FEN': '8/8/8/8/8/8/8/K6k w - - 0 1'}, ''))
+
+    def test_import_pgn(self):
+        """Import every game in a file, in order."""
+        for processes in (1, 2):
+            game_dicts = list(import_pgn(io.StringIO(PGN), processes))
+            self.assertEqual([game_dict['result'] for game_dict in game_dicts], ['0-1', '1-0', '1/2-1/2'])
+
+    def test_import_pgn_invalid(self):
+        """Import a file with a game that can't be imported."""
+        pgn = PGN + '\n[Event "Illegal"]\n\n1. e5 *\n'
+        with self.assertRaises(PGNImportError):
+            list(import_pgn(io.StringIO(pgn), 1))
+        self.assertEqual(len(list(import_pgn(io.StringIO(pgn), 2, skip_invalid=True))), 3)
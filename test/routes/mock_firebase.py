@@ -2,8 +2,14 @@ import uuid
 import copy
 import time
 import copy
+import itertools
 from collections import defaultdict
 from unittest.mock import MagicMock
+from google.api_core.exceptions import NotFound, AlreadyExists, FailedPrecondition
+from google.cloud.firestore import LastUpdateOption
+
+# update times given to written documents (only compared for equality, like Firestore timestamps)
+update_times = itertools.count(1)
 
 # firebase_admin mocks
 
@@ -38,11 +44,18 @@ class MockClient(MagicMock):
     def collection(self, collection_name):
         return self.collections[collection_name]
 
+    def _mock_reads(self, collection_name=None):
+        """Helper function to count the document reads made, in all collections or in one (including subcollections)"""
+        collections = [self.collections[collection_name]] if collection_name else self.collections.values()
+        return sum(collection._mock_reads() for collection in collections)
+
 class MockCollection(MagicMock):
     def __init__(self, name, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.name = name
         self.documents = keydefaultdict(MockDocumentReference)
+        # documents returned by queries
+        self.query_reads = 0
 
     def document(self, document_name=None):
         if document_name is None:
@@ -55,40 +68,110 @@ class MockCollection(MagicMock):
         doc = self.documents[document_id]
         doc.data = copy.deepcopy(document_data)
         doc.exists = True
+        doc.update_time = next(update_times)
         return time.time(), doc
 
     def where(self, path, op_string, value):
         query = MockQuery(self)
         return query.where(path, op_string, value)
 
+    def get(self):
+        return MockQuery(self).get()
+
+    def _mock_reads(self):
+        return self.query_reads + sum(doc._mock_reads() for doc in self.documents.values())
+
 class MockDocumentReference(MagicMock):
     def __init__(self, id_, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.exists = False
         self.data = None
         self.id = id_
+        self.update_time = None
+        self.reads = 0
+        # (method, data) of each write, e.g. ('update', {'resigned': {'w': True, 'b': False}})
+        self.writes = []
+        self.collections = keydefaultdict(MockCollection)
+
+    def collection(self, collection_name):
+        return self.collections[collection_name]
+
+    def _mock_reads(self):
+        return self.reads + sum(collection._mock_reads() for collection in self.collections.values())
 
     def to_dict(self):
         return copy.deepcopy(self.data)
 
-    def get(self):
-        return self
+    def get(self, field_paths=None):
+        """Returns the document, or a snapshot of only the given fields (like DocumentReference.get)"""
+        self.reads += 1
+        if field_paths is None:
+            return self
+        data = None
+        if self.exists:
+            data = {field: self.data[field] for field in field_paths if field in self.data}
+        return MockDocumentSnapshot(self.id, self.exists, data, self.update_time)
 
     def create(self, data):
+        if self.exists:
+            raise AlreadyExists(f"Document '{self.id}' already exists")
         self.data = copy.deepcopy(data)
         self.exists = True
-        # Should return a 'WriteResult' but not currently using
+        return self._mock_write('create', data)
 
     def set(self, data):
         self.data = copy.deepcopy(data)
         self.exists = True
-        # Should return a 'WriteResult' but not currently using
+        return self._mock_write('set', data)
+
+    def update(self, field_updates, option=None):
+        """Sets the given fields, which can be paths such as 'game_over.reason' (like DocumentReference.update)
+
+        Only last update time options are supported, which fail if the document was written since that time.
+        """
+        if isinstance(option, LastUpdateOption) and option._last_update_time != self.update_time:
+            raise FailedPrecondition(f"Document '{self.id}' was updated after {option._last_update_time}")
+        if not self.exists:
+            raise NotFound(f"Document '{self.id}' doesn't exist")
+        for path, value in field_updates.items():
+            *parents, field = path.split('.')
+            data = self.data
+            for parent in parents:
+                data = data.setdefault(parent, {})
+            data[field] = copy.deepcopy(value)
+        return self._mock_write('update', field_updates)
+
+    def _mock_write(self, method, data):
+        """Records a write, and returns its result (a 'WriteResult' with only the update time)"""
+        self.update_time = next(update_times)
+        self.writes.append((method, copy.deepcopy(data)))
+        return MockWriteResult(self.update_time)
+
+    def _mock_updates(self):
+        """Helper function to get the field updates made to the document"""
+        return [data for method, data in self.writes if method == 'update']
+
+class MockWriteResult:
+    """Result of a write (see MockDocumentReference.set)"""
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+class MockDocumentSnapshot:
+    """Snapshot of only some fields of a document (see MockDocumentReference.get)"""
+    def __init__(self, id_, exists, data, update_time=None):
+        self.id = id_
+        self.exists = exists
+        self.data = data
+        self.update_time = update_time
+
+    def to_dict(self):
+        return copy.deepcopy(self.data)
 
 class MockQuery(MagicMock):
     def __init__(self, collection, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.collection = collection
-        self.matching = copy.deepcopy(collection.documents)
+        self.matching = {id_: copy.deepcopy(doc) for id_, doc in collection.documents.items() if doc.exists}
 
     def where(self, path, op_string, value):
         path_components = path.split('.')
@@ -121,6 +204,7 @@ class MockQuery(MagicMock):
         return self
 
     def get(self):
+        self.collection.query_reads += len(self.matching)
         return self.matching.values()
 
 
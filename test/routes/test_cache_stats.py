@@ -0,0 +1,36 @@
+"""Test cases for the GET server route /cachestats."""
+
+import unittest
+import json
+from server.server import app
+from server.game_cache import GAME_CACHE
+from unittest.mock import patch
+from .mock_firebase import MockClient
+
+OK          = 200
+
+@patch('server.server.db', new_callable=MockClient)
+class CacheStatsTest(unittest.TestCase):
+    # Setup and helper functions
+
+    @classmethod
+    def setUpClass(cls):
+        """Runs once before all test cases."""
+        cls.route = '/cachestats'
+        cls.client = app.test_client()
+
+    def setUp(self):
+        GAME_CACHE.clear()
+
+    # Tests
+
+    def test_cache_stats(self, mock_db):
+        """Get the metrics of the caches."""
+        CacheStatsTest.client.get('/getgame/game_that_doesnt_exist')
+        response = CacheStatsTest.client.get(CacheStatsTest.route)
+        self.assertEqual(OK, response.status_code)
+
+        stats = json.loads(response.data)
+        self.assertEqual(stats['games']['misses'], 1)
+        self.assertEqual(stats['games']['hits'], 0)
+        self.assertIn('hit_rate', stats['legal_moves'])
@@ -91,6 +91,26 @@ class CreateGameTest(unittest.TestCase):
         response = self.post(params)
         self.assertEqual(BAD_REQUEST, response.status_code)
 
+    def test_invalid_ai_level(self, mock_db, mock_auth):
+        """An unknown AI level should error"""
+        self.set_up_mock(mock_db, mock_auth)
+        params = self.create_dummy_params()
+        params["ai_level"] = "grandmaster"
+        response = self.post(params)
+        self.assertEqual(BAD_REQUEST, response.status_code)
+
+    def test_ai_level_stored(self, mock_db, mock_auth):
+        """A valid AI level should be stored on the game"""
+        self.set_up_mock(mock_db, mock_auth)
+        params = self.create_dummy_params()
+        params["player1_id"] = "AI"
+        params["ai_level"] = "beginner"
+        response = self.post(params)
+        self.assertEqual(OK, response.status_code)
+        json_game = json.loads(response.data)
+        self.assertEqual("beginner", json_game["ai_level"])
+        self.assertEqual(1, json_game["ply_count"])
+
     def test_controller_id_not_exist(self, mock_db, mock_auth):
         """If a controller doesn't exist, then it should error"""
         self.set_up_mock(mock_db, mock_auth)
@@ -0,0 +1,135 @@
+"""Test cases for the number of Firestore reads made by each server route."""
+
+import time
+import unittest
+from unittest.mock import patch
+from server.server import app
+from server.game import Game, WHITE, BLACK
+from server.game_cache import GAME_CACHE
+from server.id_allocator import GAME_IDS
+from .mock_firebase import MockClient, MockAuth
+
+OK = 200
+
+@patch('firebase_admin.auth', new_callable=MockAuth)
+@patch('server.server.db', new_callable=MockClient)
+class FirestoreReadsTest(unittest.TestCase):
+    # Setup and helper functions
+
+    @classmethod
+    def setUpClass(cls):
+        """Runs once before all test cases."""
+        cls.client = app.test_client()
+
+    def setUp(self):
+        GAME_CACHE.clear()
+        GAME_IDS.clear()
+
+    def set_up_mock(self, mock_db, mock_auth, black='player_2'):
+        """Creates a game (with the given black player), its controller and its players in the mock database."""
+        for user in ('player_1', 'player_2'):
+            mock_auth._mock_add_user(user)
+
+        game = Game('player_1', 'some_game')
+        game.add_player('player_1', WHITE)
+        if black is not None:
+            game.add_player(black, BLACK)
+        game.move('e4')
+        mock_db.collection('games').add(game.to_dict(), document_id='some_game')
+        mock_db.collection('counts').add({'count': 0}, document_id='games')
+        mock_db.collection('controllers').add({'board_id': 'kevin',
+                                               'board_version': '1.0',
+                                               'game_id': 'some_game',
+                                               'last_ply_count': 0,
+                                               'last_seen': time.time()}, document_id='kevin')
+
+    def assert_reads(self, mock_db, reads, method, route, data=None):
+        """Makes a request, and checks the number of documents read from Firestore."""
+        before = mock_db._mock_reads()
+        response = method(route, data=data)
+        self.assertEqual(OK, response.status_code, response.data)
+        self.assertEqual(reads, mock_db._mock_reads() - before)
+
+    # Tests
+
+    def test_make_move(self, mock_db, mock_auth):
+        """/makemove reads the game once."""
+        self.set_up_mock(mock_db, mock_auth)
+        form = {'game_id': 'some_game', 'user_id': 'player_2', 'move': 'e5'}
+        self.assert_reads(mock_db, 1, self.client.post, '/makemove', form)
+
+    def test_make_move_cached(self, mock_db, mock_auth):
+        """/makemove only reads the version of a cached game."""
+        self.set_up_mock(mock_db, mock_auth)
+        self.client.post('/makemove', data={'game_id': 'some_game', 'user_id': 'player_2', 'move': 'e5'})
+        form = {'game_id': 'some_game', 'user_id': 'player_1', 'move': 'Nf3'}
+        self.assert_reads(mock_db, 1, self.client.post, '/makemove', form)
+        self.assertEqual(GAME_CACHE.hits, 1)
+
+    def test_make_move_trusted(self, mock_db, mock_auth):
+        """/makemove doesn't read a cached game without validation."""
+        self.set_up_mock(mock_db, mock_auth)
+        self.client.post('/makemove', data={'game_id': 'some_game', 'user_id': 'player_2', 'move': 'e5'})
+        form = {'game_id': 'some_game', 'user_id': 'player_1', 'move': 'Nf3'}
+        with patch.object(GAME_CACHE, 'validate', False):
+            self.assert_reads(mock_db, 0, self.client.post, '/makemove', form)
+
+    def test_get_game(self, mock_db, mock_auth):
+        """/getgame reads the game once."""
+        self.set_up_mock(mock_db, mock_auth)
+        self.assert_reads(mock_db, 1, self.client.get, '/getgame/some_game')
+
+    def test_legal_moves(self, mock_db, mock_auth):
+        """/legalmoves reads the game once."""
+        self.set_up_mock(mock_db, mock_auth)
+        self.assert_reads(mock_db, 1, self.client.get, '/legalmoves/some_game')
+
+    def test_create_game(self, mock_db, mock_auth):
+        """/creategame reads the game count (to reserve a block of IDs) and the controller once each, and not the game it creates."""
+        self.set_up_mock(mock_db, mock_auth)
+        form = {'creator_id': 'player_1', 'player1_id': 'player_1', 'player2_id': 'OPEN',
+                'time_per_player': 60, 'board_id': 'kevin'}
+        self.assert_reads(mock_db, 2, self.client.post, '/creategame', form)
+
+    def test_create_game_reserved(self, mock_db, mock_auth):
+        """/creategame only reads the controller while the reserved block of IDs lasts."""
+        self.set_up_mock(mock_db, mock_auth)
+        form = {'creator_id': 'player_1', 'player1_id': 'player_1', 'player2_id': 'OPEN',
+                'time_per_player': 60, 'board_id': 'kevin'}
+        self.client.post('/creategame', data=form)
+        self.assert_reads(mock_db, 1, self.client.post, '/creategame', form)
+
+    def test_join_game(self, mock_db, mock_auth):
+        """/joingame reads the game once."""
+        self.set_up_mock(mock_db, mock_auth, black=None)
+        form = {'game_id': 'some_game', 'player_id': 'player_2', 'side': BLACK}
+        self.assert_reads(mock_db, 1, self.client.post, '/joingame', form)
+
+    def test_controller_register(self, mock_db, mock_auth):
+        """/controllerregister reads the controller once."""
+        self.set_up_mock(mock_db, mock_auth)
+        form = {'board_id': 'new_board', 'board_version': '1.0'}
+        self.assert_reads(mock_db, 1, self.client.post, '/controllerregister', form)
+
+    def test_controller_poll(self, mock_db, mock_auth):
+        """/controllerpoll reads the controller and the game once each."""
+        self.set_up_mock(mock_db, mock_auth)
+        self.assert_reads(mock_db, 2, self.client.post, '/controllerpoll', {'board_id': 'kevin', 'ply_count': 0})
+
+    def test_draw_offer(self, mock_db, mock_auth):
+        """/drawoffer reads the game once."""
+        self.set_up_mock(mock_db, mock_auth)
+        form = {'game_id': 'some_game', 'user_id': 'player_1'}
+        self.assert_reads(mock_db, 1, self.client.post, '/drawoffer', form)
+
+    def test_respond_offer(self, mock_db, mock_auth):
+        """/respondoffer reads the game once."""
+        self.set_up_mock(mock_db, mock_auth)
+        form = {'game_id': 'some_game', 'user_id': 'player_2', 'response': 'false'}
+        self.assert_reads(mock_db, 1, self.client.post, '/respondoffer', form)
+
+    def test_resign(self, mock_db, mock_auth):
+        """/resign reads the game once."""
+        self.set_up_mock(mock_db, mock_auth)
+        form = {'game_id': 'some_game', 'user_id': 'player_1'}
+        self.assert_reads(mock_db, 1, self.client.post, '/resign', form)
@@ -0,0 +1,110 @@
+"""Test cases for the field updates written by /drawoffer, /respondoffer, /resign and /joingame."""
+
+import unittest
+from unittest.mock import patch
+from server.server import app
+from server.game import Game, WHITE, BLACK
+from server.game_cache import GAME_CACHE, UPDATE_TOKEN
+from server.game_store import read_game
+from .mock_firebase import MockClient, MockAuth
+
+OK       = 200
+CONFLICT = 409
+
+@patch('firebase_admin.auth', new_callable=MockAuth)
+@patch('server.server.db', new_callable=MockClient)
+class GameUpdatesTest(unittest.TestCase):
+    # Setup and helper functions
+
+    @classmethod
+    def setUpClass(cls):
+        """Runs once before all test cases."""
+        cls.client = app.test_client()
+
+    def setUp(self):
+        GAME_CACHE.clear()
+
+    def set_up_mock(self, mock_db, mock_auth, black='player_2'):
+        """Creates a game (with the given black player) and its players in the mock database."""
+        for user in ('player_1', 'player_2'):
+            mock_auth._mock_add_user(user)
+
+        self.game = Game('player_1', 'some_game')
+        self.game.add_player('player_1', WHITE)
+        if black is not None:
+            self.game.add_player(black, BLACK)
+        self.game.move('e4')
+        mock_db.collection('games').add(self.game.to_dict(), document_id='some_game')
+        return mock_db.collection('games').document('some_game')
+
+    def post(self, route, data):
+        response = self.client.post(route, data=data)
+        self.assertEqual(OK, response.status_code, response.data)
+        return response
+
+    # Tests
+
+    def test_draw_offer(self, mock_db, mock_auth):
+        """/drawoffer only updates the draw offers."""
+        doc_ref = self.set_up_mock(mock_db, mock_auth)
+        self.post('/drawoffer', {'game_id': 'some_game', 'user_id': 'player_1'})
+        self.assertEqual(doc_ref._mock_updates(), [{
+            'draw_offers': {WHITE: {'made': True, 'accepted': False}, BLACK: {'made': False, 'accepted': False}},
+            UPDATE_TOKEN: doc_ref.data[UPDATE_TOKEN]
+        }])
+        self.assertEqual([method for method, data in doc_ref.writes], ['update'])
+
+    def test_respond_offer(self, mock_db, mock_auth):
+        """/respondoffer updates the draw offers and the status of the game."""
+        doc_ref = self.set_up_mock(mock_db, mock_auth)
+        self.post('/drawoffer', {'game_id': 'some_game', 'user_id': 'player_1'})
+        self.post('/respondoffer', {'game_id': 'some_game', 'user_id': 'player_2', 'response': 'true'})
+        self.assertEqual(set(doc_ref._mock_updates()[1]),
+                         {'draw_offers', 'in_progress', 'result', 'game_over', UPDATE_TOKEN})
+        self.assertEqual(read_game(doc_ref)['result'], '1/2-1/2')
+
+    def test_unchanged(self, mock_db, mock_auth):
+        """Declining a draw that wasn't offered doesn't write the game."""
+        doc_ref = self.set_up_mock(mock_db, mock_auth)
+        self.post('/respondoffer', {'game_id': 'some_game', 'user_id': 'player_2', 'response': 'false'})
+        self.assertEqual(doc_ref.writes, [])
+
+    def test_resign(self, mock_db, mock_auth):
+        """/resign updates the resignations and the status of the game, keeping the rest of it."""
+        doc_ref = self.set_up_mock(mock_db, mock_auth)
+        response = self.post('/resign', {'game_id': 'some_game', 'user_id': 'player_1'})
+        self.assertEqual(set(doc_ref._mock_updates()[0]),
+                         {'resigned', 'in_progress', 'result', 'game_over', UPDATE_TOKEN})
+        self.assertEqual(read_game(doc_ref), response.get_json())
+        self.assertEqual(read_game(doc_ref)['pgn'], '1. e4')
+
+    def test_join_game(self, mock_db, mock_auth):
+        """/joingame updates the players and the free slots."""
+        doc_ref = self.set_up_mock(mock_db, mock_auth, black=None)
+        self.post('/joingame', {'game_id': 'some_game', 'player_id': 'player_2', 'side': BLACK})
+        self.assertEqual(doc_ref._mock_updates(), [{
+            'players': {WHITE: 'player_1', BLACK: 'player_2'},
+            'free_slots': 0,
+            UPDATE_TOKEN: doc_ref.data[UPDATE_TOKEN]
+        }])
+
+    def test_move_made_concurrently(self, mock_db, mock_auth):
+        """An update fails if the game was written after it was loaded, keeping the other write."""
+        doc_ref = self.set_up_mock(mock_db, mock_auth)
+        self.post('/drawoffer', {'game_id': 'some_game', 'user_id': 'player_1'})
+
+        # Another worker makes a move, which this worker doesn't check for without validation
+        game = Game.from_dict(read_game(doc_ref))
+        game.move('e5')
+        doc_ref.set({**game.to_dict(), UPDATE_TOKEN: 'other_worker'})
+
+        with patch.object(GAME_CACHE, 'validate', False):
+            response = self.client.post('/resign', data={'game_id': 'some_game', 'user_id': 'player_2'})
+        self.assertEqual(CONFLICT, response.status_code)
+        self.assertEqual(doc_ref.data['ply_count'], 2)
+        self.assertEqual(doc_ref.data[UPDATE_TOKEN], 'other_worker')
+
+        # The game is read again on the next request
+        self.post('/resign', {'game_id': 'some_game', 'user_id': 'player_2'})
+        self.assertEqual(read_game(doc_ref)['result'], '1-0')
+        self.assertEqual(read_game(doc_ref)['pgn'], '1. e4 e5')
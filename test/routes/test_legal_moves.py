@@ -0,0 +1,90 @@
+"""Test cases for the GET server route /legalmoves."""
+
+import unittest
+import pytest
+import json
+from server.server import app
+from unittest.mock import patch
+from .mock_firebase import MockClient, MockAuth
+
+OK          = 200
+BAD_REQUEST = 400
+
+@patch('server.server.db', new_callable=MockClient)
+class LegalMovesTest(unittest.TestCase):
+    # Setup and helper functions
+
+    @classmethod
+    def setUpClass(cls):
+        """Runs once before all test cases."""
+        cls.route = '/legalmoves'
+        cls.client = app.test_client()
+
+    def get(self, subroute):
+        """Helper function for making GET requests.
+
+        Usage:
+            # GET /legalmoves/1
+            response = self.get('/1')
+        """
+        return LegalMovesTest.client.get(LegalMovesTest.route + subroute)
+
+    def setUp(self):
+        self.mock_game = {
+            'id': 'some_game',
+            'creator': 'some_creator',
+            'players': {'w': 'some_player_1', 'b': 'some_player_2'},
+            'public': True,
+            'free_slots': 2,
+            'time_controls': None,
+            'remaining_time': {'w': None, 'b': None},
+            'resigned': {'w': False, 'b': False},
+            'draw_offers': {
+                'w': {'made': False, 'accepted': False},
+                'b': {'made': False, 'accepted': False}
+            },
+            'in_progress': True,
+            'result': '*',
+            'game_over': {'game_over': False, 'reason': None},
+            'turn': 'w',
+            'ply_count': 0,
+            'move_count': 1,
+            'pgn': '',
+            'history': [],
+            'fen': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+            'initial_positions': {'a1': 'a1', 'a2': 'a2', 'a7': 'a7', 'a8': 'a8', 'b1': 'b1', 'b2': 'b2', 'b7': 'b7', 'b8': 'b8', 'c1': 'c1', 'c2': 'c2', 'c7': 'c7', 'c8': 'c8', 'd1': 'd1', 'd2': 'd2', 'd7': 'd7', 'd8': 'd8', 'e1': 'e1', 'e2': 'e2', 'e7': 'e7', 'e8': 'e8', 'f1': 'f1', 'f2': 'f2', 'f7': 'f7', 'f8': 'f8', 'g1': 'g1', 'g2': 'g2', 'g7': 'g7', 'g8': 'g8', 'h1': 'h1', 'h2': 'h2', 'h7': 'h7', 'h8': 'h8'}
+        }
+
+    def set_up_mock(self, mock_db):
+        """Creates some entries in the mock database"""
+        mock_db.collection("games").add(self.mock_game, document_id='some_game')
+
+    # Tests
+
+    def test_game_doesnt_exist(self, mock_db):
+        """Get the legal moves of a game that doesn't exist."""
+        self.set_up_mock(mock_db)
+        response = self.get('/game_that_doesnt_exist')
+        self.assertEqual(BAD_REQUEST, response.status_code)
+
+    def test_game_exists(self, mock_db):
+        """Get the legal moves of a game that exists."""
+        self.set_up_mock(mock_db)
+        response = self.get('/some_game')
+        self.assertEqual(OK, response.status_code)
+
+    def test_legal_moves(self, mock_db):
+        """Check the legal moves returned for the starting position."""
+        self.set_up_mock(mock_db)
+        response = json.loads(self.get('/some_game').data)
+        self.assertEqual(response['id'], 'some_game')
+        self.assertEqual(response['ply_count'], 0)
+        self.assertEqual(len(response['legal_moves']), 20)
+        self.assertIn({'san': 'e4', 'uci': 'e2e4', 'from': 'e2', 'to': 'e4', 'promotion': None}, response['legal_moves'])
+
+    def test_legal_moves_ended_game(self, mock_db):
+        """Check that there are no legal moves in an ended game."""
+        self.mock_game['resigned']['w'] = True
+        self.set_up_mock(mock_db)
+        response = json.loads(self.get('/some_game').data)
+        self.assertEqual(response['legal_moves'], [])
@@ -4,6 +4,8 @@ import unittest
 import pytest
 from server.server import app
 from unittest.mock import patch
+from server.game_cache import GAME_CACHE
+from server.game_store import read_game
 from .mock_firebase import MockClient, MockAuth
 
 OK          = 200
@@ -149,3 +151,35 @@ class MakeMoveTest(unittest.TestCase):
         self.fill_params(game_id='some_game', user_id='some_player_1', move='Nc6')
         response = self.post(self.params)
         self.assertEqual(BAD_REQUEST, response.status_code)
+
+    def test_moves_from_cache(self, mock_db, mock_auth):
+        """Make consecutive moves, loading the game from the game cache."""
+        GAME_CACHE.clear()
+        self.set_up_mock(mock_db, mock_auth)
+        for user_id, move in (('some_player_1', 'e4'), ('some_player_2', 'e5'), ('some_player_1', 'Nf3')):
+            self.fill_params(game_id='some_game', user_id=user_id, move=move)
+            response = self.post(self.params)
+            self.assertEqual(OK, response.status_code)
+
+        # Only the first request read the whole game
+        self.assertEqual((GAME_CACHE.hits, GAME_CACHE.misses), (2, 1))
+        self.assertEqual(read_game(mock_db.collection('games').document('some_game'))['pgn'], '1. e4 e5 2. Nf3')
+
+    def test_move_after_write_elsewhere(self, mock_db, mock_auth):
+        """Make a move on a cached game that another worker has changed since."""
+        GAME_CACHE.clear()
+        self.set_up_mock(mock_db, mock_auth)
+        self.fill_params(game_id='some_game', user_id='some_player_1', move='e4')
+        self.post(self.params)
+
+        # Another worker writes a resignation
+        doc_ref = mock_db.collection('games').document('some_game')
+        game_dict = doc_ref.to_dict()
+        game_dict['resigned']['b'] = True
+        game_dict['update_token'] = 'another_worker'
+        doc_ref.set(game_dict)
+
+        self.fill_params(game_id='some_game', user_id='some_player_2', move='e5')
+        response = self.post(self.params)
+        self.assertEqual(BAD_REQUEST, response.status_code)
+        self.assertEqual(GAME_CACHE.stale, 1)